@@ -0,0 +1,25 @@
+# 原子写入文件：先写同目录下唯一命名的临时文件再替换目标文件，读取方不会读到写了一半的文件，
+# 多个线程或进程同时写入同一个文件时也不会互相覆盖临时文件
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8'):
+    """打开path的临时文件用于写入，with块正常结束时替换path，出错时删除临时文件。
+
+    mode 为 'w' 或 'wb'；以二进制模式写入时忽略 encoding。
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
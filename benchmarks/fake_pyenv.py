@@ -0,0 +1,117 @@
+# 基准测试用的pyenv替身：按环境变量指定的规模、速率和编码输出与pyenv-win相似的内容
+#
+# 环境变量：
+#   FAKE_PYENV_VERSIONS   install -l 输出的版本数量（默认1000）
+#   FAKE_PYENV_INSTALLED  versions 输出的已安装版本数量（默认20）
+#   FAKE_PYENV_LINES      install <版本> 输出的安装日志行数（默认2000）
+#   FAKE_PYENV_RATE       每秒输出的行数，0表示不限速（默认0）
+#   FAKE_PYENV_ENCODING   输出编码，如 utf-8 / gbk（默认utf-8）
+#   FAKE_PYENV_EXIT_CODE  install <版本> 的退出码（默认0）
+#   PYTHON_BUILD_MIRROR_URL  设置后 install <版本> 先从该镜像下载 /<版本>/python-<版本>-amd64.exe（与pyenv-win相同）
+import os
+import sys
+import time
+
+PYENV_VERSION = '3.1.1'
+# 安装日志中的中文行（GBK编码时用于测试解码回退）
+LOG_TEMPLATES = (
+    ':: [Downloading] ::  {version} ...',
+    ':: [Downloading] ::  From https://www.python.org/ftp/python/{release}/python-{version}-amd64.exe',
+    ':: [Installing] ::  {version} ... 正在安装 {line}/{total}',
+    'Extracting python-{version}-amd64.exe: 文件 {line} of {total}',
+)
+
+
+def catalogue(count):
+    """生成count个版本号，顺序和格式与 pyenv install -l 相似（含预发布版和架构变体）"""
+    versions = []
+    minor_versions = [(2, minor) for minor in range(4, 8)] + [(3, minor) for minor in range(0, 15)]
+    patch = 0
+    while len(versions) < count:
+        for major, minor in minor_versions:
+            base = f"{major}.{minor}.{patch}"
+            for variant in ('', 'a1', 'b1', 'rc1'):
+                name = f"{major}.{minor}.{patch}{variant}" if variant else base
+                for arch in ('', '-win32', '-arm64'):
+                    versions.append(name + arch)
+        patch += 1
+    return versions[:count]
+
+
+def installed_versions(count):
+    # 已安装的版本：只取正式版的默认架构
+    versions = [version for version in catalogue(count * 12) if version[-1].isdigit() and '-' not in version]
+    return [version for version in versions if not any(tag in version for tag in ('a1', 'b1', 'rc1'))][:count]
+
+
+def write_line(text, encoding):
+    sys.stdout.buffer.write((text + '\n').encode(encoding, errors='replace'))
+
+
+def emit_lines(lines, rate, encoding):
+    # 按指定速率输出，rate为0时一次性输出
+    interval = 1.0 / rate if rate > 0 else 0
+    start = time.monotonic()
+    for number, line in enumerate(lines, 1):
+        write_line(line, encoding)
+        if interval:
+            sys.stdout.buffer.flush()
+            delay = start + number * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    sys.stdout.buffer.flush()
+
+
+def download_from_mirror(mirror, version, encoding):
+    # 与pyenv-win一样把python.org的地址替换为镜像地址
+    import urllib.request
+    release = version.split('-')[0]
+    url = f"{mirror.rstrip('/')}/{release}/python-{release}-amd64.exe"
+    write_line(f":: [Downloading] ::  {version} ...", encoding)
+    write_line(f":: [Downloading] ::  From {url}", encoding)
+    with urllib.request.urlopen(url, timeout=60) as response:
+        size = len(response.read())
+    write_line(f":: [Downloaded] ::  {size} bytes", encoding)
+
+
+def main(argv):
+    env = os.environ
+    encoding = env.get('FAKE_PYENV_ENCODING', 'utf-8')
+    rate = float(env.get('FAKE_PYENV_RATE', '0'))
+    command = argv[0] if argv else ''
+    args = argv[1:]
+
+    if command == '--version':
+        write_line(f"pyenv {PYENV_VERSION}", encoding)
+    elif command == 'install' and args[:1] == ['-l']:
+        lines = [':: [Info] ::  Mirror: https://www.python.org/ftp/python']
+        lines += catalogue(int(env.get('FAKE_PYENV_VERSIONS', '1000')))
+        emit_lines(lines, rate, encoding)
+    elif command == 'install' and args:
+        version = args[0]
+        release = version.split('-')[0]
+        if env.get('PYTHON_BUILD_MIRROR_URL'):
+            download_from_mirror(env['PYTHON_BUILD_MIRROR_URL'], version, encoding)
+        total = int(env.get('FAKE_PYENV_LINES', '2000'))
+        lines = (LOG_TEMPLATES[number % len(LOG_TEMPLATES)].format(
+            version=version, release=release, line=number, total=total) for number in range(1, total + 1))
+        emit_lines(lines, rate, encoding)
+        return int(env.get('FAKE_PYENV_EXIT_CODE', '0'))
+    elif command == 'versions':
+        installed = installed_versions(int(env.get('FAKE_PYENV_INSTALLED', '20')))
+        lines = [f"  {version}" for version in installed]
+        if lines:
+            lines[-1] = f"* {installed[-1]} (set by PYENV_VERSION environment variable)"
+        emit_lines(lines, rate, encoding)
+    elif command == 'global':
+        installed = installed_versions(int(env.get('FAKE_PYENV_INSTALLED', '20')))
+        if installed and not args:
+            write_line(installed[-1], encoding)
+    else:
+        write_line(f"pyenv: no such command '{command}'", encoding)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,142 @@
+# 支持Range请求的本地HTTP测试服务器：可以限制每个连接的速度、在发送一定字节后断开连接，
+# 用于验证和测量 segmented_download 的分段并行下载和断点续传
+#
+#   python benchmarks/range_server.py <目录> [--port 8000] [--rate-kbps 500] [--drop-after 1048576]
+import argparse
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    # 只支持单个范围，与 installer_cache.parse_range 相同
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[6:].strip().partition('-')
+    if not first:
+        return max(size - int(last), 0), size - 1
+    start, end = int(first), min(int(last), size - 1) if last else size - 1
+    return (start, end) if start <= end else None
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    # 由 make_server 设置：文件目录、每个连接的速度上限（字节/秒，0为不限制）、每个响应发送多少字节后断开
+    directory = '.'
+    rate_limit = 0
+    drop_after = 0
+    supports_ranges = True
+    # 收到的请求数和Range请求数（用于测试）
+    requests = 0
+    range_requests = 0
+    counter_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _file(self):
+        path = os.path.normpath(os.path.join(self.directory, self.path.split('?', 1)[0].lstrip('/')))
+        if not path.startswith(os.path.abspath(self.directory)) or not os.path.isfile(path):
+            return None
+        return path
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        path = self._file()
+        if path is None:
+            self.send_error(404)
+            return
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = '"' + hashlib.sha256(f"{path}:{stat.st_mtime_ns}:{size}".encode()).hexdigest()[:16] + '"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        byte_range = parse_range(self.headers.get('Range'), size) if self.supports_ranges else None
+        if_range = self.headers.get('If-Range')
+        if byte_range and if_range is not None and if_range not in (etag, last_modified):
+            byte_range = None
+        with self.counter_lock:
+            type(self).requests += 1
+            if byte_range:
+                type(self).range_requests += 1
+        start, end = byte_range or (0, size - 1)
+        self.send_response(206 if byte_range else 200)
+        if byte_range:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        if self.supports_ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end + 1 - start))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        if not send_body:
+            return
+        sent = 0
+        began = time.monotonic()
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end + 1 - start
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if self.drop_after and sent + len(chunk) > self.drop_after:
+                    # 模拟连接中断：发送一部分后直接关闭
+                    self.wfile.write(chunk[:self.drop_after - sent])
+                    self.close_connection = True
+                    return
+                try:
+                    self.wfile.write(chunk)
+                except ConnectionError:
+                    return
+                sent += len(chunk)
+                remaining -= len(chunk)
+                if self.rate_limit:
+                    delay = sent / self.rate_limit - (time.monotonic() - began)
+                    if delay > 0:
+                        time.sleep(delay)
+
+
+def make_server(directory, host='127.0.0.1', port=0, rate_limit=0, drop_after=0, supports_ranges=True):
+    """创建并在后台启动服务器，返回 (server, 基础地址)"""
+    handler = type('Handler', (RangeRequestHandler,), {
+        'directory': os.path.abspath(directory), 'rate_limit': rate_limit,
+        'drop_after': drop_after, 'supports_ranges': supports_ranges,
+        'requests': 0, 'range_requests': 0})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name='range-server').start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Range-capable test HTTP server.')
+    parser.add_argument('directory')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rate-kbps', type=float, default=0, help='per-connection speed limit in KiB/s')
+    parser.add_argument('--drop-after', type=int, default=0, help='close each response after this many bytes')
+    parser.add_argument('--no-ranges', action='store_true', help='ignore Range headers')
+    args = parser.parse_args(argv)
+    server, url = make_server(args.directory, args.host, args.port, int(args.rate_kbps * 1024),
+                              args.drop_after, not args.no_ranges)
+    print(f"Serving {args.directory} at {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
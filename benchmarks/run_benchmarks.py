@@ -0,0 +1,445 @@
+# 性能基准测试：用 fake_pyenv.py 代替真实的pyenv，测量输出流吞吐、搜索延迟、缓存读写、安装程序缓存、分段下载和启动耗时，
+# 结果写入JSON文件，可以用 --compare 与之前提交的结果对比
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import check_import_budget  # noqa: E402
+import fake_pyenv  # noqa: E402
+import range_server  # noqa: E402
+from catalogue_cache import CatalogueCache  # noqa: E402
+from installer_cache import InstallerCache, InstallerMirror  # noqa: E402
+from job_manager import JobManager  # noqa: E402
+from output_pipeline import OutputPipeline  # noqa: E402
+from pyenv_engine import PyenvEngine  # noqa: E402
+from segmented_download import SegmentedDownloader  # noqa: E402
+from version_index import VersionIndex  # noqa: E402
+from version_spec import SpecError  # noqa: E402
+
+# 模拟逐字输入的搜索序列：前缀、模糊（省略点号）和子串
+SEARCH_SEQUENCES = (
+    ('3', '3.', '3.1', '3.12', '3.12.', '3.12.1'),
+    ('3', '31', '312', '3120'),
+    ('w', 'wi', 'win', 'win3', 'win32'),
+    ('r', 'rc', 'rc1'),
+)
+
+# 逐字输入的版本说明（每次按键都解析一次，用于预览），中间状态可能是不完整的写法
+SPEC_SEQUENCES = (
+    '3.11',
+    '>=3.10,<3.12',
+    '>=3,!=3.12.*',
+    'latest-stable-amd64',
+)
+
+
+def make_wrapper(directory):
+    """在directory中创建名为pyenv的包装脚本，调用当前解释器执行fake_pyenv.py"""
+    script = os.path.join(BENCH_DIR, 'fake_pyenv.py')
+    if os.name == 'nt':
+        path = os.path.join(directory, 'pyenv.bat')
+        content = f'@"{sys.executable}" "{script}" %*\r\n'
+    else:
+        path = os.path.join(directory, 'pyenv')
+        content = f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.chmod(path, 0o755)
+    return path
+
+
+def make_engine(work_dir, settings, pool_size=2):
+    """创建使用fake pyenv的引擎；PYENV_ROOT指向不存在的目录，保证命令真正通过Shell执行"""
+    env = dict(os.environ)
+    env['PYENV_ROOT'] = os.path.join(work_dir, 'no-pyenv-root')
+    env.update({f"FAKE_PYENV_{key.upper()}": str(value) for key, value in settings.items()})
+    data_dir = os.path.join(work_dir, 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    return PyenvEngine(data_dir, pyenv=make_wrapper(work_dir), pool_size=pool_size, env=env)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize_ms(values):
+    return {
+        'p50_ms': round(statistics.median(values) * 1000, 4),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 4),
+        'max_ms': round(max(values) * 1000, 4),
+    }
+
+
+def ui_root():
+    """有可用的显示环境时返回Tk根窗口，否则返回None（只测量到输出管道为止）"""
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return None
+
+
+def bench_streaming(work_dir, lines, rate, encoding, root=None):
+    """通过与 run_command_thread 相同的路径（任务 -> Shell进程池 -> 输出管道）执行 pyenv install"""
+    engine = make_engine(work_dir, {'lines': lines, 'rate': rate, 'encoding': encoding})
+    try:
+        # 预热Shell进程，只测量命令本身
+        engine.pyenv_version()
+        text_widget = None
+        if root is not None:
+            import tkinter
+            text_widget = tkinter.Text(root)
+        pipeline = OutputPipeline(root, text_widget, max_lines=5000)
+        finished = threading.Event()
+        first_line = {}
+        received = {'lines': 0, 'bytes': 0}
+
+        def on_output(job, text):
+            if 'at' not in first_line:
+                first_line['at'] = time.perf_counter()
+            received['lines'] += text.count('\n')
+            received['bytes'] += len(text.encode('utf-8'))
+            pipeline.write(text)
+
+        def on_status(job):
+            if job.finished:
+                finished.set()
+
+        manager = JobManager(engine.pool, on_output=on_output, on_status=on_status)
+
+        def target(job):
+            for text in job.stream(engine.command_line('install', '3.12.0')):
+                job.write(text)
+
+        if root is not None:
+            pipeline.start()
+        start = time.perf_counter()
+        job = manager.submit('benchmark', target)
+        if root is not None:
+            # 驱动Tk事件循环，直到所有行都插入到Text控件
+            while not finished.is_set() or pipeline.total_lines < received['lines']:
+                root.update()
+                time.sleep(0.001)
+            pipeline.stop()
+            text_widget.destroy()
+        else:
+            finished.wait()
+        elapsed = time.perf_counter() - start
+        return {
+            'lines': received['lines'],
+            'encoding': encoding,
+            'rate_limit': rate,
+            'ui': root is not None,
+            'status': job.status,
+            'seconds': round(elapsed, 4),
+            'lines_per_second': round(received['lines'] / elapsed, 1),
+            'mb_per_second': round(received['bytes'] / elapsed / 1e6, 3),
+            'first_line_ms': round((first_line.get('at', start) - start) * 1000, 2),
+        }
+    finally:
+        engine.close()
+
+
+def bench_search(size, repeat):
+    """模拟在参数下拉框中逐字输入（on_combobox_search 中的 VersionIndex.search）"""
+    versions = fake_pyenv.catalogue(size)
+    start = time.perf_counter()
+    index = VersionIndex(versions)
+    build_seconds = time.perf_counter() - start
+    latencies = {}
+    for sequence in SEARCH_SEQUENCES:
+        for _ in range(repeat):
+            for text in sequence:
+                start = time.perf_counter()
+                index.search(text)
+                latencies.setdefault(text, []).append(time.perf_counter() - start)
+            index.search('')
+    all_latencies = [value for values in latencies.values() for value in values]
+    result = {'size': size, 'index_build_ms': round(build_seconds * 1000, 3)}
+    result.update(summarize_ms(all_latencies))
+    result['per_query_p50_ms'] = {text: round(statistics.median(values) * 1000, 4) for text, values in latencies.items()}
+    return result
+
+
+def bench_resolve(size, repeat):
+    """模拟在参数中逐字输入版本说明时的预览（VersionIndex.resolve），包括第一次解析时构建候选表"""
+    versions = fake_pyenv.catalogue(size)
+    index = VersionIndex(versions)
+    start = time.perf_counter()
+    index.resolve('latest')
+    first_seconds = time.perf_counter() - start
+    latencies = []
+    for spec in SPEC_SEQUENCES:
+        for _ in range(repeat):
+            for length in range(1, len(spec) + 1):
+                start = time.perf_counter()
+                try:
+                    index.resolve(spec[:length])
+                except SpecError:
+                    pass
+                latencies.append(time.perf_counter() - start)
+    result = {'size': size, 'first_resolve_ms': round(first_seconds * 1000, 3)}
+    result.update(summarize_ms(latencies))
+    return result
+
+
+def bench_cache(work_dir, size, repeat):
+    """可用版本缓存：通过fake pyenv获取、写入文件并建索引、从文件冷加载"""
+    engine = make_engine(work_dir, {'versions': size})
+    try:
+        engine.pyenv_version()
+        fetch, save, load = [], [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            versions = engine.fetch_available_versions()
+            fetch.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            engine.save_available_versions(versions, fetch[-1], fake_pyenv.PYENV_VERSION)
+            save.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            CatalogueCache(engine.available_versions_file).get()
+            load.append(time.perf_counter() - start)
+        return {
+            'size': size,
+            'versions': len(versions),
+            'fetch_ms': round(min(fetch) * 1000, 3),
+            'save_ms': round(min(save) * 1000, 3),
+            'load_ms': round(min(load) * 1000, 3),
+        }
+    finally:
+        engine.close()
+
+
+def bench_startup(work_dir, repeat):
+    """启动耗时：主程序顶层模块的导入时间，以及各项版本检测在冷启动和复用Shell进程时的耗时"""
+    modules = [name for name in check_import_budget.startup_imports()
+               if check_import_budget.importlib.util.find_spec(name.split('.')[0]) is not None]
+    imports = min(check_import_budget.measure(modules)[0] for _ in range(repeat))
+    cold, warm, global_probe, installed_probe = [], [], [], []
+    for _ in range(repeat):
+        engine = make_engine(work_dir, {})
+        try:
+            start = time.perf_counter()
+            engine.pyenv_version()
+            cold.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            engine.pyenv_version()
+            warm.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            engine.global_versions()
+            global_probe.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            engine.installed_versions(refresh=True)
+            installed_probe.append(time.perf_counter() - start)
+        finally:
+            engine.close()
+    return {
+        'import_ms': round(imports * 1000, 2),
+        'imported_modules': modules,
+        'probe_cold_ms': round(min(cold) * 1000, 2),
+        'probe_warm_ms': round(min(warm) * 1000, 2),
+        'global_probe_ms': round(min(global_probe) * 1000, 2),
+        'installed_probe_ms': round(min(installed_probe) * 1000, 2),
+    }
+
+
+def make_installer(work_dir, size_mb):
+    """在work_dir/upstream中生成一个size_mb大小的假安装程序，返回上游目录"""
+    upstream_dir = os.path.join(work_dir, 'upstream')
+    path = os.path.join(upstream_dir, '3.12.0', 'python-3.12.0-amd64.exe')
+    if not os.path.exists(path) or os.path.getsize(path) != size_mb * 1024 * 1024:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size_mb * 1024 * 1024))
+    return upstream_dir
+
+
+def bench_installer_cache(work_dir, size_mb, repeat):
+    """安装程序缓存：经本地镜像首次下载（从本地上游服务器获取）、再次下载（命中缓存）以及放到目标位置的耗时"""
+    upstream, upstream_url = range_server.make_server(make_installer(work_dir, size_mb))
+    cold, warm, materialize = [], [], []
+    try:
+        for index in range(repeat):
+            cache = InstallerCache(os.path.join(work_dir, f"installer-cache-{index}"))
+            mirror = InstallerMirror(cache, upstream=upstream_url)
+            url = f"{mirror.start()}/3.12.0/python-3.12.0-amd64.exe"
+            client = InstallerCache(os.path.join(work_dir, f"installer-client-{index}"))
+            try:
+                for times in (cold, warm):
+                    client.clear()
+                    start = time.perf_counter()
+                    client.fetch(url)
+                    times.append(time.perf_counter() - start)
+                destination = os.path.join(work_dir, f"python-3.12.0-amd64-{index}.exe")
+                start = time.perf_counter()
+                client.materialize(url, destination)
+                materialize.append(time.perf_counter() - start)
+            finally:
+                mirror.stop()
+    finally:
+        upstream.shutdown()
+        upstream.server_close()
+    return {
+        'size_mb': size_mb,
+        'mirror_cold_ms': round(min(cold) * 1000, 2),
+        'mirror_cached_ms': round(min(warm) * 1000, 2),
+        'materialize_ms': round(min(materialize) * 1000, 3),
+    }
+
+
+def bench_download(work_dir, size_mb, rate_kbps, segments, repeat):
+    """分段下载：每个连接限速时单连接与多段并行的耗时，以及中断一次后续传的耗时"""
+    directory = make_installer(work_dir, size_mb)
+    path = '/3.12.0/python-3.12.0-amd64.exe'
+    server, url = range_server.make_server(directory, rate_limit=int(rate_kbps * 1024))
+    destination = os.path.join(work_dir, 'download.exe')
+    result = {'size_mb': size_mb, 'rate_kbps': rate_kbps}
+    try:
+        for count in sorted({1, segments}):
+            downloader = SegmentedDownloader(segments=count, min_segment_bytes=1)
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                downloader.download(url + path, destination)
+                times.append(time.perf_counter() - start)
+            result[f"segments_{count}_ms"] = round(min(times) * 1000, 1)
+        # 每个响应只发送一半后断开：第一次下载失败，第二次只下载剩下的一半
+        downloader = SegmentedDownloader(segments=segments, min_segment_bytes=1, retries=0)
+        server.RequestHandlerClass.drop_after = size_mb * 1024 * 1024 // segments // 2
+        try:
+            downloader.download(url + path, destination)
+        except Exception:
+            pass
+        server.RequestHandlerClass.drop_after = 0
+        start = time.perf_counter()
+        resumed = downloader.download(url + path, destination)
+        result['resume_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        result['resumed_mb'] = round(resumed.resumed_bytes / 1024 ** 2, 2)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return result
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(data, prefix=''):
+    """把结果展开为 {路径: 数值}，用于对比"""
+    values = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            values.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, list):
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            # 同一类结果按规模或编码@速率区分
+            label = item.get('size') or f"{item.get('encoding')}@{item.get('rate_limit')}"
+            values.update(flatten(item, f"{prefix}{label}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        values[prefix[:-1]] = data
+    return values
+
+
+def compare(baseline, current):
+    """打印与基准结果相比变化的指标"""
+    old_values = flatten(baseline['results'])
+    new_values = flatten(current['results'])
+    print(f"Compared with {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}):")
+    for key in sorted(new_values):
+        old = old_values.get(key)
+        if old is None or old == 0:
+            continue
+        change = (new_values[key] - old) / old * 100
+        print(f"  {key:60s} {old:>12g} -> {new_values[key]:>12g}  ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks for pyenv-win GUI driven by a fake pyenv.')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results.json'), help='JSON result file')
+    parser.add_argument('--compare', help='earlier JSON result file to compare with')
+    parser.add_argument('--sizes', default='1000,10000', help='catalogue sizes for search and cache benchmarks')
+    parser.add_argument('--lines', type=int, default=20000, help='installer log lines for the streaming benchmark')
+    parser.add_argument('--rates', default='0', help='line rates per second for streaming (0 = unlimited)')
+    parser.add_argument('--encodings', default='utf-8,gbk', help='output encodings for streaming')
+    parser.add_argument('--installer-mb', type=int, default=25, help='installer size for the installer cache benchmark')
+    parser.add_argument('--download-mb', type=int, default=8, help='file size for the segmented download benchmark')
+    parser.add_argument('--link-kbps', type=float, default=4096, help='per-connection speed limit for the download benchmark')
+    parser.add_argument('--segments', type=int, default=4, help='segments for the download benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions per measurement')
+    parser.add_argument('--no-ui', action='store_true', help='do not insert streamed output into a Tk Text widget')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    rates = [float(rate) for rate in args.rates.split(',') if rate]
+    encodings = [encoding for encoding in args.encodings.split(',') if encoding]
+    root = None if args.no_ui else ui_root()
+
+    results = {'streaming': [], 'search': [], 'resolve': [], 'cache': []}
+    with tempfile.TemporaryDirectory(prefix='pyenv-gui-bench-') as work_dir:
+        for encoding in encodings:
+            for rate in rates:
+                print(f"streaming {args.lines} lines, {encoding}, rate {rate or 'unlimited'} ...")
+                results['streaming'].append(bench_streaming(work_dir, args.lines, rate, encoding, root))
+        for size in sizes:
+            print(f"search in {size} versions ...")
+            results['search'].append(bench_search(size, args.repeat))
+            print(f"version specs in {size} versions ...")
+            results['resolve'].append(bench_resolve(size, args.repeat))
+            print(f"cache with {size} versions ...")
+            results['cache'].append(bench_cache(work_dir, size, args.repeat))
+        print("startup ...")
+        results['startup'] = bench_startup(work_dir, args.repeat)
+        print(f"installer cache with a {args.installer_mb} MB installer ...")
+        results['installer_cache'] = bench_installer_cache(work_dir, args.installer_mb, args.repeat)
+        print(f"segmented download of {args.download_mb} MB at {args.link_kbps:g} KiB/s per connection ...")
+        results['download'] = bench_download(os.path.join(work_dir, 'download'), args.download_mb,
+                                             args.link_kbps, args.segments, args.repeat)
+    if root is not None:
+        root.destroy()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'sizes': sizes, 'lines': args.lines, 'rates': rates, 'encodings': encodings,
+                     'installer_mb': args.installer_mb, 'download_mb': args.download_mb,
+                     'link_kbps': args.link_kbps, 'segments': args.segments, 'repeat': args.repeat},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,7 +7,7 @@ print("Starting to build pyenv-win-GUI (same directory configuration)...")
 # 确保依赖已安装
 print("Installing dependencies...")
 # 使用当前Python解释器的pip模块，避免找不到pip命令的问题
-subprocess.run([sys.executable, "-m", "pip", "install", "ttkbootstrap", "requests", "pyinstaller", "-q"])
+subprocess.run([sys.executable, "-m", "pip", "install", "ttkbootstrap", "pyinstaller", "-q"])
 
 # 使用主程序文件进行打包，直接指定输出文件名
 print("Building executable...")
@@ -0,0 +1,114 @@
+# 可安装版本目录（install -l 的结果）缓存：记录获取时间、耗时和pyenv版本，过期后在后台刷新
+import threading
+import time
+from datetime import datetime
+
+from atomic_file import atomic_write
+from version_index import VersionIndex, VersionIndexCache
+
+# 默认的缓存有效期（小时）
+DEFAULT_TTL_HOURS = 24
+# 文件头中元数据行的前缀，例如 "# fetched_at: 2024-01-01T00:00:00"
+METADATA_KEYS = ('fetched_at', 'fetch_seconds', 'pyenv_version')
+
+
+def read_catalogue(path):
+    """读取缓存文件，返回 (版本列表, 元数据字典)"""
+    versions = []
+    metadata = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                key, sep, value = line[1:].partition(':')
+                if sep and key.strip() in METADATA_KEYS:
+                    metadata[key.strip()] = value.strip()
+                continue
+            versions.append(line)
+    return versions, metadata
+
+
+def write_catalogue(path, versions, metadata):
+    """写入缓存文件（先写临时文件再替换，避免读取到写了一半的文件）"""
+    with atomic_write(path) as f:
+        f.write("# Available Python versions cache\n")
+        for key in METADATA_KEYS:
+            if metadata.get(key) is not None:
+                f.write(f"# {key}: {metadata[key]}\n")
+        for version in versions:
+            f.write(f"{version}\n")
+
+
+class CatalogueCache(VersionIndexCache):
+    """带元数据和有效期的可用版本缓存。
+
+    旧格式（没有元数据）的文件视为已过期。refresh_in_background() 在后台线程中
+    获取新列表、写入文件并构建新索引，完成后整体替换内存中的索引。
+    """
+
+    def __init__(self, path, ttl_hours=DEFAULT_TTL_HOURS):
+        super().__init__(path)
+        self.ttl_hours = ttl_hours
+        self.metadata = {}
+        self._refresh_lock = threading.Lock()
+
+    def _load(self):
+        versions, self.metadata = read_catalogue(self.path)
+        return versions
+
+    def fetched_at(self):
+        self.get()
+        try:
+            return datetime.fromisoformat(self.metadata['fetched_at'])
+        except (KeyError, ValueError):
+            return None
+
+    def age_seconds(self):
+        fetched_at = self.fetched_at()
+        if fetched_at is None:
+            return None
+        return (datetime.now() - fetched_at).total_seconds()
+
+    def is_stale(self):
+        age = self.age_seconds()
+        return age is None or age > self.ttl_hours * 3600
+
+    @property
+    def refreshing(self):
+        return self._refresh_lock.locked()
+
+    def save(self, versions, fetch_seconds=None, pyenv_version=None):
+        """写入新的版本列表并立即替换内存中的索引"""
+        metadata = {
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+            'fetch_seconds': f"{fetch_seconds:.2f}" if fetch_seconds is not None else None,
+            'pyenv_version': pyenv_version,
+        }
+        write_catalogue(self.path, versions, metadata)
+        index = VersionIndex(versions)
+        self.metadata = {key: value for key, value in metadata.items() if value is not None}
+        self._state = (self._file_signature(), index)
+        return index
+
+    def refresh_in_background(self, fetch, on_complete=None, pyenv_version=None):
+        """在后台线程中调用 fetch() 获取版本列表并保存；已有刷新在进行时直接返回False"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+
+        def worker():
+            try:
+                start = time.monotonic()
+                versions = fetch()
+                if versions:
+                    index = self.save(versions, time.monotonic() - start, pyenv_version)
+                    if on_complete:
+                        on_complete(index)
+            except Exception as e:
+                print(f"Error refreshing available versions: {e}")
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=worker, daemon=True).start()
+        return True
@@ -0,0 +1,124 @@
+# 启动导入耗时回归检查：导入耗时超过预算或启动时导入了重量级模块时以非0状态退出
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+# 项目目录
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# 主程序文件，检查它在模块顶层导入的所有模块
+MAIN_SCRIPT = os.path.join(PROJECT_DIR, 'pyenv-win-GUI.py')
+# 默认的导入耗时预算（毫秒），包括ttkbootstrap及其依赖
+DEFAULT_BUDGET_MS = 300
+# 默认重复测量的次数，取最小值以减少干扰
+DEFAULT_RUNS = 5
+# 启动阶段不应导入的模块（只在后台任务中按需导入）
+FORBIDDEN_MODULES = ('requests', 'urllib3', 'ssl', 'http.client', 'urllib.request',
+                     'xml.etree.ElementTree', 'concurrent.futures')
+
+# 在子进程中执行的测量代码：统计导入耗时和新增的模块
+MEASURE_CODE = '''
+import sys, time, json
+before = set(sys.modules)
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(set(sys.modules) - before)}}))
+'''
+
+
+def startup_imports(path=MAIN_SCRIPT):
+    """返回主程序在模块顶层导入的模块名（按出现顺序，不重复）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            if name not in modules:
+                modules.append(name)
+    return modules
+
+
+def measure(modules):
+    """在新的解释器中导入模块，返回 (耗时秒数, 新增模块列表, -X importtime 输出)"""
+    code = MEASURE_CODE.format(imports='\n'.join(f"import {name}" for name in modules))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True)
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return data['seconds'], data['modules'], result.stderr
+
+
+def slowest_imports(importtime_output, modules, limit=10):
+    """从 -X importtime 输出中找出累计耗时最高的顶层导入"""
+    entries = []
+    for line in importtime_output.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # 顶层导入的模块名前只有一个空格，子模块按层级缩进
+        name = parts[2][1:].rstrip()
+        if name.startswith(' ') or name not in modules:
+            continue
+        entries.append((int(parts[1]), name))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the startup import time of pyenv-win GUI against a budget.')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='maximum import time in milliseconds')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='number of measurements (the fastest is used)')
+    parser.add_argument('--allow-missing', action='store_true',
+                        help='skip startup modules that are not installed instead of failing')
+    args = parser.parse_args(argv)
+
+    modules = []
+    missing = []
+    for name in startup_imports():
+        if importlib.util.find_spec(name.split('.')[0]) is None and not os.path.exists(
+                os.path.join(PROJECT_DIR, f"{name.split('.')[0]}.py")):
+            missing.append(name)
+            continue
+        modules.append(name)
+    # 缺少的模块（例如没有ttkbootstrap的构建机）不计入耗时，结果偏低，只有明确允许时才跳过
+    if missing and not args.allow_missing:
+        print(f"FAIL: startup modules not installed: {', '.join(missing)} (use --allow-missing to skip them)")
+        return 1
+    for name in missing:
+        print(f"Skipping {name}: not installed")
+
+    best = None
+    for _ in range(max(args.runs, 1)):
+        seconds, loaded, importtime_output = measure(modules)
+        if best is None or seconds < best[0]:
+            best = (seconds, loaded, importtime_output)
+    seconds, loaded, importtime_output = best
+
+    elapsed_ms = seconds * 1000
+    print(f"Startup imports: {elapsed_ms:.1f} ms (budget {args.budget_ms:.0f} ms, fastest of {max(args.runs, 1)} runs)")
+    for microseconds, name in slowest_imports(importtime_output, loaded):
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+
+    failed = False
+    forbidden = [name for name in FORBIDDEN_MODULES if name in loaded]
+    if forbidden:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(forbidden)}")
+        failed = True
+    if elapsed_ms > args.budget_ms:
+        print(f"FAIL: startup imports exceed the budget by {elapsed_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
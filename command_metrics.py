@@ -0,0 +1,181 @@
+# 命令性能统计：记录每条命令的进程启动、首字节、读取量、解码耗时、界面刷新延迟和总耗时，可导出为Chrome trace
+import collections
+import json
+import os
+import threading
+import time
+
+from atomic_file import atomic_write
+
+# 最多保留的命令记录数
+MAX_RECORDS = 200
+# 每条命令最多保留的界面刷新延迟样本数（用于trace中的明细事件）
+MAX_LAG_SAMPLES = 1000
+# trace中界面线程使用的线程编号
+UI_TRACE_TID = 0
+
+
+class CommandMetrics:
+    """一条命令的计时数据。时间点均为 time.perf_counter() 的值，耗时单位为秒。
+
+    - queue_seconds:  等待空闲Shell进程的时间
+    - spawn_seconds:  启动Shell进程的时间（复用已有进程时为0）
+    - first_byte_seconds: 发送命令到读到第一块输出的时间
+    - bytes_read / lines_read / decode_seconds: 读取的字节数、行数和解码耗时
+    - ui_lag: 输出写入管道到插入界面控件之间的延迟
+    - wall_seconds: 从开始到结束的总耗时
+    """
+
+    def __init__(self, name, category='command'):
+        self.name = name
+        self.category = category
+        self.thread_id = threading.get_ident()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.source = 'shell'
+        self.queue_seconds = 0.0
+        self.spawn_seconds = 0.0
+        self.spawned = False
+        self.sent_at = None
+        self.first_byte_at = None
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.decode_seconds = 0.0
+        self.ui_lag_max = 0.0
+        self.ui_lag_total = 0.0
+        self.ui_lag_count = 0
+        self.exit_code = None
+        self.status = 'running'
+        # (名称, 开始, 结束) 的阶段列表，以及 (插入时间, 延迟) 的界面刷新样本
+        self.spans = []
+        self.lag_samples = []
+
+    def add_span(self, name, start, end):
+        self.spans.append((name, start, end))
+
+    def record_queue(self, start, end):
+        self.queue_seconds += end - start
+        if end - start > 0.001:
+            self.add_span('wait for shell', start, end)
+
+    def record_spawn(self, start, end):
+        self.spawned = True
+        self.spawn_seconds += end - start
+        self.add_span('spawn shell', start, end)
+
+    def mark_sent(self):
+        if self.sent_at is None:
+            self.sent_at = time.perf_counter()
+
+    def record_read(self, size, lines, decode_seconds):
+        # 每读取并解码一块输出调用一次
+        if self.first_byte_at is None:
+            self.first_byte_at = time.perf_counter()
+        self.bytes_read += size
+        self.lines_read += lines
+        self.decode_seconds += decode_seconds
+
+    def record_ui_lag(self, seconds):
+        # 在UI线程中调用
+        self.ui_lag_count += 1
+        self.ui_lag_total += seconds
+        self.ui_lag_max = max(self.ui_lag_max, seconds)
+        if len(self.lag_samples) < MAX_LAG_SAMPLES:
+            self.lag_samples.append((time.perf_counter(), seconds))
+
+    def finish(self, exit_code=None, status=None):
+        self.finished_at = time.perf_counter()
+        self.exit_code = exit_code
+        self.status = status or ('done' if not exit_code else 'failed')
+
+    @property
+    def first_byte_seconds(self):
+        if self.sent_at is None or self.first_byte_at is None:
+            return None
+        return self.first_byte_at - self.sent_at
+
+    @property
+    def wall_seconds(self):
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def ui_lag_average(self):
+        return self.ui_lag_total / self.ui_lag_count if self.ui_lag_count else 0.0
+
+    def as_dict(self):
+        first_byte = self.first_byte_seconds
+        return {
+            'name': self.name,
+            'category': self.category,
+            'source': self.source,
+            'status': self.status,
+            'exit_code': self.exit_code,
+            'queue_ms': round(self.queue_seconds * 1000, 3),
+            'spawn_ms': round(self.spawn_seconds * 1000, 3),
+            'first_byte_ms': round(first_byte * 1000, 3) if first_byte is not None else None,
+            'bytes_read': self.bytes_read,
+            'lines_read': self.lines_read,
+            'decode_ms': round(self.decode_seconds * 1000, 3),
+            'ui_lag_max_ms': round(self.ui_lag_max * 1000, 3),
+            'ui_lag_avg_ms': round(self.ui_lag_average * 1000, 3),
+            'wall_ms': round(self.wall_seconds * 1000, 3),
+        }
+
+
+class MetricsRecorder:
+    """保存最近的命令记录（线程安全），并导出为Chrome trace-event格式（chrome://tracing 或 Perfetto 可直接打开）"""
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self._records = collections.deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        # trace中的时间以创建记录器的时间为0点
+        self.origin = time.perf_counter()
+
+    def start(self, name, category='command'):
+        metrics = CommandMetrics(name, category)
+        with self._lock:
+            self._records.append(metrics)
+        return metrics
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def _us(self, timestamp):
+        return round((timestamp - self.origin) * 1e6, 1)
+
+    def chrome_trace(self):
+        """返回 {'traceEvents': [...]}：每条命令一个完整事件，各阶段和界面刷新延迟作为子事件"""
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        for metrics in self.records():
+            tid = metrics.thread_id
+            thread_names.setdefault(tid, f"worker {len(thread_names) + 1}")
+            end = metrics.finished_at or time.perf_counter()
+            events.append({'name': metrics.name, 'cat': metrics.category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': self._us(metrics.started_at), 'dur': self._us(end) - self._us(metrics.started_at),
+                           'args': metrics.as_dict()})
+            spans = list(metrics.spans)
+            if metrics.sent_at is not None and metrics.first_byte_at is not None:
+                spans.append(('wait for first byte', metrics.sent_at, metrics.first_byte_at))
+                spans.append(('read output', metrics.first_byte_at, end))
+            for name, start, stop in spans:
+                events.append({'name': name, 'cat': metrics.category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                               'ts': self._us(start), 'dur': self._us(stop) - self._us(start)})
+            for inserted_at, lag in metrics.lag_samples:
+                events.append({'name': 'ui dispatch', 'cat': 'ui', 'ph': 'X', 'pid': pid, 'tid': UI_TRACE_TID,
+                               'ts': self._us(inserted_at - lag), 'dur': round(lag * 1e6, 1),
+                               'args': {'command': metrics.name}})
+        for tid, name in thread_names.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': UI_TRACE_TID, 'args': {'name': 'UI'}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with atomic_write(path) as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
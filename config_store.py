@@ -0,0 +1,100 @@
+# 配置存储：配置保存在内存中，短时间内的多次修改合并为一次写盘，写入时先写临时文件再替换
+import json
+import os
+import threading
+
+from atomic_file import atomic_write
+
+# 第一次修改后等待多久写盘（秒），期间的其他修改一起写入
+DEFAULT_DELAY_SECONDS = 0.5
+
+
+class ConfigStore:
+    """线程安全的JSON配置文件。
+
+    update() 只修改内存中的配置并安排一次延迟写入；延迟期间的所有修改合并为一次写盘。
+    flush() 立即写入（例如退出程序时），写入通过临时文件和 os.replace 完成，
+    其他进程或程序崩溃时不会读到写了一半的文件。
+    """
+
+    def __init__(self, path, delay_seconds=DEFAULT_DELAY_SECONDS):
+        self.path = path
+        self.delay_seconds = delay_seconds
+        self._data = {}
+        self._dirty = False
+        self._timer = None
+        # _lock 保护内存中的配置和定时器，_write_lock 保证同一时间只有一个线程写文件
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # 实际写盘次数（用于诊断）
+        self.writes = 0
+
+    def load(self):
+        """读取配置文件并返回配置的副本，文件不存在或损坏时返回空字典"""
+        data = {}
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except Exception as e:
+            print(f"Error loading config: {e}")
+        with self._lock:
+            self._data = dict(data) if isinstance(data, dict) else {}
+            return dict(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._data)
+
+    def update(self, values):
+        """合并配置，值为None的键会被删除；配置有变化时安排延迟写入"""
+        with self._lock:
+            changed = False
+            for key, value in values.items():
+                if value is None:
+                    if key in self._data:
+                        del self._data[key]
+                        changed = True
+                elif self._data.get(key) != value or key not in self._data:
+                    self._data[key] = value
+                    changed = True
+            if not changed:
+                return
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """立即写入未保存的修改"""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                data = dict(self._data)
+                self._dirty = False
+            try:
+                self._write(data)
+            except Exception as e:
+                print(f"Error saving config: {e}")
+                # 写入失败时保留修改，下次update或flush时重试
+                with self._lock:
+                    self._dirty = True
+
+    def _write(self, data):
+        with atomic_write(self.path) as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        self.writes += 1
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,276 @@
+# 文件和目录变化监视：优先使用系统的变化通知（Linux inotify、Windows目录变化通知），不可用时定时比较修改时间，
+# 连续的变化合并为一次回调
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from pyenv_fs import path_signature
+
+# 最后一次变化之后等待这么久（秒）没有新变化才回调
+DEFAULT_DEBOUNCE_SECONDS = 0.5
+# 轮询方式检查修改时间的间隔（秒）
+DEFAULT_POLL_INTERVAL = 2.0
+# 等待通知时每隔这么久（秒）检查一次是否需要停止
+WAIT_SLICE_SECONDS = 0.5
+
+# inotify 事件（见 inotify(7)）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+# 父目录：被监视的文件被写入、创建、删除或重命名
+INOTIFY_PARENT_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# 被监视的目录：直接包含的条目被创建、删除或重命名（不关心子目录中的文件，安装过程中的大量写入不会触发）
+INOTIFY_DIR_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+# struct inotify_event 的固定部分：wd, mask, cookie, len
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# Windows 目录变化通知（FindFirstChangeNotificationW）
+FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+FILE_NOTIFY_CHANGE_DIR_NAME = 0x00000002
+FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+WAIT_OBJECT_0 = 0x00000000
+WAIT_TIMEOUT = 0x00000102
+
+
+class _PollingBackend:
+    """每隔interval秒比较一次修改时间和大小"""
+
+    name = 'polling'
+
+    def __init__(self, paths, interval, stop):
+        self.paths = paths
+        self.interval = interval
+        self._stop = stop
+        self._signature = path_signature(paths)
+        self._next_poll = time.monotonic() + interval
+
+    def wait(self, timeout):
+        """等待最多timeout秒，返回期间是否发现变化"""
+        remaining = self._next_poll - time.monotonic()
+        if remaining > 0:
+            if self._stop.wait(min(timeout, remaining)) or time.monotonic() < self._next_poll:
+                return False
+        self._next_poll = time.monotonic() + self.interval
+        signature = path_signature(self.paths)
+        changed = signature != self._signature
+        self._signature = signature
+        return changed
+
+    def close(self):
+        pass
+
+
+class _InotifyBackend:
+    """Linux inotify：监视文件所在的目录（按名称过滤）和被监视的目录本身。
+
+    被监视的目录不存在时只监视其父目录，目录创建后再加入监视。
+    """
+
+    name = 'inotify'
+
+    def __init__(self, paths):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._paths = paths
+        # 父目录的wd -> 关心的名称；被监视目录的路径 -> wd
+        self._parents = {}
+        self._dirs = {}
+        try:
+            for parent in {os.path.dirname(path) for path in paths}:
+                names = {os.path.basename(path) for path in paths if os.path.dirname(path) == parent}
+                self._parents[self._add(parent, INOTIFY_PARENT_MASK | IN_ONLYDIR)] = names
+        except OSError:
+            self.close()
+            raise
+        self._watch_dirs()
+
+    def _add(self, path, mask):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def _watch_dirs(self):
+        for path in self._paths:
+            if path not in self._dirs and os.path.isdir(path):
+                try:
+                    self._dirs[path] = self._add(path, INOTIFY_DIR_MASK)
+                except OSError:
+                    pass
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        changed = False
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            wd, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0'))
+            offset += INOTIFY_EVENT.size + length
+            if mask & IN_IGNORED:
+                # 被监视的目录已删除或移走，重新创建后再加入监视
+                self._dirs = {path: dir_wd for path, dir_wd in self._dirs.items() if dir_wd != wd}
+            elif mask & IN_Q_OVERFLOW or wd not in self._parents or name in self._parents[wd]:
+                changed = True
+        self._watch_dirs()
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _WindowsBackend:
+    """Windows目录变化通知：监视文件所在的目录和被监视的目录本身（都不包括子目录）"""
+
+    name = 'windows'
+
+    def __init__(self, paths):
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.FindFirstChangeNotificationW.restype = ctypes.c_void_p
+        kernel32.FindFirstChangeNotificationW.argtypes = [ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint32]
+        kernel32.FindNextChangeNotification.argtypes = [ctypes.c_void_p]
+        kernel32.FindCloseChangeNotification.argtypes = [ctypes.c_void_p]
+        kernel32.WaitForMultipleObjects.restype = ctypes.c_uint32
+        kernel32.WaitForMultipleObjects.argtypes = [ctypes.c_uint32, ctypes.POINTER(ctypes.c_void_p),
+                                                    ctypes.c_int, ctypes.c_uint32]
+        self._kernel32 = kernel32
+        self._paths = paths
+        # 目录 -> 通知句柄
+        self._handles = {}
+        try:
+            for parent in {os.path.dirname(path) for path in paths}:
+                self._handles[parent] = self._add(parent)
+        except OSError:
+            self.close()
+            raise
+        self._watch_dirs()
+
+    def _add(self, path):
+        handle = self._kernel32.FindFirstChangeNotificationW(
+            path, False, FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_DIR_NAME
+            | FILE_NOTIFY_CHANGE_SIZE | FILE_NOTIFY_CHANGE_LAST_WRITE)
+        if handle is None or handle == ctypes.c_void_p(-1).value:
+            raise ctypes.WinError(ctypes.get_last_error())
+        return handle
+
+    def _watch_dirs(self):
+        for path in self._paths:
+            if path not in self._handles and os.path.isdir(path):
+                try:
+                    self._handles[path] = self._add(path)
+                except OSError:
+                    pass
+
+    def wait(self, timeout):
+        paths = list(self._handles)
+        handles = (ctypes.c_void_p * len(paths))(*(self._handles[path] for path in paths))
+        result = self._kernel32.WaitForMultipleObjects(len(paths), handles, False, int(timeout * 1000))
+        if result == WAIT_TIMEOUT:
+            return False
+        index = result - WAIT_OBJECT_0
+        if not 0 <= index < len(paths):
+            raise ctypes.WinError(ctypes.get_last_error())
+        handle = self._handles[paths[index]]
+        if not self._kernel32.FindNextChangeNotification(handle):
+            # 目录已被删除，重新创建后再加入监视
+            self._kernel32.FindCloseChangeNotification(handle)
+            del self._handles[paths[index]]
+        self._watch_dirs()
+        return True
+
+    def close(self):
+        for handle in self._handles.values():
+            self._kernel32.FindCloseChangeNotification(handle)
+        self._handles = {}
+
+
+class FileWatcher:
+    """监视若干文件和目录（目录只监视其中直接包含的条目），变化停止debounce秒后在后台线程中调用一次on_change()。
+
+    native为True时优先使用系统通知（Linux inotify、Windows目录变化通知），无法使用时（其他平台、
+    文件所在目录不存在等）每隔poll_interval秒比较修改时间；backend_name 为实际使用的方式。
+    """
+
+    def __init__(self, paths, on_change, debounce=DEFAULT_DEBOUNCE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL,
+                 native=True):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.native = native
+        self.backend_name = None
+        self._backend = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _create_backend(self):
+        if self.native:
+            try:
+                if sys.platform.startswith('linux'):
+                    return _InotifyBackend(self.paths)
+                if os.name == 'nt':
+                    return _WindowsBackend(self.paths)
+            except (OSError, AttributeError) as e:
+                print(f"Error starting file change notifications, polling instead: {e}")
+        return _PollingBackend(self.paths, self.poll_interval, self._stop)
+
+    def start(self):
+        self._backend = self._create_backend()
+        self.backend_name = self._backend.name
+        self._thread = threading.Thread(target=self._run, daemon=True, name='file-watcher')
+        self._thread.start()
+        return self.backend_name
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(WAIT_SLICE_SECONDS * 2)
+            self._thread = None
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def _run(self):
+        last_change = None
+        while not self._stop.is_set():
+            try:
+                changed = self._backend.wait(self.debounce if last_change is not None else WAIT_SLICE_SECONDS)
+            except OSError as e:
+                # 系统通知出错时改为轮询
+                print(f"Error waiting for file changes, polling instead: {e}")
+                self._backend.close()
+                self._backend = _PollingBackend(self.paths, self.poll_interval, self._stop)
+                self.backend_name = self._backend.name
+                changed = True
+            if changed:
+                last_change = time.monotonic()
+            elif last_change is not None and time.monotonic() - last_change >= self.debounce:
+                last_change = None
+                try:
+                    self.on_change()
+                except Exception as e:
+                    print(f"Error handling file changes: {e}")
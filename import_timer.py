@@ -0,0 +1,103 @@
+# 启动时的模块导入耗时统计：效果类似 python -X importtime，但不需要解释器参数，打包后的exe也可以使用
+import builtins
+import os
+import sys
+import threading
+import time
+
+# 设置该环境变量（值为1或报告文件路径）时输出导入耗时报告
+IMPORTTIME_ENV = 'PYENV_GUI_IMPORTTIME'
+# 与设置环境变量效果相同的命令行参数
+IMPORTTIME_ARG = '--import-time'
+
+
+def _absolute_name(name, globals, level):
+    # 把相对导入解析为完整模块名
+    if not level:
+        return name
+    package = (globals or {}).get('__package__') or ''
+    base = package.rsplit('.', level - 1)[0]
+    return f"{base}.{name}" if name else base
+
+
+class ImportTimer:
+    """替换 builtins.__import__，记录主线程中每个新模块的导入耗时。
+
+    records 按导入完成的顺序保存 (层级, 模块名, 自身耗时, 累计耗时)，单位为秒，
+    与 -X importtime 的输出顺序相同。已经导入过的模块和其他线程中的导入不计入。
+    """
+
+    def __init__(self):
+        self.records = []
+        self._original_import = None
+        self._children = []
+        self._thread_id = threading.get_ident()
+
+    def start(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original_import = self._original_import
+        if threading.get_ident() != self._thread_id:
+            return original_import(name, globals, locals, fromlist, level)
+        module_name = _absolute_name(name, globals, level)
+        if module_name in sys.modules:
+            return original_import(name, globals, locals, fromlist, level)
+
+        depth = len(self._children)
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += cumulative
+            self.records.append((depth, module_name, cumulative - children, cumulative))
+
+    @property
+    def total_seconds(self):
+        return sum(cumulative for depth, name, own, cumulative in self.records if depth == 0)
+
+    def slowest(self, limit=10):
+        """按累计耗时从高到低返回最顶层的导入"""
+        top_level = [record for record in self.records if record[0] == 0]
+        return sorted(top_level, key=lambda record: record[3], reverse=True)[:limit]
+
+    def format_report(self):
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for depth, name, own, cumulative in self.records:
+            lines.append(f"import time: {own * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {'  ' * depth}{name}")
+        lines.append(f"import time: total {self.total_seconds * 1000:.1f} ms")
+        return '\n'.join(lines) + '\n'
+
+    def report(self, destination=None):
+        """输出报告：destination为文件路径时写入文件，否则写到标准错误（无控制台时忽略）"""
+        text = self.format_report()
+        try:
+            if destination and destination != '1':
+                with open(destination, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            elif sys.stderr is not None:
+                sys.stderr.write(text)
+        except Exception as e:
+            print(f"Error writing import time report: {e}")
+
+
+def enable_if_requested(argv=None, environ=None):
+    """设置了 PYENV_GUI_IMPORTTIME 或带 --import-time 参数启动时开始统计并返回ImportTimer，否则返回None"""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    if not environ.get(IMPORTTIME_ENV) and IMPORTTIME_ARG not in argv:
+        return None
+    timer = ImportTimer()
+    timer.start()
+    return timer
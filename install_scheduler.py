@@ -0,0 +1,196 @@
+# 批量安装调度：并行下载安装程序，与逐个执行的安装阶段重叠进行
+import os
+import threading
+import time
+
+from segmented_download import progress_writer
+from version_model import Version
+
+# python.org 的安装程序下载地址
+PYTHON_FTP_URL = 'https://www.python.org/ftp/python'
+# 默认的并行下载数量
+DEFAULT_CONCURRENCY = 3
+# 默认同时执行的安装数量（Windows Installer同一时间只允许一个安装，故默认为1）
+DEFAULT_INSTALL_SLOTS = 1
+# 下载进度写入任务输出的最小间隔（秒）
+DOWNLOAD_PROGRESS_INTERVAL = 2.0
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_DOWNLOADING = 'downloading'
+JOB_WAITING = 'waiting'
+JOB_INSTALLING = 'installing'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+def default_installer(version):
+    """根据版本号（字符串或 Version）推算python.org上的安装程序地址，返回 (url, 文件名)"""
+    if not isinstance(version, Version):
+        version = Version(version)
+    if len(version.release) < 3:
+        return None, None
+    suffix = '' if version.machine == 'win32' else f"-{version.machine}"
+    filename = f"python-{version.base}{suffix}.exe"
+    release = '.'.join(str(part) for part in version.release[:3])
+    return f"{PYTHON_FTP_URL}/{release}/{filename}", filename
+
+
+def read_versions_db(pyenv_root):
+    """读取pyenv-win的 .versions_cache.xml，返回 {版本: (url, 文件名)}"""
+    # xml和urllib只在批量安装时用到，按需导入以缩短程序启动时间
+    import xml.etree.ElementTree as ET
+    path = os.path.join(pyenv_root, '.versions_cache.xml')
+    installers = {}
+    try:
+        tree = ET.parse(path)
+    except (OSError, ET.ParseError):
+        return installers
+    for element in tree.getroot().iter('version'):
+        code = element.findtext('code')
+        url = element.findtext('URL') or element.findtext('url')
+        if code and url:
+            filename = element.findtext('file') or url.rsplit('/', 1)[-1]
+            installers[code.strip()] = (url.strip(), filename.strip())
+    return installers
+
+
+def download_file(url, destination, on_progress=None, timeout=30):
+    """下载文件到destination：支持Range时分段并行下载，中断后再次调用从 .part 文件继续"""
+    from segmented_download import SegmentedDownloader
+    SegmentedDownloader(timeout=timeout).download(url, destination, on_progress)
+
+
+class InstallJob:
+    """一个版本的安装任务，记录状态、输出和耗时"""
+
+    def __init__(self, version):
+        self.version = version
+        self.status = JOB_QUEUED
+        self.output = []
+        self.exit_code = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+
+class InstallScheduler:
+    """批量安装调度器。
+
+    每个任务分两个阶段：
+    1. 下载：把安装程序下载到 PYENV_ROOT/install_cache（pyenv-win会直接使用已缓存的安装程序），
+       最多同时进行 concurrency 个下载；
+    2. 安装：调用 run_install(version, on_line) 执行 `pyenv install`，最多同时进行 install_slots 个。
+    一个任务下载完成后立即进入安装队列，因此下载和安装阶段相互重叠，
+    总耗时接近 max(所有下载, 所有安装) 而不是每个版本耗时之和。
+    """
+
+    def __init__(self, run_install, pyenv_root=None, concurrency=DEFAULT_CONCURRENCY,
+                 install_slots=DEFAULT_INSTALL_SLOTS, on_update=None, downloader=download_file):
+        from concurrent.futures import ThreadPoolExecutor
+        self.run_install = run_install
+        self.pyenv_root = pyenv_root
+        self.on_update = on_update
+        self.downloader = downloader
+        self.jobs = []
+        self._download_pool = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix='download')
+        self._install_pool = ThreadPoolExecutor(max_workers=max(install_slots, 1), thread_name_prefix='install')
+        self._installers = read_versions_db(pyenv_root) if pyenv_root else {}
+        self._lock = threading.Lock()
+        self._all_done = threading.Event()
+        self._all_done.set()
+        self.started_at = None
+
+    def _notify(self, job, line=None):
+        # on_update(job, line)：状态变化时line为None，有新输出时为该行文本
+        if self.on_update:
+            try:
+                self.on_update(job, line)
+            except Exception as e:
+                print(f"Error reporting install progress: {e}")
+
+    def _emit(self, job, line):
+        job.output.append(line)
+        self._notify(job, line)
+
+    def _set_status(self, job, status):
+        job.status = status
+        if status in (JOB_DONE, JOB_FAILED):
+            job.finished_at = time.monotonic()
+        self._notify(job)
+        if status in (JOB_DONE, JOB_FAILED):
+            with self._lock:
+                if all(other.finished for other in self.jobs):
+                    self._all_done.set()
+
+    def schedule(self, versions):
+        """添加一批版本并立即开始调度，返回新建的任务列表"""
+        new_jobs = [InstallJob(version) for version in versions]
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+            self.jobs.extend(new_jobs)
+            if new_jobs:
+                self._all_done.clear()
+        for job in new_jobs:
+            self._notify(job)
+            self._download_pool.submit(self._download, job)
+        return new_jobs
+
+    def installer_path(self, version):
+        url, filename = self._installers.get(version) or default_installer(version)
+        if not url or not self.pyenv_root:
+            return None, None
+        return url, os.path.join(self.pyenv_root, 'install_cache', filename)
+
+    def _download(self, job):
+        job.started_at = time.monotonic()
+        self._set_status(job, JOB_DOWNLOADING)
+        try:
+            url, destination = self.installer_path(job.version)
+            if url and not os.path.exists(destination):
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                self._emit(job, f"Downloading {url}\n")
+                self.downloader(url, destination, on_progress=progress_writer(
+                    lambda line: self._emit(job, line), prefix='Downloaded ', interval=DOWNLOAD_PROGRESS_INTERVAL))
+        except Exception as e:
+            # 预下载失败时由pyenv自己下载
+            self._emit(job, f"Pre-download failed, pyenv will download it: {e}\n")
+        self._set_status(job, JOB_WAITING)
+        self._install_pool.submit(self._install, job)
+
+    def _install(self, job):
+        self._set_status(job, JOB_INSTALLING)
+        try:
+            job.exit_code = self.run_install(job.version, lambda line: self._emit(job, line))
+            self._set_status(job, JOB_DONE if job.exit_code == 0 else JOB_FAILED)
+        except Exception as e:
+            job.error = str(e)
+            self._emit(job, f"{e}\n")
+            self._set_status(job, JOB_FAILED)
+
+    @property
+    def total_elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        finished = [job.finished_at for job in self.jobs if job.finished_at is not None]
+        if self._all_done.is_set() and finished:
+            return max(finished) - self.started_at
+        return time.monotonic() - self.started_at
+
+    def wait(self, timeout=None):
+        return self._all_done.wait(timeout)
+
+    def shutdown(self):
+        self._download_pool.shutdown(wait=False)
+        self._install_pool.shutdown(wait=False)
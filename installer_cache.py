@@ -0,0 +1,358 @@
+# Python安装程序缓存：按SHA-256内容寻址保存下载过的安装程序，按大小做LRU淘汰，可以作为pyenv的本地HTTP镜像
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from atomic_file import atomic_write
+from install_scheduler import PYTHON_FTP_URL
+from segmented_download import SegmentedDownloader
+
+# 默认的缓存大小上限（字节）
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+# pyenv-win用来替换python.org下载地址的环境变量
+MIRROR_ENV = 'PYTHON_BUILD_MIRROR_URL'
+INDEX_FILENAME = 'index.json'
+# 命中缓存时只在内存中更新最近使用时间；上次写入的时间早于这么久（秒）时才写入index.json
+LAST_USED_WRITE_SECONDS = 3600
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def url_filename(url):
+    return url.rstrip('/').rsplit('/', 1)[-1]
+
+
+def parse_range(header, size):
+    """解析单个 "bytes=a-b" / "bytes=a-" / "bytes=-n" 范围，返回 (start, end)；无效或多个范围时返回 (None, None)"""
+    if not header or not header.startswith('bytes=') or ',' in header or size <= 0:
+        return None, None
+    first, _, last = header[6:].strip().partition('-')
+    try:
+        if not first:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None, None
+    if start > end:
+        return None, None
+    return start, end
+
+
+class InstallerCache:
+    """内容寻址的安装程序缓存。
+
+    文件保存为 root/objects/<sha256前两位>/<sha256>，index.json 记录每个下载地址对应的SHA-256
+    以及每个文件的大小和最近使用时间。内容相同的文件只保存一份；总大小超过 max_bytes 时
+    删除最久未使用的文件。读取时校验文件大小，被截断或删除的文件视为未缓存。
+    下载通过 SegmentedDownloader 分段并行进行，未完成的下载保留在 root/tmp 中，下次从断点继续。
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, downloader=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.downloader = downloader or SegmentedDownloader()
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        self._index = None
+        # 内存中的最近使用时间比index.json中的新
+        self._dirty = False
+
+    # ---- 索引 ----
+
+    def _load_index(self):
+        # 调用方持有_lock
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = {}
+            except Exception as e:
+                print(f"Error loading installer cache index: {e}")
+                self._index = {}
+            self._index.setdefault('objects', {})
+            self._index.setdefault('urls', {})
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        with atomic_write(self.index_path) as f:
+            json.dump(self._index, f, indent=1)
+        self._dirty = False
+
+    def flush(self):
+        """把内存中更新过的最近使用时间写入index.json（退出时调用）"""
+        with self._lock:
+            if self._dirty:
+                try:
+                    self._save_index()
+                except OSError as e:
+                    print(f"Error saving installer cache index: {e}")
+
+    def object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def _valid(self, digest, entry):
+        try:
+            return os.path.getsize(self.object_path(digest)) == entry['size']
+        except OSError:
+            return False
+
+    # ---- 查询 ----
+
+    def lookup(self, url):
+        """返回已缓存的文件路径并更新其使用时间，未缓存时返回None。
+
+        使用时间先记在内存中，距上次写入超过 LAST_USED_WRITE_SECONDS 时才写入index.json，
+        其余的在下一次写入索引（下载、淘汰）或 flush() 时保存，命中缓存通常不需要写文件。
+        """
+        with self._lock:
+            index = self._load_index()
+            digest = index['urls'].get(url)
+            entry = index['objects'].get(digest) if digest else None
+            if entry is None:
+                return None
+            if not self._valid(digest, entry):
+                self._forget(digest)
+                self._save_index()
+                return None
+            now = time.time()
+            stale = now - entry['last_used'] >= LAST_USED_WRITE_SECONDS
+            entry['last_used'] = now
+            self._dirty = True
+            if stale:
+                self._save_index()
+            return self.object_path(digest)
+
+    def entries(self):
+        """返回所有缓存文件的列表，按最近使用时间从新到旧排列"""
+        with self._lock:
+            index = self._load_index()
+            urls = {}
+            for url, digest in index['urls'].items():
+                urls.setdefault(digest, []).append(url)
+            entries = [dict(entry, sha256=digest, urls=urls.get(digest, []))
+                       for digest, entry in index['objects'].items()]
+        return sorted(entries, key=lambda entry: entry['last_used'], reverse=True)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry['size'] for entry in self._load_index()['objects'].values())
+
+    # ---- 写入 ----
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def fetch(self, url, on_progress=None):
+        """返回url对应的缓存文件路径，未缓存时下载；on_progress(已下载字节数, 总字节数或None)"""
+        path = self.lookup(url)
+        if path is not None:
+            return path
+        # 同一地址同时只下载一次，其他线程等待后直接使用结果
+        with self._url_lock(url):
+            path = self.lookup(url)
+            if path is not None:
+                return path
+            os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+            # 临时文件名由地址决定，中断的下载再次获取同一地址时可以续传
+            temp_path = os.path.join(self.root, 'tmp', hashlib.sha256(url.encode('utf-8')).hexdigest()[:16])
+            try:
+                result = self.downloader.download(url, temp_path, on_progress)
+                return self._store(temp_path, result.sha256, result.size, url)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def add_file(self, path, url):
+        """把已有的文件（例如pyenv自己下载到install_cache中的安装程序）加入缓存"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+        temp_path = os.path.join(self.root, 'tmp', f"{os.getpid()}-{threading.get_ident()}.import")
+        shutil.copyfile(path, temp_path)
+        try:
+            return self._store(temp_path, digest.hexdigest(), os.path.getsize(temp_path), url)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _store(self, temp_path, digest, size, url):
+        object_path = self.object_path(digest)
+        with self._lock:
+            index = self._load_index()
+            entry = index['objects'].get(digest)
+            if entry is None or not self._valid(digest, entry):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temp_path, object_path)
+            index['objects'][digest] = {'size': size, 'filename': url_filename(url), 'last_used': time.time()}
+            index['urls'][url] = digest
+            self._evict(keep=digest)
+            self._save_index()
+        return object_path
+
+    def materialize(self, url, destination, on_progress=None):
+        """把url对应的安装程序放到destination（硬链接，不支持时复制），需要时先下载到缓存"""
+        path = self.fetch(url, on_progress)
+        temp_path = f"{destination}.part"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(path, temp_path)
+        except OSError:
+            shutil.copyfile(path, temp_path)
+        os.replace(temp_path, destination)
+        return destination
+
+    # ---- 淘汰 ----
+
+    def _forget(self, digest):
+        # 调用方持有_lock
+        index = self._index
+        index['objects'].pop(digest, None)
+        for url in [url for url, value in index['urls'].items() if value == digest]:
+            del index['urls'][url]
+
+    def _evict(self, keep=None, max_bytes=None):
+        # 调用方持有_lock；删除最久未使用的文件直到总大小不超过上限
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        objects = self._index['objects']
+        total = sum(entry['size'] for entry in objects.values())
+        for digest, entry in sorted(objects.items(), key=lambda item: item[1]['last_used']):
+            if total <= limit:
+                break
+            if digest == keep:
+                continue
+            try:
+                os.remove(self.object_path(digest))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # 文件正在被使用（例如镜像正在发送）时跳过
+                print(f"Error evicting cached installer: {e}")
+                continue
+            total -= entry['size']
+            self._forget(digest)
+
+    def evict(self, max_bytes=None):
+        with self._lock:
+            self._load_index()
+            self._evict(max_bytes=max_bytes)
+            self._save_index()
+
+    def clear(self):
+        self.evict(max_bytes=0)
+
+
+class InstallerMirror:
+    """把缓存作为本地HTTP镜像提供给pyenv：GET /<版本>/<文件名> 返回 upstream/<版本>/<文件名>，
+    缓存中没有时先从upstream下载。设置 PYTHON_BUILD_MIRROR_URL=mirror.url 后pyenv从这里下载。
+    支持单个Range和If-Range请求，其他机器上的 SegmentedDownloader 可以分段下载和续传。
+    """
+
+    def __init__(self, cache, upstream=PYTHON_FTP_URL, host='127.0.0.1', port=0):
+        self.cache = cache
+        self.upstream = upstream.rstrip('/')
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    @property
+    def url(self):
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        if host in ('0.0.0.0', '::'):
+            host = '127.0.0.1'
+        return f"http://{host}:{port}"
+
+    def start(self):
+        if self._server is not None:
+            return self.url
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        mirror = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                mirror._handle(self, send_body=False)
+
+            def do_GET(self):
+                mirror._handle(self, send_body=True)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name='installer-mirror')
+        self._thread.start()
+        return self.url
+
+    def wait(self, timeout=None):
+        # 等待镜像线程结束（前台运行镜像时使用）
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _handle(self, request, send_body):
+        path = request.path.split('?', 1)[0]
+        parts = [part for part in path.split('/') if part]
+        # 只代理 /<版本>/<文件名> 形式的地址
+        if len(parts) != 2 or any(part in ('.', '..') or '\\' in part for part in parts):
+            request.send_error(404)
+            return
+        try:
+            cached_path = self.cache.fetch(f"{self.upstream}/{parts[0]}/{parts[1]}")
+        except Exception as e:
+            print(f"Error fetching installer for mirror: {e}")
+            request.send_error(502)
+            return
+        # 内容寻址的文件名就是SHA-256，可以直接作为强ETag
+        etag = f'"{os.path.basename(cached_path)}"'
+        try:
+            with open(cached_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                start, end = parse_range(request.headers.get('Range'), size)
+                if_range = request.headers.get('If-Range')
+                if if_range is not None and if_range != etag:
+                    start, end = None, None
+                if start is None:
+                    request.send_response(200)
+                    start, end = 0, size - 1
+                else:
+                    request.send_response(206)
+                    request.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+                request.send_header('Content-Type', 'application/octet-stream')
+                request.send_header('Content-Length', str(end + 1 - start))
+                request.send_header('Accept-Ranges', 'bytes')
+                request.send_header('ETag', etag)
+                request.end_headers()
+                if send_body:
+                    f.seek(start)
+                    remaining = end + 1 - start
+                    while remaining > 0:
+                        chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        request.wfile.write(chunk)
+                        remaining -= len(chunk)
+        except (OSError, ConnectionError) as e:
+            print(f"Error serving cached installer: {e}")
@@ -0,0 +1,219 @@
+# 命令任务管理：并发执行只读命令，串行化修改同一版本的命令，支持取消和超时
+import itertools
+import threading
+import time
+
+from shell_host import ShellCancelled
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_TIMEOUT = 'timeout'
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED, JOB_TIMEOUT)
+
+# 会修改pyenv状态的命令
+MUTATING_COMMANDS = {'install', 'uninstall', 'global', 'local', 'shell', 'rehash', 'update', 'duplicate'}
+# 不带版本参数时只是查询的命令
+QUERY_WITHOUT_ARGS = {'global', 'local', 'shell'}
+
+
+def lock_keys_for(command, params):
+    """返回执行该命令前需要持有的锁名称，只读命令返回空列表"""
+    args = params.split()
+    versions = [arg for arg in args if not arg.startswith('-')]
+    if command not in MUTATING_COMMANDS:
+        return []
+    if command in QUERY_WITHOUT_ARGS and not versions:
+        return []
+    keys = {f"version:{version}" for version in versions}
+    if command in ('install', 'uninstall'):
+        # install -l 等只带选项的调用只是查询
+        if not versions:
+            return []
+        # Windows Installer同一时间只允许一个安装程序运行，安装/卸载之后还会重新生成shims
+        keys.update(('installer', 'shims'))
+    elif command in ('global', 'local', 'shell'):
+        keys.add(f"selection:{command}")
+    elif command == 'rehash':
+        keys.add('shims')
+    elif command == 'update':
+        keys.add('versions-db')
+    return sorted(keys)
+
+
+class Job:
+    """一次命令执行。target(job) 在后台线程中运行，通过 job.stream() 执行Shell命令、job.write() 输出文本。"""
+
+    def __init__(self, job_id, title, target, lock_keys, timeout, pool, on_output, on_status, metrics=None):
+        self.id = job_id
+        self.title = title
+        self.target = target
+        self.lock_keys = lock_keys
+        self.timeout = timeout
+        self.pool = pool
+        self.on_output = on_output
+        self.on_status = on_status
+        # command_metrics.CommandMetrics，为None时不记录计时
+        self.metrics = metrics
+        self.status = JOB_QUEUED
+        self.exit_code = None
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._cancel_status = JOB_CANCELLED
+        self._host = None
+        self._host_lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def write(self, text):
+        if self.on_output and text:
+            self.on_output(self, text)
+
+    def _set_status(self, status):
+        self.status = status
+        if status in FINISHED_STATES:
+            self.finished_at = time.monotonic()
+            if self.metrics is not None:
+                self.metrics.finish(self.exit_code, status)
+        if self.on_status:
+            self.on_status(self)
+
+    def stream(self, command):
+        """在Shell进程池中执行命令并产出输出文本片段，结束后退出码保存在exit_code中"""
+        if self.cancelled:
+            raise ShellCancelled(command)
+        with self.pool.host(self.metrics) as host:
+            with self._host_lock:
+                self._host = host
+            try:
+                # 获取进程期间可能已经被取消
+                if self.cancelled:
+                    raise ShellCancelled(command)
+                yield from host.stream(command, self.metrics)
+                self.exit_code = host.last_exit_code
+            finally:
+                with self._host_lock:
+                    self._host = None
+
+    def cancel(self, status=JOB_CANCELLED):
+        """取消任务：尚未开始的任务直接结束，正在执行的任务结束其整个进程树"""
+        if self.finished or self.cancelled:
+            return
+        self._cancel_status = status
+        self._cancel_event.set()
+        with self._host_lock:
+            host = self._host
+        if host is not None:
+            host.cancel()
+
+
+class JobManager:
+    """按锁规则调度任务：只读命令立即并发执行，修改命令按锁名称串行执行。"""
+
+    def __init__(self, pool, on_output=None, on_status=None, recorder=None):
+        self.pool = pool
+        # command_metrics.MetricsRecorder，提供时为每个任务记录计时
+        self.recorder = recorder
+        self.on_output = on_output
+        self.on_status = on_status
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def create(self, title, target, lock_keys=(), timeout=None):
+        """创建任务但不启动，调用方可以先准备好输出位置再调用start()"""
+        metrics = self.recorder.start(title, 'job') if self.recorder is not None else None
+        job = Job(next(self._ids), title, target, sorted(lock_keys), timeout,
+                  self.pool, self.on_output, self.on_status, metrics)
+        self.jobs[job.id] = job
+        return job
+
+    def start(self, job):
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def submit(self, title, target, lock_keys=(), timeout=None):
+        job = self.create(title, target, lock_keys, timeout)
+        self.start(job)
+        return job
+
+    def _acquire_locks(self, job):
+        # 按固定顺序获取锁，避免死锁；等待期间响应取消
+        acquired = []
+        for key in job.lock_keys:
+            lock = self._lock(key)
+            while not lock.acquire(timeout=0.2):
+                if job.cancelled:
+                    for held in reversed(acquired):
+                        held.release()
+                    return None
+            acquired.append(lock)
+        return acquired
+
+    def _run(self, job):
+        if job.on_status:
+            job.on_status(job)
+        if job.metrics is not None:
+            job.metrics.thread_id = threading.get_ident()
+        lock_start = time.perf_counter()
+        acquired = self._acquire_locks(job)
+        if job.metrics is not None and job.lock_keys:
+            job.metrics.add_span('wait for locks', lock_start, time.perf_counter())
+        if acquired is None:
+            job._set_status(job._cancel_status)
+            return
+        timer = None
+        try:
+            # 超时计时从真正开始执行时算起
+            if job.timeout:
+                timer = threading.Timer(job.timeout, job.cancel, args=(JOB_TIMEOUT,))
+                timer.daemon = True
+                timer.start()
+            job.started_at = time.monotonic()
+            job._set_status(JOB_RUNNING)
+            job.target(job)
+            if job.cancelled:
+                job._set_status(job._cancel_status)
+            else:
+                job._set_status(JOB_DONE if not job.exit_code else JOB_FAILED)
+        except ShellCancelled:
+            job._set_status(job._cancel_status)
+        except Exception as e:
+            job.write(f"\n{e}\n")
+            job._set_status(job._cancel_status if job.cancelled else JOB_FAILED)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            for lock in reversed(acquired):
+                lock.release()
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def remove(self, job_id):
+        # 只移除已结束的任务
+        job = self.jobs.get(job_id)
+        if job is not None and job.finished:
+            del self.jobs[job_id]
@@ -20,12 +20,88 @@ language_pack = {
         'py_global_version': 'py global version:',
         'successfully_installed_updated': 'pyenv has been successfully installed/updated to version:',
         'error_getting_version': 'Error getting version information:',
+        'waiting_for_pyenv': 'Waiting for pyenv to become available...',
+        'pyenv_not_ready': 'pyenv did not respond yet. Restart the application if the version is not shown.',
         'updated_available_versions': 'Available versions list updated',
         'updated_installed_versions': 'Installed versions list updated',
         'trying_get_installed_versions': 'Trying to get installed versions directly...',
         'run_global_first': 'Please run global command first to get installed versions',
         'run_l_first': 'Run -l first to get all available versions',
         'executing_command': 'Executing command',
+        'output_stats': 'Output: {lps:.0f} lines/s | Queue: {depth}',
+        'session_logs_button': 'Session Logs',
+        'session_logs_title': 'Session Logs',
+        'log_segment': 'Log segment',
+        'log_size': 'Size',
+        'open_log': 'Open',
+        'diagnostics_button': 'Diagnostics',
+        'diagnostics_title': 'Command Diagnostics',
+        'diag_command': 'Command',
+        'diag_status': 'Status',
+        'diag_spawn': 'Spawn',
+        'diag_first_byte': 'First byte',
+        'diag_bytes': 'Bytes',
+        'diag_lines': 'Lines',
+        'diag_decode': 'Decode',
+        'diag_ui_lag': 'UI lag avg/max',
+        'diag_wall': 'Wall time',
+        'diag_export': 'Export Chrome Trace',
+        'diag_clear': 'Clear',
+        'diag_exported': 'Trace exported to {path}',
+        'installer_cache_button': 'Installer Cache',
+        'installer_cache_title': 'Python Installer Cache',
+        'installer_cache_file': 'Installer',
+        'installer_cache_last_used': 'Last used',
+        'installer_cache_total': 'Using {used:.0f} MB of {limit} MB',
+        'installer_prefetch': 'Download the installer of the version selected for install in advance',
+        'installer_mirror': 'Serve the cache as a local mirror for pyenv install',
+        'installer_from_cache': 'Using the cached installer for {version}',
+        'installer_prefetched': 'Installer for {version} is in the cache',
+        'catalogue_refreshed': 'Available versions list refreshed in the background',
+        'batch_install_button': 'Batch Install',
+        'batch_install_title': 'Batch Install',
+        'batch_select_versions': 'Versions (Ctrl/Shift to select several):',
+        'spec_resolved': 'Version spec {spec} resolved to {version}',
+        'spec_unresolved': 'No known version matches {spec}; passing it to pyenv unchanged',
+        'spec_no_match': 'no match',
+        'version_view_label': 'Show:',
+        'version_views': {
+            'all': 'All versions',
+            'stable': 'Stable only',
+            'latest': 'Latest patch per minor',
+            'amd64': '64-bit (amd64)',
+            'win32': '32-bit (win32)',
+            'arm64': 'ARM64',
+        },
+        'batch_concurrency': 'Parallel downloads:',
+        'batch_start': 'Start',
+        'batch_version': 'Version',
+        'batch_status': 'Status',
+        'batch_elapsed': 'Elapsed',
+        'batch_total': 'Batch install finished in {seconds:.1f}s',
+        'batch_failed': 'Failed:',
+        'cancel_job_button': 'Cancel Job',
+        'close_tab_button': 'Close Tab',
+        'job_timeout_label': 'Timeout (s):',
+        'console_tab': 'Console',
+        'probing': 'checking...',
+        'startup_timing': 'Startup: imports took {imports:.0f} ms, window shown after {first_paint:.0f} ms, version info complete after {populated:.0f} ms',
+        'job_states': {
+            'queued': 'queued',
+            'running': 'running',
+            'done': 'done',
+            'failed': 'failed',
+            'cancelled': 'cancelled',
+            'timeout': 'timed out'
+        },
+        'batch_states': {
+            'queued': 'Queued',
+            'downloading': 'Downloading',
+            'waiting': 'Waiting to install',
+            'installing': 'Installing',
+            'done': 'Done',
+            'failed': 'Failed'
+        },
         'command_descriptions': {
             'commands': 'List all available pyenv commands',
             'install': 'Install 1 or more versions of Python',
@@ -65,6 +141,8 @@ language_pack = {
         'py_global_version': 'py全局版本:',
         'successfully_installed_updated': 'pyenv 已成功安装/更新到版本:',
         'error_getting_version': '获取版本信息时出错:',
+        'waiting_for_pyenv': '正在等待pyenv可用...',
+        'pyenv_not_ready': 'pyenv暂时没有响应，如果版本没有显示，请重新启动程序。',
         'updated_available_versions': '已更新可用版本列表',
         'updated_installed_versions': '已更新已安装版本列表',
         'trying_get_installed_versions': '尝试直接获取已安装版本...',
@@ -72,6 +150,80 @@ language_pack = {
         'run_l_first': '先执行-l 获取所有可安装版本',
         'run_versions_first': '请先运行versions命令，获取当前已安装版本',
         'executing_command': '执行命令',
+        'output_stats': '输出: {lps:.0f} 行/秒 | 队列: {depth}',
+        'session_logs_button': '会话日志',
+        'session_logs_title': '会话日志',
+        'log_segment': '日志段',
+        'log_size': '大小',
+        'open_log': '打开',
+        'diagnostics_button': '诊断',
+        'diagnostics_title': '命令诊断',
+        'diag_command': '命令',
+        'diag_status': '状态',
+        'diag_spawn': '进程启动',
+        'diag_first_byte': '首字节',
+        'diag_bytes': '字节数',
+        'diag_lines': '行数',
+        'diag_decode': '解码',
+        'diag_ui_lag': '界面延迟 平均/最大',
+        'diag_wall': '总耗时',
+        'diag_export': '导出Chrome Trace',
+        'diag_clear': '清空',
+        'diag_exported': 'Trace已导出到 {path}',
+        'installer_cache_button': '安装程序缓存',
+        'installer_cache_title': 'Python安装程序缓存',
+        'installer_cache_file': '安装程序',
+        'installer_cache_last_used': '最近使用',
+        'installer_cache_total': '已使用 {used:.0f} MB / {limit} MB',
+        'installer_prefetch': '预先下载安装下拉框中选中版本的安装程序',
+        'installer_mirror': '把缓存作为pyenv install的本地镜像',
+        'installer_from_cache': '使用缓存的 {version} 安装程序',
+        'installer_prefetched': '{version} 的安装程序已在缓存中',
+        'catalogue_refreshed': '已在后台刷新可用版本列表',
+        'batch_install_button': '批量安装',
+        'batch_install_title': '批量安装',
+        'batch_select_versions': '版本（按住Ctrl/Shift多选）：',
+        'spec_resolved': '版本说明 {spec} 解析为 {version}',
+        'spec_unresolved': '没有已知的版本满足 {spec}，原样传给pyenv',
+        'spec_no_match': '无匹配',
+        'version_view_label': '显示：',
+        'version_views': {
+            'all': '全部版本',
+            'stable': '仅正式版',
+            'latest': '每个次版本的最新补丁版',
+            'amd64': '64位 (amd64)',
+            'win32': '32位 (win32)',
+            'arm64': 'ARM64',
+        },
+        'batch_concurrency': '并行下载数：',
+        'batch_start': '开始',
+        'batch_version': '版本',
+        'batch_status': '状态',
+        'batch_elapsed': '耗时',
+        'batch_total': '批量安装完成，耗时 {seconds:.1f}秒',
+        'batch_failed': '失败：',
+        'cancel_job_button': '取消任务',
+        'close_tab_button': '关闭标签页',
+        'job_timeout_label': '超时(秒)：',
+        'console_tab': '控制台',
+        'probing': '检测中...',
+        'startup_timing': '启动耗时：模块导入 {imports:.0f} 毫秒，窗口显示 {first_paint:.0f} 毫秒，版本信息加载完成 {populated:.0f} 毫秒',
+        'job_states': {
+            'queued': '排队中',
+            'running': '运行中',
+            'done': '完成',
+            'failed': '失败',
+            'cancelled': '已取消',
+            'timeout': '已超时'
+        },
+        'batch_states': {
+            'queued': '排队中',
+            'downloading': '下载中',
+            'waiting': '等待安装',
+            'installing': '安装中',
+            'done': '完成',
+            'failed': '失败'
+        },
         'command_descriptions': {
             'commands': '列出所有可用的pyenv命令',
             'install': '安装一个或多个Python版本',
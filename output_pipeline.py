@@ -0,0 +1,144 @@
+# 输出管道：后台线程写入、UI线程按固定节拍批量刷新到Text控件
+import collections
+import time
+
+# 默认刷新间隔（毫秒），约30帧/秒
+DEFAULT_INTERVAL_MS = 25
+# 单次刷新最多插入的字符数，防止一次插入过大导致界面卡顿
+MAX_CHARS_PER_TICK = 256 * 1024
+# 默认保留的最大行数
+DEFAULT_MAX_LINES = 5000
+
+
+class OutputPipeline:
+    """线程安全的输出通道。
+
+    任何线程都可以调用 write() 追加文本；UI线程每隔 interval_ms 毫秒
+    取出所有待处理的文本块，合并成一次 insert 和一次 see(END)。
+    控件最多保留 max_lines 行，超出后批量删除最旧的行；
+    如果提供了 session_log，完整输出会同时写入磁盘日志；
+    如果设置了 on_lag，每次刷新后以秒为单位回报最早一块文本从写入到显示的延迟。
+    文本中单独的 "\r" 表示回到行首，之后的文本覆盖当前行（用于显示进度条）。
+    """
+
+    def __init__(self, root, text_widget, interval_ms=DEFAULT_INTERVAL_MS, on_stats=None,
+                 max_lines=DEFAULT_MAX_LINES, session_log=None, on_lag=None):
+        self.root = root
+        self.text_widget = text_widget
+        self.interval_ms = interval_ms
+        self.max_lines = max_lines
+        self.session_log = session_log
+        # 统计信息更新回调，参数为 (lines_per_second, queue_depth)
+        self.on_stats = on_stats
+        self.on_lag = on_lag
+        # deque 的 append/popleft 是线程安全的，无需额外加锁；元素为 (写入时间, 文本)
+        self._pending = collections.deque()
+        # 上一段文本以"\r"结尾，下一段文本需要覆盖当前行
+        self._return_pending = False
+        self._running = False
+        # 统计信息
+        self._lines_in_window = 0
+        self._window_start = time.monotonic()
+        self.lines_per_second = 0.0
+        self.total_lines = 0
+
+    def start(self):
+        # 启动刷新节拍（必须在UI线程中调用）
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def write(self, text):
+        # 可在任意线程中调用
+        if text:
+            self._pending.append((time.perf_counter(), text))
+
+    @property
+    def queue_depth(self):
+        return len(self._pending)
+
+    def _drain(self):
+        # 取出本次节拍要插入的所有文本块，同时返回其中最早的写入时间
+        chunks = []
+        size = 0
+        oldest = None
+        while self._pending and size < MAX_CHARS_PER_TICK:
+            written_at, chunk = self._pending.popleft()
+            if oldest is None:
+                oldest = written_at
+            chunks.append(chunk)
+            size += len(chunk)
+        return ''.join(chunks), oldest
+
+    def flush(self):
+        # 立即把待处理文本写入控件（UI线程调用）
+        text, oldest = self._drain()
+        if text:
+            self._insert(text)
+            if self.on_lag:
+                self.on_lag(time.perf_counter() - oldest)
+
+    def _insert(self, text):
+        if self.session_log is not None:
+            self.session_log.write(text)
+        if '\r' in text or self._return_pending:
+            self._insert_with_returns(text)
+        else:
+            self.text_widget.insert('end', text)
+        self._trim()
+        self.text_widget.see('end')
+        lines = text.count('\n')
+        self._lines_in_window += lines
+        self.total_lines += lines
+
+    def _insert_with_returns(self, text):
+        # 逐行处理：每行只插入最后一个"\r"之后的非空部分，有"\r"时先清空控件中的当前行
+        for number, segment in enumerate(text.split('\n')):
+            if number:
+                self.text_widget.insert('end', '\n')
+                self._return_pending = False
+            if not segment:
+                continue
+            parts = segment.split('\r')
+            visible = [index for index, part in enumerate(parts) if part]
+            if not visible:
+                # 只有"\r"
+                self._return_pending = True
+                continue
+            last = visible[-1]
+            if last > 0 or self._return_pending:
+                self.text_widget.delete('end-1c linestart', 'end-1c')
+            self.text_widget.insert('end', parts[last])
+            # 最后的非空部分之后还有"\r"
+            self._return_pending = last < len(parts) - 1
+
+    def _trim(self):
+        # 超过上限一定余量后才删除，使删除操作成批进行而不是每次都删
+        if not self.max_lines:
+            return
+        line_count = int(self.text_widget.index('end-1c').split('.')[0])
+        if line_count > self.max_lines + max(self.max_lines // 10, 1):
+            self.text_widget.delete('1.0', f"{line_count - self.max_lines + 1}.0")
+
+    def _update_stats(self):
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.lines_per_second = self._lines_in_window / elapsed
+            self._lines_in_window = 0
+            self._window_start = now
+            if self.on_stats:
+                self.on_stats(self.lines_per_second, self.queue_depth)
+
+    def _tick(self):
+        if not self._running:
+            return
+        try:
+            self.flush()
+            self._update_stats()
+        except Exception as e:
+            print(f"Error flushing output: {e}")
+        self.root.after(self.interval_ms, self._tick)
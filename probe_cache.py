@@ -0,0 +1,38 @@
+# 版本检测结果缓存：结果与它所依赖文件的指纹一起保存，启动时指纹不变才直接使用，变化后重新检测
+import threading
+
+
+class ProbeCache:
+    """版本检测结果及其依赖文件的指纹（见 PyenvEngine.probe_fingerprint）。
+
+    lookup() 只在指纹与保存时一致时命中；在GUI之外升级或卸载了pyenv、执行了 pyenv global 后指纹改变，
+    需要重新检测，再用 store() 保存结果和检测前计算的指纹。entries() 可以直接写入配置文件。
+    """
+
+    def __init__(self, entries=None):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.update(entries)
+
+    def update(self, entries):
+        """合并从配置文件读取的条目，忽略格式不对的条目"""
+        with self._lock:
+            for name, entry in (entries or {}).items():
+                if isinstance(entry, dict) and 'fingerprint' in entry:
+                    self._entries[name] = {'value': entry.get('value'), 'fingerprint': entry['fingerprint']}
+
+    def lookup(self, name, fingerprint):
+        """返回 (是否命中, 结果)"""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return False, None
+        return True, entry['value']
+
+    def store(self, name, value, fingerprint):
+        with self._lock:
+            self._entries[name] = {'value': value, 'fingerprint': fingerprint}
+
+    def entries(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._entries.items()}
@@ -4,17 +4,62 @@
 __version__ = '1.0.1'
 
 import os
-import re
-import subprocess
 import threading
-import json
 import sys
+import time
+
+# 启动计时的起点，用于统计导入、窗口首次显示和版本信息加载完成的耗时
+STARTUP_STARTED = time.monotonic()
+
+# 设置 PYENV_GUI_IMPORTTIME 环境变量或带 --import-time 参数启动时统计各模块的导入耗时
+from import_timer import enable_if_requested, IMPORTTIME_ENV
+import_timer = enable_if_requested()
+
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-import requests
 
 # 从独立文件导入语言包
 from language_pack import language_pack
+# 批量刷新的输出管道
+from output_pipeline import OutputPipeline, DEFAULT_MAX_LINES
+# 滚动保存的会话日志
+from session_log import SessionLog
+# 常驻PowerShell进程池
+from shell_host import ShellPool, ShellHostError
+# 导入输出读取模块（把输出片段组合成行）
+from stream_reader import iter_lines
+# 命令任务管理（并发、取消、超时）
+from job_manager import JobManager, lock_keys_for
+# 导入配置存储模块
+from config_store import ConfigStore
+# 导入界面状态模块
+from state_store import StateStore
+# 带文件指纹的版本检测结果缓存
+from probe_cache import ProbeCache
+# 导入pyenv-win安装模块
+from pyenv_installer import PyenvInstaller, InstallerError
+# 导入安装程序缓存模块
+from installer_cache import InstallerMirror, DEFAULT_MAX_BYTES, MIRROR_ENV
+# 导入分段下载模块（下载进度输出）
+from segmented_download import DEFAULT_SEGMENTS, progress_writer
+# 导入命令计时模块
+from command_metrics import MetricsRecorder
+# 不依赖界面的pyenv引擎（版本查询、输出解析、缓存文件和命令执行）
+from pyenv_engine import PyenvEngine, DEFAULT_PYENV, SPEC_COMMANDS, iter_version_lines, parse_pyenv_version
+# 可用版本缓存的默认有效期
+from catalogue_cache import DEFAULT_TTL_HOURS
+# pyenv-win最新版本检查的默认间隔
+from release_checker import DEFAULT_MIN_INTERVAL_HOURS
+# 批量安装调度
+from install_scheduler import InstallScheduler, DEFAULT_CONCURRENCY
+# 可用版本的筛选视图
+from version_index import VIEWS, VIEW_ALL
+
+# 模块导入完成，输出导入耗时报告
+STARTUP_IMPORTS_DONE = time.monotonic()
+if import_timer is not None:
+    import_timer.stop()
+    import_timer.report(os.environ.get(IMPORTTIME_ENV))
 
 # 当前语言设置
 current_language = 'en'
@@ -30,47 +75,132 @@ else:
 
 # 文件路径定义
 config_file = os.path.join(app_dir, 'config.json')
-AVAILABLE_VERSIONS_FILE = os.path.join(app_dir, 'available_versions.txt')
-INSTALLED_VERSIONS_FILE = os.path.join(app_dir, 'installed_versions.txt')
-
-# pyenv版本信息
-local_version = None
-latest_version = None
-global_version = None
+# 会话日志目录
+LOGS_DIR = os.path.join(app_dir, 'logs')
+
+# pyenv引擎，可用版本、已安装版本和最新版本的缓存文件都保存在app_dir中（与命令行工具共用）
+# 常驻Shell进程池，所有pyenv命令都通过它执行，避免每次启动新的powershell进程
+engine = PyenvEngine(app_dir, pool=ShellPool(size=4))
+shell_pool = engine.pool
+# 可用版本缓存，文件变化时自动重新加载索引，过期后在后台刷新
+available_versions_cache = engine.catalogue
+# pyenv-win安装器，安装脚本缓存在app_dir中
+pyenv_installer = PyenvInstaller(engine, downloader=engine.installer_cache.downloader)
+# Python安装程序缓存的本地HTTP镜像，启用后pyenv install通过它下载
+installer_mirror = InstallerMirror(engine.installer_cache)
+# 搜索防抖间隔（毫秒）
+SEARCH_DEBOUNCE_MS = 60
+# install -l 执行期间把新解析出的版本加入参数下拉框的间隔（秒）
+PROGRESSIVE_FILL_SECONDS = 0.1
+
+# pyenv安装状态
+INSTALL_IDLE = 'idle'
+INSTALL_RUNNING = 'installing'
+INSTALL_UPDATING = 'updating'
+INSTALL_UNINSTALLING = 'uninstalling'
+
+# 界面状态：pyenv版本、最新版本、全局版本、界面语言、正在进行的版本检测和pyenv安装状态。
+# 任意线程都可以修改，版本信息标签绑定到各自的键，只在对应的值变化时更新
+app_state = StateStore({'language': current_language, 'local_version': None, 'latest_version': None,
+                        'global_version': None, 'probing': frozenset(), 'install_state': INSTALL_IDLE})
+
+# 输出区域保留的最大行数（更早的输出只保存在会话日志中）
+scrollback_lines = DEFAULT_MAX_LINES
+# 可用版本缓存的有效期（小时）
+catalogue_ttl_hours = DEFAULT_TTL_HOURS
+# 两次检查最新版本之间的最小间隔（小时）
+release_check_interval_hours = DEFAULT_MIN_INTERVAL_HOURS
+# 批量安装时的并行下载数量
+install_concurrency = DEFAULT_CONCURRENCY
+# 命令任务的默认超时时间（秒），0表示不限制
+job_timeout_seconds = 0
+# pyenv可执行文件的名称或完整路径
+pyenv_executable = DEFAULT_PYENV
+# 安装脚本的SHA-256（可选），设置后只执行与之一致的脚本
+install_script_sha256 = None
+# 安装程序缓存的大小上限（MB）、是否预先下载安装下拉框中选中的版本、是否作为本地镜像
+installer_cache_max_mb = DEFAULT_MAX_BYTES // 1024 ** 2
+installer_prefetch = False
+installer_mirror_enabled = False
+# 支持Range的服务器上分几段并行下载安装程序和安装脚本
+download_segments = DEFAULT_SEGMENTS
+# 安装下拉框和批量安装窗口显示的版本视图（全部、正式版、每个次版本的最新补丁版或某个架构）
+version_view = VIEW_ALL
+
+# 本地pyenv版本和全局Python版本的检测结果，连同所依赖文件的指纹保存在配置文件中
+probe_cache = ProbeCache()
+
+# 配置存储，后台检测线程、命令线程和UI线程都会保存配置，短时间内的多次保存合并为一次写盘
+config_store = ConfigStore(config_file)
 
 # 读取配置文件
 def load_config():
-    global current_language, local_version, global_version
+    global current_language, scrollback_lines, catalogue_ttl_hours, release_check_interval_hours, install_concurrency, job_timeout_seconds, pyenv_executable, install_script_sha256, installer_cache_max_mb, installer_prefetch, installer_mirror_enabled, download_segments, version_view
     try:
-        if os.path.exists(config_file):
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                if 'language' in config:
-                    current_language = config['language']
-                if 'local_version' in config:
-                    local_version = config['local_version']
-                if 'global_version' in config:
-                    global_version = config['global_version']
+        config = config_store.load()
+        if 'language' in config:
+            current_language = config['language']
+        app_state.update({'language': current_language, 'local_version': config.get('local_version'),
+                          'global_version': config.get('global_version'),
+                          'latest_version': config.get('latest_version')})
+        if 'release_check_interval_hours' in config:
+            release_check_interval_hours = float(config['release_check_interval_hours'])
+        if 'scrollback_lines' in config:
+            scrollback_lines = int(config['scrollback_lines'])
+        if 'install_concurrency' in config:
+            install_concurrency = int(config['install_concurrency'])
+        if 'job_timeout_seconds' in config:
+            job_timeout_seconds = int(config['job_timeout_seconds'])
+        if config.get('pyenv_executable'):
+            pyenv_executable = config['pyenv_executable']
+            engine.pyenv = pyenv_executable
+        if config.get('install_script_sha256'):
+            install_script_sha256 = config['install_script_sha256']
+            pyenv_installer.expected_sha256 = install_script_sha256.lower()
+        if 'installer_cache_max_mb' in config:
+            installer_cache_max_mb = int(config['installer_cache_max_mb'])
+            engine.installer_cache.max_bytes = installer_cache_max_mb * 1024 ** 2
+        if 'installer_prefetch' in config:
+            installer_prefetch = bool(config['installer_prefetch'])
+        if 'installer_mirror' in config:
+            installer_mirror_enabled = bool(config['installer_mirror'])
+        if 'download_segments' in config:
+            download_segments = max(1, int(config['download_segments']))
+            engine.installer_cache.downloader.segments = download_segments
+        probe_cache.update(config.get('probe_cache'))
+        if config.get('version_view') in VIEWS:
+            version_view = config['version_view']
+        if 'catalogue_ttl_hours' in config:
+            catalogue_ttl_hours = float(config['catalogue_ttl_hours'])
+            available_versions_cache.ttl_hours = catalogue_ttl_hours
     except Exception as e:
         print(f"Error loading config: {e}")
 
-# 保存配置文件
+# 保存配置（可在任意线程中调用，由配置存储合并后在后台写盘）
 def save_config():
-    try:
-        config = {'language': current_language}
-        if local_version:
-            config['local_version'] = local_version
-        if global_version:
-            config['global_version'] = global_version
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=4)
-    except Exception as e:
-        print(f"Error saving config: {e}")
+    # 未知的版本信息从配置中删除
+    config_store.update({'language': current_language, 'scrollback_lines': scrollback_lines,
+                         'catalogue_ttl_hours': catalogue_ttl_hours,
+                         'release_check_interval_hours': release_check_interval_hours,
+                         'install_concurrency': install_concurrency,
+                         'job_timeout_seconds': job_timeout_seconds,
+                         'pyenv_executable': pyenv_executable,
+                         'install_script_sha256': install_script_sha256,
+                         'installer_cache_max_mb': installer_cache_max_mb,
+                         'installer_prefetch': installer_prefetch,
+                         'installer_mirror': installer_mirror_enabled,
+                         'download_segments': download_segments,
+                         'version_view': version_view,
+                         'probe_cache': probe_cache.entries(),
+                         'local_version': app_state.get('local_version') or None,
+                         'latest_version': app_state.get('latest_version') or None,
+                         'global_version': app_state.get('global_version') or None})
 
 # 切换语言函数
 def change_language(event=None):
     global current_language
     current_language = language_var.get()
+    app_state.set(language=current_language)
     save_config()
     update_ui_language()
 
@@ -84,111 +214,148 @@ def update_ui_language():
     params_label.config(text=language_pack[current_language]['params_label'])
     run_button.config(text=language_pack[current_language]['run_button'])
     clear_button.config(text=language_pack[current_language]['clear_button'])
-    # 更新命令列表
+    logs_button.config(text=language_pack[current_language]['session_logs_button'])
+    diagnostics_button.config(text=language_pack[current_language]['diagnostics_button'])
+    batch_button.config(text=language_pack[current_language]['batch_install_button'])
+    installer_cache_button.config(text=language_pack[current_language]['installer_cache_button'])
+    cancel_job_button.config(text=language_pack[current_language]['cancel_job_button'])
+    close_tab_button.config(text=language_pack[current_language]['close_tab_button'])
+    timeout_label.config(text=language_pack[current_language]['job_timeout_label'])
+    view_label.config(text=language_pack[current_language]['version_view_label'])
+    view_combobox['values'] = version_view_labels()
+    view_var.set(language_pack[current_language]['version_views'][version_view])
+    update_spec_preview()
+    output_notebook.tab(console_frame, text=language_pack[current_language]['console_tab'])
+    for job_id, tab in job_tabs.items():
+        output_notebook.tab(tab['frame'], text=job_tab_title(job_manager.jobs[job_id]))
+    # 更新命令列表（版本信息标签订阅了语言状态，会自动更新）
     update_commands_list()
-    # 更新版本信息显示（包括语言切换）
-    update_version_display()
+
+# 记录检测到的pyenv版本（None表示未安装）：更新界面，连同当前的文件指纹写入检测缓存和配置文件
+def remember_local_version(local_version, fingerprint=None):
+    probe_cache.store('local', local_version, fingerprint or engine.probe_fingerprint('local'))
+    app_state.set(local_version=local_version)
+    save_config()
+
+def remember_global_version(global_version, fingerprint=None):
+    probe_cache.store('global', global_version, fingerprint or engine.probe_fingerprint('global'))
+    app_state.set(global_version=global_version)
+    save_config()
 
 # 检查本地pyenv版本
 def check_local_version():
-    global local_version
-    # 首先检查是否已从配置文件加载了版本信息
-    if local_version:
-        return f"v{local_version}"
-    
-    # 如果配置文件中没有版本信息，则执行命令获取
+    # pyenv的 .version 文件和 shims 目录与上次检测时相同（几次stat）时直接使用缓存的结果，不执行pyenv
+    fingerprint = engine.probe_fingerprint('local')
+    cached, local_version = probe_cache.lookup('local', fingerprint)
+    if cached:
+        app_state.set(local_version=local_version)
+        return f"v{local_version}" if local_version else None
+
+    # 文件有变化（或从未检测过）时执行命令获取，指纹在检测前计算，检测期间的变化会在下次启动时再次检测
     try:
-        version_output = subprocess.check_output(['powershell', '-Command', 'pyenv --version'], stderr=subprocess.STDOUT, creationflags=subprocess.CREATE_NO_WINDOW).decode().strip()
-        # 匹配类似 "pyenv 3.1.1" 的输出
-        match = re.search(r'pyenv\s+([0-9.]+)', version_output)
-        if match:
-            local_version = match.group(1)
-            # 获取到版本后保存到配置文件
-            save_config()
-            return f"v{local_version}"
-        return None
-    except subprocess.CalledProcessError:
-        # 如果未安装pyenv，清除本地版本信息
-        local_version = None
-        save_config()
-        return None
+        local_version = engine.pyenv_version()
+        # 未安装pyenv时清除本地版本信息，获取到版本后保存到配置文件
+        remember_local_version(local_version, fingerprint)
+        return f"v{local_version}" if local_version else None
     except Exception as e:
         print(f"Error checking local version: {e}")
         return None
 
 # 检查全局Python版本
 def check_global_version():
-    global global_version
-    # 首先检查是否已从配置文件加载了版本信息
-    if global_version:
-        return f"v{global_version}"
-    
-    # 如果配置文件中没有版本信息，则执行命令获取
+    # PYENV_ROOT/version 文件与上次检测时相同时直接使用缓存的结果
+    fingerprint = engine.probe_fingerprint('global')
+    cached, global_version = probe_cache.lookup('global', fingerprint)
+    if cached:
+        app_state.set(global_version=global_version)
+        return f"v{global_version}" if global_version else "未设置"
+
+    # 优先直接读取PYENV_ROOT/version文件，无法读取时执行pyenv global
     try:
-        version_output = subprocess.check_output(['powershell', '-Command', 'pyenv global'], stderr=subprocess.STDOUT, creationflags=subprocess.CREATE_NO_WINDOW).decode().strip()
-        # 如果输出不为空且不是错误信息
-        if version_output and not version_output.startswith(('Error', '错误')):
-            # 移除可能的前导/尾随空格和换行符
-            global_version = version_output.strip()
-            # 获取到版本后保存到配置文件
-            save_config()
-            return f"v{global_version}"
-        return "未设置"
-    except subprocess.CalledProcessError:
-        # 如果执行失败，清除全局版本信息
-        global_version = None
-        save_config()
-        return "未设置"
+        versions = engine.global_versions()
+        global_version = ' '.join(versions) if versions else None
+        remember_global_version(global_version, fingerprint)
+        return f"v{global_version}" if global_version else "未设置"
     except Exception as e:
         print(f"Error checking global version: {e}")
         return "未设置"
 
-# 从GitHub获取最新版本 - 异步版本
-def get_latest_version_async():
-    global latest_version
+# 从GitHub获取最新版本（在后台检测线程中调用）
+def check_latest_version():
     try:
-        # 使用GitHub API获取最新tag
-        response = requests.get('https://api.github.com/repos/pyenv-win/pyenv-win/tags', timeout=5)
-        if response.status_code == 200:
-            tags = response.json()
-            if tags:
-                # 获取第一个tag（通常是最新的）
-                latest_tag = tags[0]['name']
-                # 提取版本号，移除可能的v前缀
-                latest_version = latest_tag.lstrip('v')
-                # 在主线程中更新UI
-                root.after(0, lambda: update_latest_version_display())
-                # 保存到配置文件
-                save_config()
+        # 未到检查间隔、处于限流或退避期间时直接返回缓存的结果
+        latest = engine.latest_release(min_interval_hours=release_check_interval_hours)
+        if latest and app_state.set(latest_version=latest):
+            # 保存到配置文件
+            save_config()
     except Exception as e:
         print(f"Error getting latest version: {e}")
-
-# 同步获取最新版本（有缓存机制）
-def get_latest_version():
-    global latest_version
-    # 如果已有缓存的版本信息，直接返回
+    latest_version = app_state.get('latest_version')
     if latest_version:
         return f"v{latest_version}"
-    # 没有缓存时返回None，异步获取将在后台进行
-    # 启动异步线程获取最新版本
-    threading.Thread(target=get_latest_version_async, daemon=True).start()
     return None
 
-# 更新最新版本显示
-def update_latest_version_display():
-    # 查找所有显示最新版本的标签并更新它们
-    for widget in version_frame.winfo_children():
-        if isinstance(widget, ttk.Frame):
-            for child in widget.winfo_children():
-                if isinstance(child, ttk.Label):
-                    # 检查标签文本是否包含最新版本的前缀
-                    text = child.cget("text")
-                    if language_pack[current_language]['latest_version'] in text and "github" not in text.lower():
-                        # 更新标签文本
-                        child.config(text=f"{language_pack[current_language]['latest_version']} v{latest_version}")
-
-# 全局版本标签变量
-version_label = None
+# 启动时的版本检测，每一项在自己的线程中执行，完成后只更新自己的标签
+VERSION_PROBES = {
+    'local': check_local_version,
+    'global': check_global_version,
+    'latest': check_latest_version,
+}
+# 启动耗时（秒）：first_paint 为窗口首次绘制，populated 为所有版本信息填充完成
+startup_timings = {}
+
+# 在后台并发执行版本检测，已经在进行中的检测不会重复启动
+def start_version_probes(names):
+    names = [name for name in names if name not in app_state.get('probing')]
+    # 正在进行的版本检测记录在状态中，对应标签显示占位文本
+    app_state.transform('probing', lambda probing: probing | set(names))
+
+    def spawn():
+        for name in names:
+            threading.Thread(target=run_version_probe, args=(name,), daemon=True).start()
+    # 在事件循环中启动线程，保证检测完成回调时主循环已经在运行
+    root.after_idle(spawn)
+
+def run_version_probe(name):
+    try:
+        VERSION_PROBES[name]()
+    except Exception as e:
+        print(f"Error checking {name} version: {e}")
+    finally:
+        root.after(0, finish_version_probe, name)
+
+# 单项检测完成（UI线程调用）
+def finish_version_probe(name):
+    probing = app_state.transform('probing', lambda probing: probing - {name})
+    if not probing and 'populated' not in startup_timings:
+        startup_timings['populated'] = time.monotonic() - STARTUP_STARTED
+        report_startup_timings()
+
+# 窗口首次绘制完成（UI线程调用）
+def mark_first_paint(event=None):
+    if event is not None and event.widget is not root:
+        return
+    if 'first_paint' not in startup_timings:
+        # 映射事件之后的空闲回调在窗口内容绘制完成后执行
+        root.after_idle(record_first_paint)
+
+def record_first_paint():
+    if 'first_paint' not in startup_timings:
+        startup_timings['first_paint'] = time.monotonic() - STARTUP_STARTED
+        report_startup_timings()
+
+# 两项耗时都得到后输出到控制台
+def report_startup_timings():
+    if 'first_paint' in startup_timings and 'populated' in startup_timings:
+        append_output(language_pack[current_language]['startup_timing'].format(
+            imports=(STARTUP_IMPORTS_DONE - STARTUP_STARTED) * 1000,
+            first_paint=startup_timings['first_paint'] * 1000,
+            populated=startup_timings['populated'] * 1000) + "\n")
+
+# 版本信息中各部分的控件
+version_widgets = {}
+# 版本信息标签的文本变量
+version_vars = {}
 
 # 创建版本信息标签
 
@@ -197,208 +364,207 @@ def open_github_link(event):
     import webbrowser
     webbrowser.open('https://github.com/pyenv-win/pyenv-win/tags')
 
+# 只在可见性改变时显示或隐藏控件，避免重复布局
+def set_packed(widget, visible, **pack_options):
+    if visible and not widget.winfo_manager():
+        widget.pack(**pack_options)
+    elif not visible and widget.winfo_manager():
+        widget.pack_forget()
+
 def create_version_info_label(parent_frame):
-    global version_label
-    
-    # 检查本地版本
-    local_version_text = check_local_version()
-    
-    # 获取最新版本
-    latest_version_text = get_latest_version()
-    
-    # 检查全局Python版本
-    global_version_text = check_global_version()
-    
-    # 检查是否需要隐藏按钮
-    if local_version_text:
-        # 如果已安装，隐藏安装按钮
-        try:
-            install_button.pack_forget()
-        except:
-            pass
-    else:
-        # 如果未安装，隐藏更新按钮
-        try:
-            update_button.pack_forget()
-        except:
-            pass
-    
+    # 控件只创建一次，文本绑定到StringVar，由状态订阅更新；检测尚未完成的部分先显示占位文本
+    for name in ('current', 'latest', 'global_', 'github_prefix', 'github_link'):
+        version_vars[name] = ttk.StringVar()
+
     # 创建主版本信息标签，所有信息将显示在同一行
     main_info_frame = ttk.Frame(parent_frame)
     main_info_frame.pack(anchor=W)
-    
+
     # 首先添加当前版本信息
-    if local_version_text:
-        current_label = ttk.Label(main_info_frame, text=f"{language_pack[current_language]['current_version']} {local_version_text}", font=("Arial", 10), padding=(10, 2))
-        current_label.pack(side=LEFT)
+    current_label = ttk.Label(main_info_frame, textvariable=version_vars['current'], font=("Arial", 10), padding=(10, 2))
+    current_label.pack(side=LEFT)
+
+    # 最新版本和全局版本只在已安装pyenv时显示
+    details_frame = ttk.Frame(main_info_frame)
+
+    # 添加分隔符
+    separator1_label = ttk.Label(details_frame, text=" | ", font=("Arial", 10), padding=(0, 2))
+    separator1_label.pack(side=LEFT)
+
+    # 添加最新版本信息
+    latest_label = ttk.Label(details_frame, textvariable=version_vars['latest'], font=("Arial", 10), padding=(0, 2))
+    latest_label.pack(side=LEFT)
+
+    # 无法获取最新版本时，在"最新:"后面显示GitHub访问提示
+    github_frame = ttk.Frame(details_frame)
+    prefix_label = ttk.Label(github_frame, textvariable=version_vars['github_prefix'], font=("Arial", 10), padding=(0, 2))
+    prefix_label.pack(side=LEFT)
+    # 添加github超链接标签
+    github_label = ttk.Label(github_frame, textvariable=version_vars['github_link'], font=("Arial", 10, "underline"), foreground="blue", padding=(0, 2))
+    github_label.pack(side=LEFT)
+    # 绑定点击事件
+    github_label.bind("<Button-1>", open_github_link)
+
+    # 添加分隔符
+    separator2_label = ttk.Label(details_frame, text=" | ", font=("Arial", 10), padding=(0, 2))
+    separator2_label.pack(side=LEFT)
+
+    # 添加全局版本信息
+    global_version_label = ttk.Label(details_frame, textvariable=version_vars['global_'], font=("Arial", 10), padding=(0, 2))
+    global_version_label.pack(side=LEFT)
+
+    version_widgets.update(current=current_label, details=details_frame, latest=latest_label,
+                           github=github_frame, separator=separator2_label, global_=global_version_label)
+
+    # 每个标签只订阅影响它的状态
+    app_state.subscribe(('local_version', 'probing', 'language'), show_local_version)
+    app_state.subscribe(('latest_version', 'probing', 'language'), show_latest_version)
+    app_state.subscribe(('global_version', 'probing', 'language'), show_global_version)
+    app_state.subscribe(('language',), show_github_hint)
+    app_state.subscribe(('install_state',), show_install_state)
+
+# 显示pyenv本地版本，并根据安装状态显示其他信息和安装/更新按钮
+def show_local_version(state):
+    texts = language_pack[state.get('language')]
+    local_version = state.get('local_version')
+    probing = 'local' in state.get('probing')
+    if probing:
+        text = f"{texts['current_version']} {texts['probing']}"
+    elif local_version:
+        text = f"{texts['current_version']} v{local_version}"
     else:
-        not_installed_label = ttk.Label(main_info_frame, text=language_pack[current_language]['not_installed_pyenv'], font=("Arial", 10), padding=(10, 2))
-        not_installed_label.pack(side=LEFT)
-    
-    # 如果有本地版本，继续添加其他信息
-    if local_version_text:
-        # 添加分隔符
-        separator1_label = ttk.Label(main_info_frame, text=" | ", font=("Arial", 10), padding=(0, 2))
-        separator1_label.pack(side=LEFT)
-        
-        # 添加最新版本信息
-        if latest_version_text:
-            latest_label = ttk.Label(main_info_frame, text=f"{language_pack[current_language]['latest_version']} {latest_version_text}", font=("Arial", 10), padding=(0, 2))
-            latest_label.pack(side=LEFT)
-        else:
-            # 无法获取最新版本时，在"最新:"后面显示GitHub访问提示
-            latest_prefix_label = ttk.Label(main_info_frame, text=f"{language_pack[current_language]['latest_version']} ", font=("Arial", 10), padding=(0, 2))
-            latest_prefix_label.pack(side=LEFT)
-            
-            # 添加前缀文本
-            prefix_label = ttk.Label(main_info_frame, text=language_pack[current_language]['ensure_github_access'], font=("Arial", 10), padding=(0, 2))
-            prefix_label.pack(side=LEFT)
-            
-            # 添加github超链接标签
-            github_label = ttk.Label(main_info_frame, text=language_pack[current_language]['github_text'], font=("Arial", 10, "underline"), foreground="blue", padding=(0, 2))
-            github_label.pack(side=LEFT)
-            # 绑定点击事件
-            github_label.bind("<Button-1>", open_github_link)
-        
-        # 添加分隔符
-        separator2_label = ttk.Label(main_info_frame, text=" | ", font=("Arial", 10), padding=(0, 2))
-        separator2_label.pack(side=LEFT)
-        
-        # 添加全局版本信息
-        global_version_label = ttk.Label(main_info_frame, text=f"{language_pack[current_language]['py_global_version']} {global_version_text}", font=("Arial", 10), padding=(0, 2))
-        global_version_label.pack(side=LEFT)
-    
-    # 保存标签引用
-    version_label = main_info_frame
+        text = texts['not_installed_pyenv']
+    version_vars['current'].set(text)
 
-# 更新版本信息显示
-def update_version_display():
-    global version_label
-    
-    # 强制销毁version_frame中的所有控件，确保完全清除旧标签
-    for widget in version_frame.winfo_children():
-        widget.destroy()
-    
-    # 语言切换时不需要重新获取版本信息，只需要重新显示UI
-    # 但如果是首次显示或版本信息未获取，需要确保有版本数据
-    if local_version is None:
-        check_local_version()
-    if global_version is None:
-        check_global_version()
-    
-    # 异步获取最新版本（如果尚未获取）
-    if latest_version is None:
-        get_latest_version()
-    
-    # 重新创建版本信息标签
-    create_version_info_label(version_frame)
-    
-    # 重新调整按钮显示
+    # 如果有本地版本（或仍在检测），继续显示其他信息
+    set_packed(version_widgets['details'], probing or bool(local_version), side=LEFT)
+
+    # 检测完成后根据安装状态隐藏相应按钮：已安装时隐藏安装按钮，未安装时隐藏更新按钮
+    if probing:
+        return
     try:
-        # 先重新显示所有按钮
-        install_button.pack(side=LEFT, padx=(0, 5))
-        update_button.pack(side=LEFT, padx=(0, 5))
-        
-        # 然后根据安装状态隐藏相应按钮
-        if local_version:
-            install_button.pack_forget()
-        else:
-            update_button.pack_forget()
+        set_packed(update_button, bool(local_version), side=LEFT, padx=(0, 5), before=uninstall_button)
+        set_packed(install_button, not local_version, side=LEFT, padx=(0, 5),
+                   before=update_button if update_button.winfo_manager() else uninstall_button)
     except Exception as e:
         print(f"Error updating buttons: {e}")
-    
-    # 强制更新GUI以确保显示最新内容
-    root.update_idletasks()
+
+# 显示pyenv-win最新版本
+def show_latest_version(state):
+    texts = language_pack[state.get('language')]
+    latest_version = state.get('latest_version')
+    prefix = texts['latest_version']
+    if 'latest' in state.get('probing') and not latest_version:
+        version_vars['latest'].set(f"{prefix} {texts['probing']}")
+    elif latest_version:
+        version_vars['latest'].set(f"{prefix} v{latest_version}")
+    else:
+        version_vars['latest'].set(f"{prefix} ")
+    set_packed(version_widgets['github'], not latest_version and 'latest' not in state.get('probing'),
+               side=LEFT, before=version_widgets['separator'])
+
+# 显示GitHub访问提示
+def show_github_hint(state):
+    texts = language_pack[state.get('language')]
+    version_vars['github_prefix'].set(texts['ensure_github_access'])
+    version_vars['github_link'].set(texts['github_text'])
+
+# 显示全局Python版本
+def show_global_version(state):
+    texts = language_pack[state.get('language')]
+    global_version = state.get('global_version')
+    if 'global' in state.get('probing'):
+        text = texts['probing']
+    elif global_version:
+        text = f"v{global_version}"
+    else:
+        text = "未设置"
+    version_vars['global_'].set(f"{texts['py_global_version']} {text}")
+
+# 安装、更新或卸载pyenv-win期间禁用这三个按钮
+def show_install_state(state):
+    button_state = NORMAL if state.get('install_state') == INSTALL_IDLE else DISABLED
+    for button in (install_button, update_button, uninstall_button):
+        button.config(state=button_state)
 
 # 加载配置
 load_config()
 
-def run_ps1(uninstall=False):
+def run_ps1(uninstall=False, update=False):
     # This function handles the installation and uninstallation of pyenv
-    global local_version
-
-    # Skip the check if pyenv is installed when uninstalling
-    if not uninstall:
+    # 执行期间禁用安装/更新/卸载按钮
+    app_state.set(install_state=INSTALL_UNINSTALLING if uninstall else (INSTALL_UPDATING if update else INSTALL_RUNNING))
+    try:
+        run_install_script(uninstall, update)
+    finally:
+        app_state.set(install_state=INSTALL_IDLE)
+
+# 检查安装状态后执行安装脚本，完成后更新版本信息
+def run_install_script(uninstall, update):
+    # Skip the check if pyenv is installed when uninstalling or updating (the script updates an existing install)
+    if not uninstall and not update:
         # Check if pyenv is installed by running a PowerShell command
-        try:
-            version = subprocess.check_output(['powershell', '-Command', 'pyenv --version'])
-            output_text.insert(END, language_pack[current_language]['already_installed'] + "\n")
-            output_text.insert(END, version.decode() + "\n")
-            output_text.see(END)
+        result = engine.run('--version', use_filesystem=False)
+        if result.exit_code == 0:
+            append_output(language_pack[current_language]['already_installed'] + "\n")
+            append_output(result.output + "\n")
             # 更新版本信息并保存到配置文件
-            version_str = version.decode().strip()
-            match = re.search(r'pyenv\s+([0-9.]+)', version_str)
-            if match:
-                local_version = match.group(1)
-                save_config()
+            version = parse_pyenv_version(result.output)
+            if version:
                 # 更新界面版本显示
-                update_version_display()
+                remember_local_version(version)
             return  # Return immediately if pyenv is already installed
-        except subprocess.CalledProcessError:
-            pass  # If pyenv is not installed, continue with the installation
+        # If pyenv is not installed, continue with the installation
 
     # If pyenv is not installed and uninstall is requested, display message
     if uninstall:
-        try:
-            subprocess.check_output(['powershell', '-Command', 'pyenv --version'])
-        except subprocess.CalledProcessError:
-            output_text.insert(END, language_pack[current_language]['not_installed'] + "\n")
-            output_text.see(END)
+        if engine.pyenv_version() is None:
+            append_output(language_pack[current_language]['not_installed'] + "\n")
             return
 
-    # Check if the installation script is present, if not, download it
-    if not os.path.exists("./install-pyenv-win.ps1"):
-        ps_command = 'Invoke-WebRequest -UseBasicParsing -Uri "https://raw.githubusercontent.com/pyenv-win/pyenv-win/master/pyenv-win/install-pyenv-win.ps1" -OutFile "./install-pyenv-win.ps1"'
-        command = ['powershell', '-Command', ps_command]
-        subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-
     # Prepare and execute the installation or uninstallation command
     if uninstall:
-        output_text.insert(END, language_pack[current_language]['starting_uninstallation'] + "\n")
-        command = ['powershell', '-Command', '&"./install-pyenv-win.ps1" -Uninstall']
+        append_output(language_pack[current_language]['starting_uninstallation'] + "\n")
     else:
-        output_text.insert(END, language_pack[current_language]['starting_installation'] + "\n")
-        command = ['powershell', '-Command', '&"./install-pyenv-win.ps1"']
-
-    output_text.see(END)
-
-    # Run the command in a subprocess and capture the output# 执行命令
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, creationflags=subprocess.CREATE_NO_WINDOW)
-
-    # Read and display the output from the subprocess
-    while True:
-        output = process.stdout.readline()
-        if output == '' and process.poll() is not None:
-            break
-        if output:
-            output_text.insert(END, output.decode())
-            output_text.see(END)
-    rc = process.poll()
-    
+        append_output(language_pack[current_language]['starting_installation'] + "\n")
+
+    # 下载（或使用已校验的缓存）安装脚本并在常驻Shell中执行，输出逐块显示
+    # 记录命令计时，控制台输出的界面刷新延迟在命令执行期间计入该命令
+    metrics = metrics_recorder.start(pyenv_installer.script_command(uninstall), 'installer')
+    output_pipeline.on_lag = metrics.record_ui_lag
+    try:
+        exit_code = pyenv_installer.run_script(uninstall, on_output=append_output, metrics=metrics)
+        metrics.finish(exit_code)
+    except (InstallerError, ShellHostError) as e:
+        append_output(f"\n{e}\n")
+        metrics.finish(None, 'failed')
+        return
+    finally:
+        root.after(0, detach_console_metrics, metrics)
+
     # 安装或更新完成后，获取版本并更新配置文件
     if not uninstall:
-        # 等待一会儿让环境变量生效
-        import time
-        time.sleep(2)
-        # 获取新安装/更新的版本
+        # 安装脚本修改的环境变量需要一点时间生效，按退避间隔检查pyenv是否可用
+        append_output(language_pack[current_language]['waiting_for_pyenv'] + "\n")
         try:
-            # 使用新的PowerShell进程来获取版本信息
-            version_output = subprocess.check_output(['powershell', '-Command', 'pyenv --version'], stderr=subprocess.STDOUT).decode().strip()
-            match = re.search(r'pyenv\s+([0-9.]+)', version_output)
-            if match:
-                local_version = match.group(1)
-                save_config()
-                output_text.insert(END, f"\n{language_pack[current_language]['successfully_installed_updated']} v{local_version}\n")
+            version = pyenv_installer.wait_until_ready()
+            if version:
                 # 更新界面版本显示
-                root.after(0, update_version_display)
+                remember_local_version(version)
+                append_output(f"\n{language_pack[current_language]['successfully_installed_updated']} v{version}\n")
+            else:
+                append_output(language_pack[current_language]['pyenv_not_ready'] + "\n")
         except Exception as e:
-            output_text.insert(END, f"\n{language_pack[current_language]['error_getting_version']} {e}\n")
+            append_output(f"\n{language_pack[current_language]['error_getting_version']} {e}\n")
     else:
-        # 卸载完成后清除版本信息
-        local_version = None
-        save_config()
-        # 更新界面版本显示
-        root.after(0, update_version_display)
+        # 卸载完成后清除版本信息，界面版本显示随之更新
+        remember_local_version(None)
+
+# 写入剩余输出后停止把控制台的刷新延迟计入该命令（UI线程调用）
+def detach_console_metrics(metrics):
+    output_pipeline.flush()
+    if output_pipeline.on_lag == metrics.record_ui_lag:
+        output_pipeline.on_lag = None
 
 def install():
     # Start a new thread for installing pyenv
@@ -406,20 +572,74 @@ def install():
 
 def update():
     # Start a new thread for updating pyenv
-    threading.Thread(target=run_ps1, args=(False,)).start()
+    threading.Thread(target=run_ps1, args=(False, True)).start()
 
 def uninstall():
     # Start a new thread for uninstalling pyenv
     threading.Thread(target=run_ps1, args=(True,)).start()
     
 def clear_output():
-    # Clear the output text area
-    output_text.delete('1.0', END)
+    # Clear the output text area of the selected tab
+    job_id = selected_job_id()
+    if job_id is not None:
+        job_tabs[job_id]['text'].delete('1.0', END)
+    else:
+        output_text.delete('1.0', END)
+
+# 追加输出文本（可在任意线程中调用，由输出管道在UI线程中批量刷新）
+def append_output(text):
+    output_pipeline.write(text)
+
+# 显示会话日志列表，可以重新打开任意一个日志段
+def show_session_logs():
+    logs_window = ttk.Toplevel(root)
+    logs_window.title(language_pack[current_language]['session_logs_title'])
+    logs_window.geometry("480x320")
+
+    segments = session_log.list_segments()
+    logs_tree = ttk.Treeview(logs_window, columns=('size',), show='tree headings', selectmode='browse')
+    logs_tree.heading('#0', text=language_pack[current_language]['log_segment'])
+    logs_tree.heading('size', text=language_pack[current_language]['log_size'])
+    logs_tree.column('size', width=90, anchor=E)
+    # 最新的日志段显示在最前面
+    for path in reversed(segments):
+        try:
+            size_kb = os.path.getsize(path) / 1024
+        except OSError:
+            continue
+        logs_tree.insert('', END, iid=path, text=os.path.basename(path), values=(f"{size_kb:.1f} KB",))
+    logs_tree.pack(fill=BOTH, expand=True, padx=10, pady=(10, 5))
+
+    def open_selected(event=None):
+        selection = logs_tree.selection()
+        if selection:
+            open_log_segment(selection[0])
+
+    logs_tree.bind('<Double-1>', open_selected)
+    open_button = ttk.Button(logs_window, text=language_pack[current_language]['open_log'], command=open_selected, bootstyle=PRIMARY)
+    open_button.pack(anchor=W, padx=10, pady=(0, 10))
+
+# 在新窗口中以只读方式打开一个日志段
+def open_log_segment(path):
+    segment_window = ttk.Toplevel(root)
+    segment_window.title(os.path.basename(path))
+    segment_text = ttk.Text(segment_window)
+    segment_scrollbar = ttk.Scrollbar(segment_window, command=segment_text.yview, bootstyle=SECONDARY)
+    segment_text['yscrollcommand'] = segment_scrollbar.set
+    segment_scrollbar.pack(side=RIGHT, fill=Y)
+    segment_text.pack(side=LEFT, fill=BOTH, expand=True)
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            segment_text.insert(END, f.read())
+    except Exception as e:
+        segment_text.insert(END, f"Error reading log: {e}\n")
+    segment_text.config(state=DISABLED)
+
+# 更新输出统计信息（每秒行数和队列深度）
+def update_output_stats(lines_per_second, queue_depth):
+    output_stats_label.config(text=language_pack[current_language]['output_stats'].format(lps=lines_per_second, depth=queue_depth))
 
 def run_command():
-    # 禁用运行按钮，防止重复点击
-    run_button.config(state=DISABLED)
-    
     # 获取命令和参数
     selected_command_text = command_var.get()
     selected_command = get_command_name(selected_command_text)
@@ -431,117 +651,268 @@ def run_command():
     # 检查是否是global命令（无参数）
     is_global_no_params = (selected_command == 'global' and (not params or params == language_pack[current_language]['run_versions_first']))
     
-    # 启动新线程执行命令
-    threading.Thread(target=run_command_thread, 
-                    args=(selected_command, params, is_install_list, is_global_no_params),
-                    daemon=True).start()
+    # 对于global和uninstall命令，如果参数是提示信息，则不传递参数
+    is_hint_text = params == language_pack[current_language]['run_versions_first']
+    job_params = '' if is_hint_text else params
+    # 参数中的版本说明（例如 3.11、>=3.10,<3.12、latest-stable-amd64）替换为具体版本，锁和标题使用替换后的版本
+    resolved = []
+    if not is_install_list:
+        try:
+            job_params, resolved = engine.resolve_params(selected_command, job_params)
+        except Exception as e:
+            print(f"Error resolving version spec: {e}")
+    title = f"pyenv {selected_command}{' ' + job_params if job_params else ''}"
+
+    # 创建任务和它的输出标签页，然后在后台执行；修改同一版本的命令会自动排队
+    try:
+        timeout = max(int(timeout_var.get()), 0)
+    except ValueError:
+        timeout = job_timeout_seconds
+    job = job_manager.create(
+        title,
+        lambda job: run_command_thread(job, selected_command, job_params, is_install_list, is_global_no_params, resolved),
+        lock_keys=lock_keys_for(selected_command, job_params),
+        timeout=timeout or None)
+    create_job_tab(job)
+    job_manager.start(job)
+
+# 把输出片段写入任务的输出管道（由UI线程按固定节拍合并刷新，没有换行的进度输出也会立即显示），同时原样产出供解析
+def write_through(job, pieces):
+    for text in pieces:
+        job.write(text)
+        yield text
+
+# 用parser逐行解析输出并返回版本列表；on_batch(新版本列表) 最多每 PROGRESSIVE_FILL_SECONDS 调用一次
+def collect_versions(lines, parser, on_batch=None):
+    versions = []
+    batch_start = 0
+    last_batch = time.monotonic()
+    for version in parser(lines):
+        versions.append(version)
+        if on_batch and time.monotonic() - last_batch >= PROGRESSIVE_FILL_SECONDS:
+            on_batch(versions[batch_start:])
+            batch_start = len(versions)
+            last_batch = time.monotonic()
+    if on_batch and batch_start < len(versions):
+        on_batch(versions[batch_start:])
+    return versions
 
-def run_command_thread(selected_command, params, is_install_list, is_global_no_params):
-    """在单独线程中执行命令并处理输出"""
+def run_command_thread(job, selected_command, params, is_install_list, is_global_no_params, resolved=()):
+    """在任务线程中执行命令，输出写入该任务的标签页；resolved为参数中已替换的 [(版本说明, 版本)]"""
+    command_start = time.monotonic()
+    for spec, version in resolved:
+        if version is None:
+            job.write(language_pack[current_language]['spec_unresolved'].format(spec=spec) + "\n")
+        elif version != spec:
+            job.write(language_pack[current_language]['spec_resolved'].format(spec=spec, version=version) + "\n")
     # 对于global和uninstall命令，如果参数是提示信息，则不传递参数
     is_hint_text = params == language_pack[current_language]['run_versions_first']
     if (selected_command in ['global', 'uninstall']) and is_hint_text:
-        command = ['powershell', '-Command', f'pyenv {selected_command}']
         # 显示不包含提示信息的命令
         display_params = ''
     else:
-        command = ['powershell', '-Command', f'pyenv {selected_command} {params}']
         display_params = params
+    command = engine.command_line(selected_command, display_params)
     
-    # 在UI线程中显示命令开始执行的提示
-    def display_command_start():
-        output_text.insert(END, f"{language_pack[current_language]['executing_command']}: pyenv {selected_command}{' ' + display_params if display_params else ''}\n")
-        output_text.see(END)
-    root.after(0, display_command_start)
+    # 显示命令开始执行的提示（通过输出管道在UI线程中批量刷新）
+    job.write(f"{language_pack[current_language]['executing_command']}: pyenv {selected_command}{' ' + display_params if display_params else ''}\n")
     
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, creationflags=subprocess.CREATE_NO_WINDOW)
-
-    # Read and display the output from the subprocess
-    output_lines = []
-    for line in iter(process.stdout.readline, b''):
-        try:
-            # 尝试使用utf-8解码
-            line_text = line.decode('utf-8')
-        except UnicodeDecodeError:
+    # install -l 和 versions 的输出边读取边解析，不保存原始输出；install -l 解析出的版本逐步加入参数下拉框
+    parser = iter_version_lines if is_install_list or selected_command == 'versions' else None
+    on_batch = (lambda batch: root.after(0, extend_install_options, batch)) if is_install_list else None
+    parsed_versions = []
+    # 只读的版本查询优先直接读取PYENV_ROOT，无需启动pyenv
+    fs_output = engine.query_filesystem(selected_command, display_params)
+    if fs_output is not None:
+        job.metrics.source = 'filesystem'
+        job.metrics.bytes_read = len(fs_output.encode('utf-8'))
+        job.metrics.lines_read = fs_output.count('\n')
+        job.write(fs_output)
+        if parser is not None:
+            parsed_versions = collect_versions(fs_output.splitlines(keepends=True), parser)
+    else:
+        # 已缓存的安装程序先放到pyenv的install_cache中，重复安装无需再次下载
+        install_versions = [arg for arg in display_params.split() if not arg.startswith('-')] if selected_command == 'install' else []
+        for version in install_versions:
             try:
-                # 如果失败，尝试使用gbk解码（Windows系统常用）
-                line_text = line.decode('gbk')
-            except UnicodeDecodeError:
-                # 如果都失败，使用replace模式解码以避免程序崩溃
-                line_text = line.decode('utf-8', errors='replace')
-        output_lines.append(line_text)
-        # 在UI线程中更新输出文本
-        def update_output(text=line_text):  # 使用默认参数捕获当前line_text
-            output_text.insert(END, text)
-            output_text.see(END)
-            # 强制更新UI以确保实时显示
-            root.update_idletasks()
-        root.after(0, update_output)
-    
-    process.stdout.close()
-    process.wait()
+                if engine.stage_installer(version):
+                    job.write(language_pack[current_language]['installer_from_cache'].format(version=version) + "\n")
+            except Exception as e:
+                print(f"Error staging cached installer: {e}")
+        # 在常驻Shell进程中执行命令并读取输出；取消、超时和Shell错误由任务管理器处理并更新任务状态
+        pieces = write_through(job, job.stream(command))
+        if parser is not None:
+            parsed_versions = collect_versions(iter_lines(pieces), parser, on_batch)
+        else:
+            for _ in pieces:
+                pass
+        # 把pyenv下载的安装程序加入缓存
+        if job.exit_code == 0:
+            for version in install_versions:
+                try:
+                    engine.capture_installer(version)
+                except Exception as e:
+                    print(f"Error caching installer: {e}")
     
-    # 处理install -l命令的特殊情况
+    # 处理install -l命令的特殊情况（命令失败时保留原有的缓存）
     if is_install_list:
-        if handle_install_list(output_lines):
-            def update_success_message():
-                output_text.insert(END, f"\n{language_pack[current_language]['updated_available_versions']}\n")
-                output_text.see(END)
-            root.after(0, update_success_message)
+        if job.exit_code == 0 and parsed_versions and handle_install_list(parsed_versions, time.monotonic() - command_start):
+            job.write(f"\n{language_pack[current_language]['updated_available_versions']}\n")
     # 处理versions命令的特殊情况，用于获取已安装版本
     elif selected_command == 'versions':
-        # 解析pyenv versions的输出
-        installed_versions = []
-        for line in output_lines:
-            line = line.strip()
-            # 跳过空行和错误信息行
-            if line and not any(err_msg in line.lower() for err_msg in ['error', '错误', 'failed']):
-                # 移除版本号前面的*（如果存在）和空格
-                if line.startswith('*'):
-                    line = line[1:].strip()
-                # 假设版本号是行的第一个部分（直到空格为止）
-                if ' ' in line:
-                    version = line.split(' ', 1)[0]
-                else:
-                    version = line
-                # 简单验证是否为版本号格式
-                if any(char.isdigit() for char in version) and '.' in version:
-                    installed_versions.append(version)
-        
         # 如果找到了版本信息，更新文件和下拉框
-        if installed_versions:
-            if update_installed_versions_file(installed_versions):
-                def update_versions_message():
-                    output_text.insert(END, f"\n{language_pack[current_language]['updated_installed_versions']}\n")
-                    output_text.see(END)
-                    # 更新下拉框
-                    update_global_params_combobox()
-                root.after(0, update_versions_message)
+        if parsed_versions:
+            if update_installed_versions_file(parsed_versions):
+                job.write(f"\n{language_pack[current_language]['updated_installed_versions']}\n")
+                # 在UI线程中更新下拉框
+                root.after(0, update_global_params_combobox)
     # 处理global和uninstall命令（无参数）的特殊情况 - 注意：命令本身已经在run_command_thread中正确执行
     # 这里不再重复显示提示信息，避免重复输出
     # 仅保留对非命令执行情况的处理逻辑（如果需要）
     
     # 检测是否执行了pyenv global命令并成功设置了版本
-    if selected_command == 'global' and params.strip() and params != language_pack[current_language]['run_versions_first']:
-        # 尝试更新全局版本信息
-        global global_version
-        # 直接使用命令中设置的版本号
-        global_version = params.strip()
-        save_config()
-        # 在UI线程中更新界面显示
-        root.after(0, update_version_display)
+    if selected_command == 'global' and params.strip() and not is_hint_text and job.exit_code == 0:
+        # 直接使用命令中设置的版本号更新全局版本信息，界面显示随之更新
+        remember_global_version(params.strip())
+
+# 每个任务的输出标签页：{任务ID: {'frame', 'text', 'pipeline'}}
+job_tabs = {}
+
+# 为任务创建输出标签页（UI线程调用）
+def create_job_tab(job):
+    frame = ttk.Frame(output_notebook)
+    text = ttk.Text(frame)
+    tab_scrollbar = ttk.Scrollbar(frame, command=text.yview, bootstyle=SECONDARY)
+    text['yscrollcommand'] = tab_scrollbar.set
+    tab_scrollbar.pack(side=RIGHT, fill=Y)
+    text.pack(side=LEFT, fill=BOTH, expand=True)
+    pipeline = OutputPipeline(root, text, max_lines=scrollback_lines, session_log=session_log,
+                              on_lag=job.metrics.record_ui_lag if job.metrics else None)
+    pipeline.start()
+    job_tabs[job.id] = {'frame': frame, 'text': text, 'pipeline': pipeline}
+    output_notebook.add(frame, text=job_tab_title(job))
+    output_notebook.select(frame)
+
+# 标签页标题：任务编号、状态和命令
+def job_tab_title(job):
+    status = language_pack[current_language]['job_states'][job.status]
+    return f"#{job.id} {job.title} [{status}]"
+
+# 任务输出回调（任务线程调用）
+def on_job_output(job, text):
+    tab = job_tabs.get(job.id)
+    if tab is not None:
+        tab['pipeline'].write(text)
+
+# 任务状态回调（任务线程调用），在UI线程中更新标签页标题
+def on_job_status(job):
+    def update_tab():
+        tab = job_tabs.get(job.id)
+        if tab is not None:
+            output_notebook.tab(tab['frame'], text=job_tab_title(job))
+    root.after(0, update_tab)
+
+# 当前选中的任务标签页对应的任务ID，选中控制台时返回None
+def selected_job_id():
+    selected_tab = output_notebook.select()
+    for job_id, tab in job_tabs.items():
+        if str(tab['frame']) == selected_tab:
+            return job_id
+    return None
 
-    # 在命令完成后启用按钮
-    def enable_run_button():
-        run_button.config(state=NORMAL)
-    root.after(0, enable_run_button)
-    
-    # 恢复运行按钮状态
-    root.after(0, lambda: run_button.config(state=NORMAL))
+# 取消当前标签页的任务（结束整个进程树）
+def cancel_selected_job():
+    job_id = selected_job_id()
+    if job_id is not None:
+        job_manager.cancel(job_id)
+
+# 关闭当前标签页（只能关闭已结束的任务）
+def close_selected_tab():
+    job_id = selected_job_id()
+    if job_id is None:
+        return
+    job = job_manager.jobs.get(job_id)
+    if job is not None and not job.finished:
+        return
+    tab = job_tabs.pop(job_id)
+    tab['pipeline'].stop()
+    tab['pipeline'].flush()
+    output_notebook.forget(tab['frame'])
+    tab['frame'].destroy()
+    job_manager.remove(job_id)
+
+# 命令计时记录（最近的命令），可在诊断窗口中查看或导出为Chrome trace
+metrics_recorder = MetricsRecorder()
+
+# 命令任务管理器，所有任务共享常驻Shell进程池
+job_manager = JobManager(shell_pool, on_output=on_job_output, on_status=on_job_status, recorder=metrics_recorder)
+
+# 诊断窗口的列：(语言包键, 取值函数, 宽度)
+DIAGNOSTIC_COLUMNS = (
+    ('diag_status', lambda m: language_pack[current_language]['job_states'].get(m.status, m.status), 80),
+    ('diag_spawn', lambda m: f"{m.spawn_seconds * 1000:.0f} ms" if m.spawned else '-', 70),
+    ('diag_first_byte', lambda m: f"{m.first_byte_seconds * 1000:.0f} ms" if m.first_byte_seconds is not None else '-', 80),
+    ('diag_bytes', lambda m: f"{m.bytes_read:,}", 80),
+    ('diag_lines', lambda m: f"{m.lines_read:,}", 60),
+    ('diag_decode', lambda m: f"{m.decode_seconds * 1000:.1f} ms", 70),
+    ('diag_ui_lag', lambda m: f"{m.ui_lag_average * 1000:.0f} / {m.ui_lag_max * 1000:.0f} ms", 100),
+    ('diag_wall', lambda m: f"{m.wall_seconds:.2f} s", 70),
+)
+
+# 显示诊断窗口：每条命令的计时，窗口打开期间每秒刷新
+def show_diagnostics():
+    diagnostics_window = ttk.Toplevel(root)
+    diagnostics_window.title(language_pack[current_language]['diagnostics_title'])
+    diagnostics_window.geometry("860x360")
+
+    columns = [key for key, _, _ in DIAGNOSTIC_COLUMNS]
+    diagnostics_tree = ttk.Treeview(diagnostics_window, columns=columns, show='tree headings', selectmode='browse')
+    diagnostics_tree.heading('#0', text=language_pack[current_language]['diag_command'])
+    diagnostics_tree.column('#0', width=220)
+    for key, _, width in DIAGNOSTIC_COLUMNS:
+        diagnostics_tree.heading(key, text=language_pack[current_language][key])
+        diagnostics_tree.column(key, width=width, anchor=E)
+    diagnostics_tree.pack(fill=BOTH, expand=True, padx=10, pady=(10, 5))
+
+    def refresh():
+        if not diagnostics_window.winfo_exists():
+            return
+        # 最新的命令显示在最前面
+        records = metrics_recorder.records()
+        diagnostics_tree.delete(*diagnostics_tree.get_children())
+        for index, metrics in enumerate(reversed(records)):
+            diagnostics_tree.insert('', END, iid=str(index), text=metrics.name,
+                                    values=[value(metrics) for _, value, _ in DIAGNOSTIC_COLUMNS])
+        diagnostics_window.after(1000, refresh)
+
+    def clear():
+        metrics_recorder.clear()
+        diagnostics_tree.delete(*diagnostics_tree.get_children())
+
+    buttons_frame = ttk.Frame(diagnostics_window)
+    buttons_frame.pack(fill=X, padx=10, pady=(0, 10))
+    ttk.Button(buttons_frame, text=language_pack[current_language]['diag_export'], command=lambda: export_trace(diagnostics_window), bootstyle=PRIMARY).pack(side=LEFT)
+    ttk.Button(buttons_frame, text=language_pack[current_language]['diag_clear'], command=clear, bootstyle=SECONDARY).pack(side=LEFT, padx=(10, 0))
+    refresh()
+
+# 把命令计时导出为Chrome trace-event JSON（可在 chrome://tracing 或 ui.perfetto.dev 中打开）
+def export_trace(parent):
+    from tkinter import filedialog
+    path = filedialog.asksaveasfilename(parent=parent, defaultextension='.json', initialfile='pyenv-gui-trace.json',
+                                        filetypes=[('Trace JSON', '*.json')])
+    if not path:
+        return
+    try:
+        metrics_recorder.export_chrome_trace(path)
+        append_output(language_pack[current_language]['diag_exported'].format(path=path) + "\n")
+    except Exception as e:
+        print(f"Error exporting trace: {e}")
 
 # Create the main window with ttkbootstrap theme
 root = ttk.Window(themename="cosmo")
 root.title(f"pyenv-win GUI - Version {__version__}")  # Set the title of the window
+# 状态变化的通知在UI线程中执行
+app_state.dispatch = lambda callback: root.after(0, callback)
 
 # Configure grid weights
 root.grid_columnconfigure(0, weight=1)
@@ -570,8 +941,11 @@ update_button.pack(side=LEFT, padx=(0, 5))
 uninstall_button = ttk.Button(action_buttons_frame, text=language_pack[current_language]['uninstall_button'], command=uninstall, bootstyle=DANGER)
 uninstall_button.pack(side=LEFT)
 
-# 创建版本信息标签
+# 创建版本信息标签，先显示占位文本，版本检测在后台并发进行
+start_version_probes(VERSION_PROBES)
 create_version_info_label(version_frame)
+# 记录窗口首次绘制的时间
+root.bind('<Map>', mark_first_paint, add='+')
 
 # Create language selection frame
 language_frame = ttk.Frame(action_frame)
@@ -653,33 +1027,44 @@ params_frame.grid(row=3, column=0, sticky='w', pady=(0, 10), padx=(10, 0))  # Pl
 # 使用简单可靠的方法解决Windows上的焦点问题
 params_combobox = ttk.Combobox(params_frame, textvariable=params_var, width=47, state='disabled')
 
+# 待执行的搜索任务（用于防抖）
+search_after_id = None
+
 # 搜索过滤函数 - 专注于保持焦点的实时过滤
 def on_combobox_search(event):
+    global search_after_id
     # 忽略导航键和特殊按键，只处理实际字符输入
     if event.keysym in ('Left', 'Right', 'Home', 'End', 'Up', 'Down', 'PageUp', 'PageDown', 
                        'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Delete', 'BackSpace',
                        'Return', 'Tab', 'Escape'):
         return
-    
+
+    # 防抖：快速连续输入时只在停顿后执行一次搜索
+    if search_after_id is not None:
+        root.after_cancel(search_after_id)
+    search_after_id = root.after(SEARCH_DEBOUNCE_MS, apply_combobox_search)
+
+def apply_combobox_search():
+    global search_after_id
+    search_after_id = None
+
     # 获取当前输入内容和光标位置
     search_text = params_combobox.get().lower()
     cursor_pos = params_combobox.index(INSERT)
     
-    # 加载所有可用版本
-    all_versions = load_available_versions()
+    # 获取可用版本索引（文件未变化时直接使用内存中的索引）
+    version_index = available_versions_cache.get()
     
     # 构建过滤后的选项列表
     filtered_options = ['-l']  # 始终保留'-l'选项
     
-    if not all_versions:
+    if not len(version_index):
         # 如果没有版本信息，添加提示
         if not search_text or language_pack[current_language]['run_l_first'] in search_text:
             filtered_options.append(language_pack[current_language]['run_l_first'])
     else:
-        # 过滤匹配的版本
-        for version in all_versions:
-            if search_text in version.lower():
-                filtered_options.append(version)
+        # 按相关度排序的匹配版本（前缀 > 子串 > 模糊）
+        filtered_options.extend(version_index.search(search_text, view=version_view))
     
     # 更新下拉框的值，但不自动显示下拉（这是导致焦点问题的主要原因）
     params_combobox['values'] = filtered_options
@@ -718,35 +1103,72 @@ params_label.pack(side=LEFT, padx=(0, 5))  # Place the label in the frame
 params_entry = ttk.Entry(params_frame, textvariable=params_var, width=50)
 params_entry.pack(side=LEFT)  # Place the input box in the frame
 
-# 加载可用版本的函数
-def load_available_versions():
-    versions = []
-    if os.path.exists(AVAILABLE_VERSIONS_FILE):
+# 加载可用版本的函数（使用内存索引，文件变化时才重新读取），按当前视图从新到旧排列
+def load_available_versions(view=None):
+    return available_versions_cache.get().view(view or version_view)
+
+# 版本视图在下拉框中显示的名称（与VIEWS的顺序一致）
+def version_view_labels():
+    views = language_pack[current_language]['version_views']
+    return [views[view] for view in VIEWS]
+
+# 显示名称对应的视图
+def view_from_label(label):
+    labels = version_view_labels()
+    return VIEWS[labels.index(label)] if label in labels else VIEW_ALL
+
+# 选择版本视图：保存配置并按新视图重新填充安装下拉框，已输入的搜索内容保留
+def on_version_view_selected(event=None):
+    global version_view
+    version_view = view_from_label(view_var.get())
+    save_config()
+    if params_var.get() and params_var.get() != '-l':
+        apply_combobox_search()
+    else:
+        update_install_params_combobox()
+
+# 版本视图下拉框（只在install命令时显示）
+view_var = ttk.StringVar(root)
+view_label = ttk.Label(params_frame, text=language_pack[current_language]['version_view_label'])
+view_combobox = ttk.Combobox(params_frame, textvariable=view_var, values=version_view_labels(),
+                             width=22, state='readonly')
+view_var.set(language_pack[current_language]['version_views'][version_view])
+view_combobox.bind('<<ComboboxSelected>>', on_version_view_selected)
+
+# 参数中的版本说明解析结果预览，例如 "3.11 → 3.11.9"（每次修改参数时更新，解析使用索引，不必防抖）
+spec_preview_label = ttk.Label(params_frame, text='', bootstyle=INFO)
+
+def update_spec_preview(*args):
+    command = get_command_name(command_var.get())
+    params = params_var.get()
+    resolved = []
+    if command in SPEC_COMMANDS and params not in ('-l', language_pack[current_language]['run_versions_first']):
         try:
-            with open(AVAILABLE_VERSIONS_FILE, 'r', encoding='utf-8') as f:
-                versions = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+            resolved = engine.resolve_params(command, params)[1]
         except Exception as e:
-            print(f"Error loading available versions: {e}")
-    return versions
+            print(f"Error resolving version spec: {e}")
+    no_match = language_pack[current_language]['spec_no_match']
+    text = '  '.join(f"{spec} → {version or no_match}" for spec, version in resolved if version != spec)
+    spec_preview_label.config(text=text)
+    # 重新pack使预览始终显示在参数组件之后
+    spec_preview_label.pack_forget()
+    if text:
+        spec_preview_label.pack(side=LEFT, padx=(10, 0))
+
+params_var.trace_add('write', update_spec_preview)
 
 # 加载已安装版本的函数
 def load_installed_versions():
-    versions = []
-    if os.path.exists(INSTALLED_VERSIONS_FILE):
-        try:
-            with open(INSTALLED_VERSIONS_FILE, 'r', encoding='utf-8') as f:
-                versions = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
-        except Exception as e:
-            print(f"Error loading installed versions: {e}")
-    return versions
+    try:
+        return engine.installed_versions(refresh=False)
+    except Exception as e:
+        print(f"Error loading installed versions: {e}")
+        return []
 
 # 更新已安装版本文件
 def update_installed_versions_file(versions):
     try:
-        with open(INSTALLED_VERSIONS_FILE, 'w', encoding='utf-8') as f:
-            f.write("# Installed Python versions cache\n")
-            for version in versions:
-                f.write(f"{version}\n")
+        engine.save_installed_versions(versions)
         return True
     except Exception as e:
         print(f"Error writing installed versions: {e}")
@@ -773,6 +1195,17 @@ def update_global_params_combobox():
         # 不设置默认值，让用户选择
         params_var.set('')
 
+# install -l 执行期间把新解析出的版本追加到参数下拉框（UI线程调用）；用户正在输入搜索内容时不打断
+def extend_install_options(versions):
+    if get_command_name(command_var.get()) != 'install' or params_var.get() not in ('', '-l'):
+        return
+    options = [option for option in params_combobox['values'] if option != language_pack[current_language]['run_l_first']]
+    if not options:
+        options = ['-l']
+    known = set(options)
+    options.extend(version for version in versions if version not in known)
+    params_combobox['values'] = options
+
 # 更新install参数下拉框
 def update_install_params_combobox():
     # 清除现有的值
@@ -810,11 +1243,17 @@ def toggle_params_widget(event=None):
         # 隐藏输入框，显示下拉框
         params_entry.pack_forget()
         params_combobox.pack(side=LEFT)
+        view_label.pack(side=LEFT, padx=(10, 5), after=params_combobox)
+        view_combobox.pack(side=LEFT, after=view_label)
         params_combobox['state'] = 'normal'  # 设置为可编辑以支持搜索
         # 更新下拉框内容
         update_install_params_combobox()
+        # 缓存过期时在后台刷新，不影响当前的选择
+        refresh_catalogue_if_stale()
     elif selected_command == 'global' or selected_command == 'uninstall':
         # 隐藏输入框，显示下拉框
+        view_label.pack_forget()
+        view_combobox.pack_forget()
         params_entry.pack_forget()
         params_combobox.pack(side=LEFT)
         # 状态将在update_global_params_combobox中根据是否有已安装版本设置
@@ -823,46 +1262,285 @@ def toggle_params_widget(event=None):
     else:
         # 隐藏下拉框，显示输入框
         params_combobox.pack_forget()
+        view_label.pack_forget()
+        view_combobox.pack_forget()
         params_entry.pack(side=LEFT)
         params_entry['state'] = 'normal'
 
 # 绑定命令选择变更事件
 command_menu.bind('<<ComboboxSelected>>', toggle_params_widget)
 
-# 处理install -l命令的结果
-def handle_install_list(output_lines):
-    versions = []
-    # 过滤掉以::开头的信息行，只保留版本信息
-    for line in output_lines:
-        line = line.strip()
-        # 跳过空行和以::开头的行
-        if line and not line.startswith('::'):
-            versions.append(line)
-    
-    # 将版本信息写入文件
+# 打开批量安装窗口：选择多个版本，按并行数量调度下载和安装
+def show_batch_install():
+    texts = language_pack[current_language]
+    batch_window = ttk.Toplevel(root)
+    batch_window.title(texts['batch_install_title'])
+    batch_window.geometry("640x480")
+
+    # 可用版本列表（支持多选）
+    versions_frame = ttk.Frame(batch_window)
+    versions_frame.pack(side=LEFT, fill=Y, padx=10, pady=10)
+    ttk.Label(versions_frame, text=texts['batch_select_versions']).pack(anchor=W)
+    # 版本视图，默认与安装下拉框相同
+    batch_view_var = ttk.StringVar(value=texts['version_views'][version_view])
+    batch_view_combobox = ttk.Combobox(versions_frame, textvariable=batch_view_var, values=version_view_labels(),
+                                       state='readonly')
+    batch_view_combobox.pack(anchor=W, fill=X, pady=(2, 5))
+    versions_listbox = ttk.Treeview(versions_frame, show='tree', selectmode='extended', height=18)
+    versions_scrollbar = ttk.Scrollbar(versions_frame, command=versions_listbox.yview, bootstyle=SECONDARY)
+    versions_listbox['yscrollcommand'] = versions_scrollbar.set
+    versions_scrollbar.pack(side=RIGHT, fill=Y)
+    versions_listbox.pack(side=LEFT, fill=Y)
+    available_versions = set()
+
+    # 按选中的视图填充版本列表
+    def fill_versions(event=None):
+        versions = load_available_versions(view_from_label(batch_view_var.get()))
+        available_versions.clear()
+        available_versions.update(versions)
+        versions_listbox.delete(*versions_listbox.get_children())
+        for version in versions:
+            versions_listbox.insert('', END, iid=version, text=version)
+        if not versions:
+            versions_listbox.insert('', END, text=texts['run_l_first'])
+
+    batch_view_combobox.bind('<<ComboboxSelected>>', fill_versions)
+    fill_versions()
+
+    # 右侧：并行数量、开始按钮和任务状态
+    jobs_frame = ttk.Frame(batch_window)
+    jobs_frame.pack(side=LEFT, fill=BOTH, expand=True, padx=(0, 10), pady=10)
+    options_frame = ttk.Frame(jobs_frame)
+    options_frame.pack(anchor=W, fill=X)
+    ttk.Label(options_frame, text=texts['batch_concurrency']).pack(side=LEFT, padx=(0, 5))
+    concurrency_var = ttk.IntVar(value=install_concurrency)
+    ttk.Spinbox(options_frame, from_=1, to=10, textvariable=concurrency_var, width=4).pack(side=LEFT)
+
+    jobs_tree = ttk.Treeview(jobs_frame, columns=('status', 'elapsed'), show='tree headings')
+    jobs_tree.heading('#0', text=texts['batch_version'])
+    jobs_tree.heading('status', text=texts['batch_status'])
+    jobs_tree.heading('elapsed', text=texts['batch_elapsed'])
+    jobs_tree.column('#0', width=140)
+    jobs_tree.column('status', width=110)
+    jobs_tree.column('elapsed', width=80, anchor=E)
+    total_label = ttk.Label(jobs_frame, text='')
+
+    scheduler_holder = {}
+
+    # 定时刷新任务状态和耗时，直到所有任务完成；窗口关闭后继续等待任务完成，只是不再更新列表
+    def refresh_jobs():
+        scheduler = scheduler_holder.get('scheduler')
+        if scheduler is None:
+            return
+        if jobs_tree.winfo_exists():
+            for job in scheduler.jobs:
+                jobs_tree.item(job.version, values=(texts['batch_states'][job.status], f"{job.elapsed:.1f}s"))
+            total_label.config(text=texts['batch_total'].format(seconds=scheduler.total_elapsed))
+        if scheduler.wait(0):
+            on_batch_finished(scheduler)
+        else:
+            root.after(500, refresh_jobs)
+
+    def on_job_update(job, line):
+        # 每个任务的输出带上版本号前缀写入输出区域
+        if line:
+            append_output(f"[{job.version}] {line}")
+
+    def start_batch():
+        global install_concurrency
+        selected = [version for version in versions_listbox.selection() if version in available_versions]
+        if not selected or 'scheduler' in scheduler_holder:
+            return
+        install_concurrency = max(1, concurrency_var.get())
+        save_config()
+        pyenv_fs = engine.filesystem()
+        scheduler = InstallScheduler(engine.run_install,
+                                     pyenv_root=pyenv_fs.root if pyenv_fs else None,
+                                     concurrency=install_concurrency,
+                                     on_update=on_job_update,
+                                     downloader=engine.installer_cache.materialize)
+        scheduler_holder['scheduler'] = scheduler
+        for version in selected:
+            jobs_tree.insert('', END, iid=version, text=version, values=(texts['batch_states']['queued'], '0.0s'))
+        start_button.config(state=DISABLED)
+        scheduler.schedule(selected)
+        refresh_jobs()
+
+    start_button = ttk.Button(options_frame, text=texts['batch_start'], command=start_batch, bootstyle=SUCCESS)
+    start_button.pack(side=LEFT, padx=(10, 0))
+    jobs_tree.pack(fill=BOTH, expand=True, pady=(10, 5))
+    total_label.pack(anchor=W)
+
+# 启动或停止安装程序缓存的本地镜像，并让之后的pyenv install通过它下载
+def set_installer_mirror(enabled):
+    global installer_mirror_enabled
+    installer_mirror_enabled = enabled
+    save_config()
+    if enabled:
+        try:
+            engine.install_env[MIRROR_ENV] = installer_mirror.start()
+        except OSError as e:
+            print(f"Error starting installer mirror: {e}")
+    else:
+        engine.install_env.pop(MIRROR_ENV, None)
+        installer_mirror.stop()
+
+# 安装下拉框选中版本时，在后台把它的安装程序下载到缓存
+def prefetch_selected_installer(event=None):
+    version = params_var.get().strip()
+    if not installer_prefetch or get_command_name(command_var.get()) != 'install' or not version or version.startswith('-'):
+        return
+    def prefetch():
+        try:
+            on_progress = progress_writer(append_output, prefix=f"{version}: ", overwrite=True)
+            if engine.prefetch_installer(version, on_progress):
+                append_output(language_pack[current_language]['installer_prefetched'].format(version=version) + "\n")
+        except Exception as e:
+            print(f"Error prefetching installer: {e}")
+    threading.Thread(target=prefetch, daemon=True).start()
+
+params_combobox.bind('<<ComboboxSelected>>', prefetch_selected_installer)
+
+# 显示安装程序缓存窗口：缓存的文件、总大小、预先下载和本地镜像开关
+def show_installer_cache():
+    texts = language_pack[current_language]
+    cache_window = ttk.Toplevel(root)
+    cache_window.title(texts['installer_cache_title'])
+    cache_window.geometry("560x360")
+
+    cache_tree = ttk.Treeview(cache_window, columns=('size', 'last_used'), show='tree headings', selectmode='browse')
+    cache_tree.heading('#0', text=texts['installer_cache_file'])
+    cache_tree.heading('size', text=texts['log_size'])
+    cache_tree.heading('last_used', text=texts['installer_cache_last_used'])
+    cache_tree.column('size', width=90, anchor=E)
+    cache_tree.column('last_used', width=140)
+    cache_tree.pack(fill=BOTH, expand=True, padx=10, pady=(10, 5))
+    total_label = ttk.Label(cache_window, text='')
+    total_label.pack(anchor=W, padx=10)
+
+    def refresh():
+        cache_tree.delete(*cache_tree.get_children())
+        total = 0
+        for entry in engine.installer_cache.entries():
+            total += entry['size']
+            cache_tree.insert('', END, iid=entry['sha256'], text=entry['filename'],
+                              values=(f"{entry['size'] / 1024 ** 2:.1f} MB",
+                                      time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))))
+        total_label.config(text=texts['installer_cache_total'].format(used=total / 1024 ** 2, limit=installer_cache_max_mb))
+
+    def on_prefetch_toggle():
+        global installer_prefetch
+        installer_prefetch = prefetch_var.get()
+        save_config()
+
+    def on_mirror_toggle():
+        set_installer_mirror(mirror_var.get())
+        mirror_label.config(text=installer_mirror.url or '')
+
+    def clear():
+        engine.installer_cache.clear()
+        refresh()
+
+    prefetch_var = ttk.BooleanVar(value=installer_prefetch)
+    mirror_var = ttk.BooleanVar(value=installer_mirror.running)
+    ttk.Checkbutton(cache_window, text=texts['installer_prefetch'], variable=prefetch_var, command=on_prefetch_toggle).pack(anchor=W, padx=10, pady=(5, 0))
+    mirror_frame = ttk.Frame(cache_window)
+    mirror_frame.pack(fill=X, padx=10, pady=(5, 0))
+    ttk.Checkbutton(mirror_frame, text=texts['installer_mirror'], variable=mirror_var, command=on_mirror_toggle).pack(side=LEFT)
+    mirror_label = ttk.Label(mirror_frame, text=installer_mirror.url or '', bootstyle=SECONDARY)
+    mirror_label.pack(side=LEFT, padx=(10, 0))
+    ttk.Button(cache_window, text=texts['diag_clear'], command=clear, bootstyle=WARNING).pack(anchor=W, padx=10, pady=10)
+    refresh()
+
+# 批量安装完成后更新已安装版本缓存并输出汇总
+def on_batch_finished(scheduler):
+    scheduler.shutdown()
+    failed = [job.version for job in scheduler.jobs if job.status != 'done']
+    append_output(f"\n{language_pack[current_language]['batch_total'].format(seconds=scheduler.total_elapsed)}\n")
+    if failed:
+        append_output(f"{language_pack[current_language]['batch_failed']} {', '.join(failed)}\n")
+    # 在后台更新已安装版本缓存（无法直接读取PYENV_ROOT时需要执行pyenv versions）
+    def refresh_installed():
+        try:
+            engine.installed_versions(refresh=True)
+        except Exception as e:
+            print(f"Error refreshing installed versions: {e}")
+    threading.Thread(target=refresh_installed, daemon=True).start()
+
+# 处理install -l命令解析出的版本
+def handle_install_list(versions, fetch_seconds=None):
+    # 将版本信息连同获取时间、耗时和pyenv版本写入缓存文件
     try:
-        with open(AVAILABLE_VERSIONS_FILE, 'w', encoding='utf-8') as f:
-            f.write("# Available Python versions cache\n")
-            for version in versions:
-                f.write(f"{version}\n")
-        # 更新下拉框
-        update_install_params_combobox()
+        engine.save_available_versions(versions, fetch_seconds, app_state.get('local_version'))
+        # 在UI线程中更新下拉框
+        root.after(0, update_install_params_combobox)
         return True
     except Exception as e:
         print(f"Error writing available versions: {e}")
         return False
 
+# 可用版本缓存过期时在后台刷新
+def refresh_catalogue_if_stale():
+    # 未安装pyenv时无法刷新
+    local_version = app_state.get('local_version')
+    if not local_version or not available_versions_cache.is_stale():
+        return
+    available_versions_cache.refresh_in_background(
+        engine.fetch_available_versions,
+        on_complete=lambda index: root.after(0, on_catalogue_refreshed),
+        pyenv_version=local_version)
+
+# 后台刷新完成后更新下拉框选项，但不修改用户当前输入的内容
+def on_catalogue_refreshed():
+    if get_command_name(command_var.get()) == 'install':
+        params_combobox['values'] = ['-l'] + load_available_versions()
+    append_output(f"{language_pack[current_language]['catalogue_refreshed']}\n")
+
+# 运行按钮所在的一行：运行、批量安装、取消任务、关闭标签页和超时设置
+run_frame = ttk.Frame(root)
+run_frame.grid(row=4, column=0, sticky='w', pady=(0, 5), padx=(10, 0))
+
 # Create the Run Command button with ttkbootstrap style
-run_button = ttk.Button(root, text=language_pack[current_language]['run_button'], command=run_command, bootstyle=PRIMARY)
-run_button.grid(row=4, column=0, sticky='w', pady=(0, 5), padx=(10, 0))  # Place the button in the grid
+run_button = ttk.Button(run_frame, text=language_pack[current_language]['run_button'], command=run_command, bootstyle=PRIMARY)
+run_button.pack(side=LEFT, padx=(0, 5))
+
+# 批量安装按钮
+batch_button = ttk.Button(run_frame, text=language_pack[current_language]['batch_install_button'], command=show_batch_install, bootstyle=SUCCESS)
+batch_button.pack(side=LEFT, padx=(0, 5))
+
+# 安装程序缓存按钮
+installer_cache_button = ttk.Button(run_frame, text=language_pack[current_language]['installer_cache_button'], command=show_installer_cache, bootstyle=SECONDARY)
+installer_cache_button.pack(side=LEFT, padx=(0, 5))
+
+# 取消当前标签页任务的按钮
+cancel_job_button = ttk.Button(run_frame, text=language_pack[current_language]['cancel_job_button'], command=cancel_selected_job, bootstyle=DANGER)
+cancel_job_button.pack(side=LEFT, padx=(0, 5))
+
+# 关闭当前标签页的按钮
+close_tab_button = ttk.Button(run_frame, text=language_pack[current_language]['close_tab_button'], command=close_selected_tab, bootstyle=SECONDARY)
+close_tab_button.pack(side=LEFT, padx=(0, 10))
+
+# 任务超时设置（秒，0表示不限制）
+timeout_label = ttk.Label(run_frame, text=language_pack[current_language]['job_timeout_label'])
+timeout_label.pack(side=LEFT, padx=(0, 5))
+timeout_var = ttk.StringVar(value=str(job_timeout_seconds))
+timeout_spinbox = ttk.Spinbox(run_frame, from_=0, to=86400, increment=30, textvariable=timeout_var, width=7)
+timeout_spinbox.pack(side=LEFT)
+
+# 输出区域：第一个标签页是控制台，每个命令任务有自己的标签页
+output_notebook = ttk.Notebook(root)
+output_notebook.grid(row=5, column=0, sticky='nsew', pady=5, padx=(10, 0))
+
+console_frame = ttk.Frame(output_notebook)
+output_notebook.add(console_frame, text=language_pack[current_language]['console_tab'])
 
 # Create the output text box with ttkbootstrap style
-output_text = ttk.Text(root)
-output_text.grid(row=5, column=0, sticky='nsew', pady=5, padx=(10, 0))  # Place the text box in the grid
+output_text = ttk.Text(console_frame)
 
 # Create the scrollbar for the output text box with ttkbootstrap style
-scrollbar = ttk.Scrollbar(root, command=output_text.yview, bootstyle=SECONDARY)
-scrollbar.grid(row=5, column=1, sticky='ns', pady=5)  # Place the scrollbar in the grid
+scrollbar = ttk.Scrollbar(console_frame, command=output_text.yview, bootstyle=SECONDARY)
+scrollbar.pack(side=RIGHT, fill=Y)
+output_text.pack(side=LEFT, fill=BOTH, expand=True)
 
 # Link the scrollbar to the output text box
 output_text['yscrollcommand'] = scrollbar.set
@@ -875,5 +1553,82 @@ root.grid_columnconfigure(0, weight=1)
 clear_button = ttk.Button(root, text=language_pack[current_language]['clear_button'], command=clear_output, bootstyle=WARNING)
 clear_button.grid(row=6, column=0, sticky='w', pady=(5, 10), padx=(10, 0))  # Place the button in the grid
 
+# 会话日志按钮，用于查看历史输出
+logs_button = ttk.Button(root, text=language_pack[current_language]['session_logs_button'], command=show_session_logs, bootstyle=SECONDARY)
+logs_button.grid(row=6, column=0, sticky='w', pady=(5, 10), padx=(130, 0))
+
+# 诊断按钮，查看每条命令的计时
+diagnostics_button = ttk.Button(root, text=language_pack[current_language]['diagnostics_button'], command=show_diagnostics, bootstyle=SECONDARY)
+diagnostics_button.grid(row=6, column=0, sticky='w', pady=(5, 10), padx=(260, 0))
+
+# 输出统计信息标签（每秒行数和队列深度）
+output_stats_label = ttk.Label(root, text=language_pack[current_language]['output_stats'].format(lps=0, depth=0), font=("Arial", 9), bootstyle=SECONDARY)
+output_stats_label.grid(row=6, column=0, sticky='e', pady=(5, 10), padx=(0, 10))
+
+# 创建会话日志，完整的输出记录保存在配置文件旁的logs目录中
+session_log = SessionLog(LOGS_DIR)
+
+# 创建输出管道，所有线程的输出都通过它按固定节拍写入output_text
+output_pipeline = OutputPipeline(root, output_text, on_stats=update_output_stats,
+                                 max_lines=scrollback_lines, session_log=session_log)
+output_pipeline.start()
+
+# PYENV_ROOT中已安装版本目录和全局版本文件的监视器：在终端中安装、卸载或执行 pyenv global 后自动更新界面
+pyenv_watcher = None
+
+def start_pyenv_watcher():
+    global pyenv_watcher
+    # ctypes只在监视文件变化时用到，窗口显示后再导入
+    from fs_watcher import FileWatcher
+    try:
+        pyenv_watcher = FileWatcher(engine.watch_paths(), on_pyenv_files_changed)
+        pyenv_watcher.start()
+    except Exception as e:
+        print(f"Error starting the PYENV_ROOT watcher: {e}")
+
+# PYENV_ROOT变化平息后（在监视线程中调用）直接读取目录更新已安装版本缓存和全局版本，不执行pyenv
+def on_pyenv_files_changed():
+    result = engine.refresh_from_filesystem()
+    if result is None:
+        return
+    versions, global_versions = result
+    remember_global_version(' '.join(global_versions) or None)
+    root.after(0, refresh_installed_options)
+
+# 已安装版本变化后更新global/uninstall的下拉框，仍然存在的已选版本保持选中
+def refresh_installed_options():
+    if get_command_name(command_var.get()) not in ('global', 'uninstall'):
+        return
+    selected = params_var.get()
+    update_global_params_combobox()
+    if selected and selected in params_combobox['values']:
+        params_var.set(selected)
+
+# 关闭窗口时取消所有任务、写入剩余输出并关闭会话日志
+def on_close():
+    for job in list(job_manager.jobs.values()):
+        job.cancel()
+    for tab in job_tabs.values():
+        tab['pipeline'].stop()
+        tab['pipeline'].flush()
+    output_pipeline.stop()
+    output_pipeline.flush()
+    session_log.close()
+    installer_mirror.stop()
+    if pyenv_watcher is not None:
+        pyenv_watcher.stop()
+    config_store.close()
+    engine.close()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+
+# 窗口显示后检查可用版本缓存是否过期，并开始监视PYENV_ROOT
+root.after_idle(refresh_catalogue_if_stale)
+root.after_idle(start_pyenv_watcher)
+# 启用了本地镜像时在窗口显示后启动
+if installer_mirror_enabled:
+    root.after_idle(set_installer_mirror, True)
+
 # Start the main event loop
 root.mainloop()
@@ -0,0 +1,297 @@
+# pyenv-win GUI 的命令行入口：不启动界面，使用与GUI相同的缓存和常驻Shell进程池，便于脚本批量调用
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+from fs_watcher import FileWatcher, DEFAULT_POLL_INTERVAL
+from install_scheduler import InstallScheduler, DEFAULT_CONCURRENCY, PYTHON_FTP_URL
+from installer_cache import InstallerMirror, MIRROR_ENV
+from pyenv_engine import PyenvEngine, DEFAULT_PYENV
+from pyenv_installer import PyenvInstaller, InstallerError
+from segmented_download import DEFAULT_SEGMENTS, progress_writer
+from stream_reader import iter_lines
+from version_index import VIEWS
+
+
+def emit(args, data, text):
+    # --json 时输出一行JSON，否则输出文本
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False), file=args.output, flush=True)
+    elif text is not None:
+        print(text, file=args.output, flush=True)
+
+
+def command_status(engine, args):
+    pyenv_version = engine.pyenv_version()
+    global_versions = engine.global_versions() if pyenv_version else []
+    latest = engine.latest_release(force=args.force)
+    emit(args, {'pyenv_version': pyenv_version, 'global_versions': global_versions, 'latest_release': latest},
+         f"pyenv: {pyenv_version or 'not installed'}\n"
+         f"global: {' '.join(global_versions) or '-'}\n"
+         f"latest: {latest or '-'}")
+    return 0 if pyenv_version else 1
+
+
+def command_installed(engine, args):
+    versions = engine.installed_versions(refresh=not args.cached)
+    emit(args, {'versions': versions}, '\n'.join(versions))
+    return 0
+
+
+def command_available(engine, args):
+    refresh = True if args.refresh else (False if args.offline else None)
+    versions = engine.available_versions(refresh=refresh)
+    if args.search:
+        versions = engine.search_available(args.search, args.limit, args.view)
+    elif args.view:
+        versions = engine.catalogue.get().view(args.view)
+    if args.limit:
+        versions = versions[:args.limit]
+    metadata = engine.catalogue.metadata
+    emit(args, {'versions': versions, 'fetched_at': metadata.get('fetched_at'),
+                'pyenv_version': metadata.get('pyenv_version')}, '\n'.join(versions))
+    return 0
+
+
+def command_latest(engine, args):
+    latest = engine.latest_release(force=args.force)
+    emit(args, {'latest_release': latest}, latest or '-')
+    return 0 if latest else 1
+
+
+def command_run(engine, args):
+    command, params = args.pyenv_args[0], ' '.join(args.pyenv_args[1:])
+    output = engine.query_filesystem(command, params)
+    if output is not None:
+        # 只读查询直接读取PYENV_ROOT
+        for line in output.splitlines():
+            emit(args, {'event': 'output', 'text': line}, line)
+        exit_code = 0
+    else:
+        stream = iter_lines(engine.stream(command, params))
+        while True:
+            try:
+                line = next(stream)
+            except StopIteration as stop:
+                exit_code = stop.value
+                break
+            emit(args, {'event': 'output', 'text': line.rstrip('\r\n')}, line.rstrip('\r\n'))
+    emit(args, {'event': 'exit', 'exit_code': exit_code}, None)
+    return exit_code or 0
+
+
+def command_resolve(engine, args):
+    command = 'global' if args.installed else 'install'
+    params, resolved = engine.resolve_params(command, ' '.join(args.specs))
+    for spec, version in resolved:
+        emit(args, {'spec': spec, 'version': version}, f"{spec} -> {version or '-'}")
+    return 0 if all(version for spec, version in resolved) else 1
+
+
+def command_install(engine, args):
+    pyenv_fs = engine.filesystem()
+    # 版本说明（例如 3.11、latest-stable-amd64）按可用版本解析为具体版本
+    params, resolved = engine.resolve_params('install', ' '.join(args.versions))
+    for spec, version in resolved:
+        if version is None:
+            emit(args, {'event': 'error', 'spec': spec, 'error': 'no matching version'}, f"No version matches {spec}")
+            return 1
+        emit(args, {'event': 'resolved', 'spec': spec, 'version': version}, f"{spec} -> {version}")
+
+    def on_update(job, line):
+        if line is not None:
+            emit(args, {'event': 'output', 'version': job.version, 'text': line.rstrip('\r\n')},
+                 f"[{job.version}] {line.rstrip()}")
+        else:
+            emit(args, {'event': 'status', 'version': job.version, 'status': job.status},
+                 f"[{job.version}] {job.status}")
+
+    scheduler = InstallScheduler(engine.run_install, pyenv_root=pyenv_fs.root if pyenv_fs else None,
+                                 concurrency=args.concurrency, on_update=on_update,
+                                 downloader=engine.installer_cache.materialize)
+    try:
+        scheduler.schedule(params.split())
+        scheduler.wait()
+    finally:
+        scheduler.shutdown()
+    failed = [job.version for job in scheduler.jobs if job.status != 'done']
+    engine.installed_versions(refresh=True)
+    emit(args, {'event': 'summary', 'seconds': round(scheduler.total_elapsed, 3), 'failed': failed},
+         f"Finished in {scheduler.total_elapsed:.1f}s" + (f", failed: {', '.join(failed)}" if failed else ''))
+    return 1 if failed else 0
+
+
+def command_setup(engine, args):
+    uninstall = args.action == 'uninstall'
+    # install 在已安装时跳过；update 总是执行安装脚本（脚本自己判断是否需要更新）
+    installed_version = engine.pyenv_version() if args.action == 'install' and not args.force else None
+    if installed_version:
+        emit(args, {'event': 'summary', 'pyenv_version': installed_version, 'skipped': True},
+             'pyenv is already installed.')
+        return 0
+    installer = PyenvInstaller(engine, expected_sha256=args.sha256, downloader=engine.installer_cache.downloader)
+    try:
+        exit_code = installer.run_script(uninstall, on_output=lambda text: emit(
+            args, {'event': 'output', 'text': text}, text.rstrip('\r\n')))
+    except InstallerError as e:
+        emit(args, {'event': 'error', 'error': str(e)}, str(e))
+        return 1
+    version = None if uninstall else installer.wait_until_ready()
+    emit(args, {'event': 'summary', 'exit_code': exit_code, 'pyenv_version': version},
+         f"exit code {exit_code}" + (f", pyenv {version}" if version else ''))
+    return exit_code or (0 if uninstall or version else 1)
+
+
+def command_installers(engine, args):
+    cache = engine.installer_cache
+    if args.max_mb is not None:
+        cache.max_bytes = args.max_mb * 1024 ** 2
+    if args.clear:
+        cache.clear()
+    failed = []
+    for version in args.prefetch or []:
+        # 文本模式下在标准错误上显示下载进度
+        on_progress = None if args.json else progress_writer(
+            lambda line: print(line, end='', file=sys.__stderr__, flush=True), prefix=f"{version}: ", overwrite=True)
+        try:
+            path = engine.prefetch_installer(version, on_progress)
+        except Exception as e:
+            path = None
+            emit(args, {'event': 'error', 'version': version, 'error': str(e)}, f"[{version}] {e}")
+        if path is None:
+            failed.append(version)
+    if args.max_mb is not None:
+        cache.evict()
+    entries = cache.entries()
+    emit(args, {'installers': entries, 'total_bytes': sum(entry['size'] for entry in entries)},
+         '\n'.join(f"{entry['filename']}  {entry['size'] / 1024 ** 2:.1f} MB  {entry['sha256'][:12]}" for entry in entries))
+    return 1 if failed else 0
+
+
+def command_mirror(engine, args):
+    mirror = InstallerMirror(engine.installer_cache, upstream=args.upstream, host=args.host, port=args.port)
+    url = mirror.start()
+    emit(args, {'event': 'listening', 'url': url}, f"Serving the installer cache at {url}\nSet {MIRROR_ENV}={url} for pyenv install")
+    try:
+        # 前台运行直到 Ctrl+C
+        mirror.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mirror.stop()
+    return 0
+
+
+def command_watch(engine, args):
+    def on_change():
+        result = engine.refresh_from_filesystem()
+        if result is not None:
+            versions, global_versions = result
+            emit(args, {'event': 'changed', 'versions': versions, 'global_versions': global_versions},
+                 f"installed: {' '.join(versions) or '-'}\nglobal: {' '.join(global_versions) or '-'}")
+
+    watcher = FileWatcher(engine.watch_paths(), on_change, poll_interval=args.poll_interval, native=not args.poll)
+    backend = watcher.start()
+    emit(args, {'event': 'watching', 'paths': watcher.paths, 'backend': backend},
+         f"Watching {', '.join(watcher.paths)} ({backend})")
+    try:
+        # 前台运行直到 Ctrl+C
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Headless pyenv-win GUI engine.')
+    parser.add_argument('--json', action='store_true', help='print JSON (one object per line) instead of text')
+    parser.add_argument('--pyenv', default=DEFAULT_PYENV, help='pyenv executable name or path')
+    parser.add_argument('--data-dir', help='directory of the cache files (defaults to the GUI directory)')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS,
+                        help='parallel Range segments per download (1 = a single connection)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    status = subparsers.add_parser('status', help='pyenv version, global versions and latest pyenv-win release')
+    status.add_argument('--force', action='store_true', help='check GitHub even within the check interval')
+    status.set_defaults(handler=command_status)
+
+    installed = subparsers.add_parser('installed', help='list installed Python versions')
+    installed.add_argument('--cached', action='store_true', help='read the cache file only')
+    installed.set_defaults(handler=command_installed)
+
+    available = subparsers.add_parser('available', help='list installable Python versions')
+    group = available.add_mutually_exclusive_group()
+    group.add_argument('--refresh', action='store_true', help='always run install -l')
+    group.add_argument('--offline', action='store_true', help='never run install -l, use the cache only')
+    available.add_argument('--search', help='search text (prefix, substring or fuzzy)')
+    available.add_argument('--limit', type=int, help='maximum number of versions')
+    available.add_argument('--view', choices=VIEWS,
+                           help='newest first, filtered: stable only, latest patch per minor or one architecture')
+    available.set_defaults(handler=command_available)
+
+    latest = subparsers.add_parser('latest', help='latest pyenv-win release')
+    latest.add_argument('--force', action='store_true', help='check GitHub even within the check interval')
+    latest.set_defaults(handler=command_latest)
+
+    run = subparsers.add_parser('run', help='run any pyenv command and stream its output')
+    run.add_argument('pyenv_args', nargs=argparse.REMAINDER, help='pyenv command and arguments')
+    run.set_defaults(handler=command_run)
+
+    resolve = subparsers.add_parser('resolve', help='resolve version specs such as 3.11, ">=3.10,<3.12" or latest-stable-amd64')
+    resolve.add_argument('specs', nargs='+')
+    resolve.add_argument('--installed', action='store_true', help='resolve against installed versions instead of available ones')
+    resolve.set_defaults(handler=command_resolve)
+
+    install = subparsers.add_parser('install', help='install several versions, overlapping downloads with installs')
+    install.add_argument('versions', nargs='+', help='versions or version specs')
+    install.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='parallel downloads')
+    install.set_defaults(handler=command_install)
+
+    installers = subparsers.add_parser('installers', help='list, prefetch or clear cached Python installers')
+    installers.add_argument('--prefetch', nargs='+', metavar='VERSION', help='download these installers into the cache')
+    installers.add_argument('--clear', action='store_true', help='remove every cached installer')
+    installers.add_argument('--max-mb', type=int, help='cache size limit in MB (least recently used files are evicted)')
+    installers.set_defaults(handler=command_installers)
+
+    mirror = subparsers.add_parser('mirror', help=f'serve the installer cache over HTTP for {MIRROR_ENV}')
+    mirror.add_argument('--host', default='127.0.0.1', help='address to listen on (0.0.0.0 to share it with other machines)')
+    mirror.add_argument('--port', type=int, default=8765)
+    mirror.add_argument('--upstream', default=PYTHON_FTP_URL, help='where to download installers that are not cached')
+    mirror.set_defaults(handler=command_mirror)
+
+    watch = subparsers.add_parser('watch', help='update the installed-versions cache whenever PYENV_ROOT changes')
+    watch.add_argument('--poll', action='store_true', help='compare modification times instead of using change notifications')
+    watch.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL, help='seconds between polls')
+    watch.set_defaults(handler=command_watch)
+
+    setup = subparsers.add_parser('pyenv-win', help='install, update or uninstall pyenv-win itself')
+    setup.add_argument('action', choices=('install', 'update', 'uninstall'))
+    setup.add_argument('--force', action='store_true', help='run the install script even if pyenv is installed')
+    setup.add_argument('--sha256', help='only run an install script with this SHA-256')
+    setup.set_defaults(handler=command_setup)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'run' and not args.pyenv_args:
+        parser.error('run needs a pyenv command')
+    engine = PyenvEngine(args.data_dir, pyenv=args.pyenv)
+    engine.installer_cache.downloader.segments = max(1, args.segments)
+    # 结果写到标准输出，其他模块打印的错误信息转到标准错误，保证 --json 的输出可以直接解析
+    args.output = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            return args.handler(engine, args)
+    finally:
+        engine.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,410 @@
+# 不依赖界面的pyenv引擎：版本查询、输出解析、缓存文件和命令执行，GUI和命令行工具共用
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+
+from atomic_file import atomic_write
+from catalogue_cache import CatalogueCache, DEFAULT_TTL_HOURS
+from install_scheduler import default_installer, read_versions_db
+from installer_cache import InstallerCache
+from pyenv_fs import PyenvFilesystem, UnrecognizedLayout, path_signature
+from release_checker import ReleaseChecker, DEFAULT_MIN_INTERVAL_HOURS
+from shell_host import ShellPool
+from stream_reader import iter_lines
+from version_index import VersionIndex, VersionIndexCache
+from version_model import sort_versions
+from version_spec import SpecError, parse_spec, split_spec_args
+
+# 默认的pyenv可执行文件，可以配置为完整路径
+DEFAULT_PYENV = 'pyenv'
+# 参数中可以使用版本说明（例如 3.11、>=3.10,<3.12、latest-stable-amd64）的命令
+SPEC_COMMANDS = ('install', 'global', 'local', 'uninstall')
+# 数据目录中的缓存文件（GUI和命令行工具共用）
+AVAILABLE_VERSIONS_FILENAME = 'available_versions.txt'
+INSTALLED_VERSIONS_FILENAME = 'installed_versions.txt'
+RELEASE_CACHE_FILENAME = 'release_cache.json'
+INSTALLER_CACHE_DIRNAME = 'installer_cache'
+# 匹配类似 "pyenv 3.1.1" 的输出
+PYENV_VERSION_PATTERN = re.compile(r'pyenv\s+([0-9.]+)')
+# 输出中表示错误的关键字
+ERROR_MARKERS = ('error', '错误', 'failed')
+# 版本号：数字开头、至少一个点，可带预发布标识和架构后缀，例如 3.13.0rc1-arm64
+VERSION_TOKEN_PATTERN = re.compile(r'^\d+(?:\.[0-9A-Za-z]+)+(?:-[0-9A-Za-z]+)*$')
+
+# install -l / versions 输出中一行的类型
+LINE_BLANK = 'blank'
+LINE_BANNER = 'banner'
+LINE_VERSION = 'version'
+LINE_ERROR = 'error'
+LINE_OTHER = 'other'
+# 一行输出的解析结果；current表示 pyenv versions 中以*标记的当前版本
+ParsedLine = namedtuple('ParsedLine', ['kind', 'version', 'current'])
+
+# 一条pyenv命令的执行结果；source为 'filesystem'（直接读取PYENV_ROOT）或 'shell'
+CommandResult = namedtuple('CommandResult', ['command', 'exit_code', 'output', 'source'])
+
+
+def default_data_dir():
+    """缓存文件所在目录：打包后为exe所在目录，否则为程序文件所在目录"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_pyenv_version(output):
+    """从 pyenv --version 的输出中提取版本号，无法识别时返回None"""
+    match = PYENV_VERSION_PATTERN.search(output.strip())
+    return match.group(1) if match else None
+
+
+def classify_line(line):
+    """判断一行输出的类型：空行、以::开头的信息行、错误信息、版本号（可带*标记和说明）或其他"""
+    text = line.strip()
+    if not text:
+        return ParsedLine(LINE_BLANK, None, False)
+    if text.startswith('::'):
+        return ParsedLine(LINE_BANNER, None, False)
+    lower = text.lower()
+    if any(marker in lower for marker in ERROR_MARKERS):
+        return ParsedLine(LINE_ERROR, None, False)
+    current = text.startswith('*')
+    if current:
+        text = text[1:].lstrip()
+    # 版本号是行的第一个部分，后面可能是 "(set by ...)" 之类的说明
+    token = text.split(None, 1)[0] if text else ''
+    if VERSION_TOKEN_PATTERN.match(token):
+        return ParsedLine(LINE_VERSION, token, current)
+    return ParsedLine(LINE_OTHER, None, False)
+
+
+def iter_version_lines(lines):
+    """逐行解析 install -l 或 pyenv versions 的输出并产出版本号（去掉当前版本的*标记），
+    跳过空行、以::开头的信息行和错误信息；lines可以是正在读取的输出，不保存已处理的行"""
+    for line in lines:
+        parsed = classify_line(line)
+        if parsed.kind == LINE_VERSION:
+            yield parsed.version
+
+
+def parse_install_list(lines):
+    """从 install -l 的输出中提取版本列表"""
+    return list(iter_version_lines(lines))
+
+
+def parse_versions_output(lines):
+    """从 pyenv versions 的输出中提取已安装的版本"""
+    return list(iter_version_lines(lines))
+
+
+def read_list_file(path):
+    """读取每行一个值的缓存文件，忽略空行和以#开头的注释行；文件不存在时返回空列表"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    except FileNotFoundError:
+        return []
+
+
+def write_list_file(path, header, values):
+    """写入每行一个值的缓存文件（先写临时文件再替换）"""
+    with atomic_write(path) as f:
+        f.write(f"# {header}\n")
+        for value in values:
+            f.write(f"{value}\n")
+
+
+class PyenvEngine:
+    """pyenv操作的统一入口，不依赖任何界面组件。
+
+    - 只读的版本查询优先直接读取PYENV_ROOT，无法回答时才执行pyenv命令
+    - 命令在常驻Shell进程池中执行，stream() 产出输出文本片段，run() 返回 CommandResult
+    - 可用版本、已安装版本和最新发布版本的缓存文件保存在 data_dir 中
+    pyenv 为pyenv可执行文件的名称或完整路径。
+    """
+
+    def __init__(self, data_dir=None, pyenv=DEFAULT_PYENV, pool=None, pool_size=4, env=None,
+                 catalogue_ttl_hours=DEFAULT_TTL_HOURS):
+        self.data_dir = data_dir or default_data_dir()
+        self.pyenv = pyenv or DEFAULT_PYENV
+        self.env = env
+        self.pool = pool if pool is not None else ShellPool(size=pool_size, env=env)
+        self.available_versions_file = os.path.join(self.data_dir, AVAILABLE_VERSIONS_FILENAME)
+        self.installed_versions_file = os.path.join(self.data_dir, INSTALLED_VERSIONS_FILENAME)
+        self.release_cache_file = os.path.join(self.data_dir, RELEASE_CACHE_FILENAME)
+        self.catalogue = CatalogueCache(self.available_versions_file, catalogue_ttl_hours)
+        # 已安装版本的索引，用于解析 global/local/uninstall 的版本说明：优先按 PYENV_ROOT/versions 建立
+        # （(目录, 目录签名), 索引) 在目录变化时整体替换），无法识别目录结构时使用缓存文件
+        self._installed_fs_state = (None, None)
+        self.installed_index = VersionIndexCache(self.installed_versions_file)
+        # Python安装程序缓存（内容寻址，可作为本地镜像）
+        self.installer_cache = InstallerCache(os.path.join(self.data_dir, INSTALLER_CACHE_DIRNAME))
+        # 执行 install 命令时额外设置的环境变量，例如指向本地镜像的 PYTHON_BUILD_MIRROR_URL
+        self.install_env = {}
+
+    # ---- 命令执行 ----
+
+    def command_line(self, command, params=''):
+        """返回在Shell中执行的完整命令行"""
+        executable = self.pool.dialect.quote_executable(self.pyenv)
+        command_line = ' '.join(part for part in (executable, command, params.strip()) if part)
+        if command == 'install' and self.install_env:
+            return self.pool.dialect.with_env(command_line, dict(self.install_env))
+        return command_line
+
+    def stream(self, command, params=''):
+        """执行pyenv命令并产出输出文本片段（不一定按行拆分），生成器的返回值为退出码"""
+        return (yield from self.pool.stream(self.command_line(command, params)))
+
+    def run(self, command, params='', use_filesystem=True):
+        """执行pyenv命令并返回CommandResult；只读的版本查询优先直接读取PYENV_ROOT"""
+        if use_filesystem:
+            output = self.query_filesystem(command, params)
+            if output is not None:
+                return CommandResult(f"{command} {params}".strip(), 0, output, 'filesystem')
+        command_line = self.command_line(command, params)
+        result = self.pool.run(command_line)
+        return CommandResult(command_line, result.exit_code, result.output, 'shell')
+
+    def run_install(self, version, on_line):
+        """执行一次 pyenv install，逐行回调输出，返回退出码（供InstallScheduler使用）"""
+        with self.pool.host() as host:
+            for line in iter_lines(host.stream(self.command_line('install', version))):
+                on_line(line)
+            exit_code = host.last_exit_code
+        if exit_code == 0:
+            try:
+                self.capture_installer(version)
+            except Exception as e:
+                print(f"Error caching installer: {e}")
+        return exit_code
+
+    def installer_source(self, version):
+        """返回版本对应的安装程序 (下载地址, 文件名)：优先使用pyenv-win的版本数据库，否则按python.org的规则推算"""
+        pyenv_fs = self.filesystem()
+        installers = read_versions_db(pyenv_fs.root) if pyenv_fs else {}
+        return installers.get(version) or default_installer(version)
+
+    def _install_cache_path(self, filename):
+        # pyenv-win安装前会先查找 PYENV_ROOT/install_cache 中的安装程序
+        pyenv_fs = self.filesystem()
+        if pyenv_fs is None or not filename:
+            return None
+        return os.path.join(pyenv_fs.root, 'install_cache', filename)
+
+    def prefetch_installer(self, version, on_progress=None):
+        """把版本的安装程序下载到安装程序缓存，返回缓存文件路径；无法推算地址时返回None"""
+        url, _ = self.installer_source(version)
+        if not url:
+            return None
+        return self.installer_cache.fetch(url, on_progress)
+
+    def stage_installer(self, version):
+        """安装前把已缓存的安装程序放到pyenv的install_cache中（不下载），返回目标路径；未缓存时返回None"""
+        url, filename = self.installer_source(version)
+        destination = self._install_cache_path(filename)
+        if not url or destination is None or self.installer_cache.lookup(url) is None:
+            return None
+        if not os.path.exists(destination):
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            self.installer_cache.materialize(url, destination)
+        return destination
+
+    def capture_installer(self, version):
+        """安装后把pyenv自己下载的安装程序加入缓存，返回缓存文件路径"""
+        url, filename = self.installer_source(version)
+        source = self._install_cache_path(filename)
+        if not url or source is None or not os.path.exists(source):
+            return None
+        return self.installer_cache.lookup(url) or self.installer_cache.add_file(source, url)
+
+    def close(self):
+        self.pool.close()
+        self.installer_cache.flush()
+
+    # ---- 版本查询 ----
+
+    def filesystem(self):
+        """返回PYENV_ROOT文件系统查询对象，目录结构无法识别时返回None"""
+        pyenv_fs = PyenvFilesystem.discover(self.env)
+        if pyenv_fs.is_recognized():
+            return pyenv_fs
+        return None
+
+    def query_filesystem(self, command, params='', cwd=None):
+        """直接从PYENV_ROOT回答只读的版本查询命令，返回输出文本；无法回答时返回None"""
+        pyenv_fs = self.filesystem()
+        if pyenv_fs is None or params.strip():
+            return None
+        try:
+            if command == 'versions':
+                return pyenv_fs.format_versions(cwd)
+            if command == 'global':
+                versions = pyenv_fs.global_versions()
+            elif command in ('version-name', 'vname'):
+                versions, origin = pyenv_fs.version_name(cwd)
+            elif command == 'local':
+                versions, path = pyenv_fs.local_version(cwd)
+            else:
+                return None
+        except (UnrecognizedLayout, OSError):
+            return None
+        return ''.join(f"{version}\n" for version in versions) if versions else None
+
+    def pyenv_version(self):
+        """返回pyenv-win的版本号，未安装时返回None"""
+        result = self.pool.run(self.command_line('--version'))
+        if result.exit_code != 0:
+            return None
+        return parse_pyenv_version(result.output)
+
+    def global_versions(self):
+        """返回全局Python版本列表，未设置时返回空列表"""
+        pyenv_fs = self.filesystem()
+        if pyenv_fs is not None:
+            try:
+                versions = pyenv_fs.global_versions()
+                if versions:
+                    return versions
+            except (UnrecognizedLayout, OSError):
+                pass
+        result = self.pool.run(self.command_line('global'))
+        output = result.output.strip()
+        if result.exit_code != 0 or not output or output.startswith(('Error', '错误')):
+            return []
+        return output.split()
+
+    def installed_versions(self, refresh=True):
+        """返回已安装的版本列表；refresh为True时重新查询并更新缓存文件，否则读取缓存文件"""
+        if not refresh:
+            return read_list_file(self.installed_versions_file)
+        versions = None
+        pyenv_fs = self.filesystem()
+        if pyenv_fs is not None:
+            try:
+                versions = pyenv_fs.versions()
+            except (UnrecognizedLayout, OSError):
+                versions = None
+        if versions is None:
+            versions = self.stream_versions('versions')
+        versions = sort_versions(versions)
+        self.save_installed_versions(versions)
+        return versions
+
+    def probe_fingerprint(self, name):
+        """版本检测结果所依赖文件的指纹（几次stat，可以保存为JSON）：
+        'local'（pyenv版本）取决于pyenv可执行文件、pyenv-win的 .version 文件和 shims 目录，
+        'global'（全局Python版本）取决于 PYENV_ROOT/version 文件。
+        """
+        pyenv_fs = PyenvFilesystem.discover(self.env)
+        if name == 'global':
+            paths = [pyenv_fs.global_version_file]
+        else:
+            paths = pyenv_fs.release_files + [pyenv_fs.shims_dir]
+        return [self.pyenv, pyenv_fs.root] + [list(signature) if signature else None
+                                              for signature in path_signature(paths)]
+
+    def watch_paths(self):
+        """已安装版本目录和全局版本文件（PYENV_ROOT/versions、PYENV_ROOT/version），用于发现在终端中执行的安装、卸载和 pyenv global"""
+        pyenv_fs = PyenvFilesystem.discover(self.env)
+        return [pyenv_fs.versions_dir, pyenv_fs.global_version_file]
+
+    def refresh_from_filesystem(self):
+        """只读取PYENV_ROOT（不执行pyenv）更新已安装版本缓存，返回 (已安装版本, 全局版本)；目录无法识别时返回None"""
+        pyenv_fs = self.filesystem()
+        if pyenv_fs is None:
+            return None
+        try:
+            versions = sort_versions(pyenv_fs.versions())
+            global_versions = pyenv_fs.global_versions()
+        except (UnrecognizedLayout, OSError):
+            return None
+        if versions != read_list_file(self.installed_versions_file):
+            self.save_installed_versions(versions)
+        return versions, global_versions
+
+    def stream_versions(self, command, params='', on_version=None):
+        """执行 install -l 或 versions，边读取输出边解析，返回版本列表（不保存原始输出），失败时返回空列表。
+
+        on_version(版本号) 在每解析出一个版本时调用，可用于逐步显示结果。
+        """
+        versions = []
+        with self.pool.host() as host:
+            for version in iter_version_lines(iter_lines(host.stream(self.command_line(command, params)))):
+                versions.append(version)
+                if on_version:
+                    on_version(version)
+            exit_code = host.last_exit_code
+        return versions if exit_code == 0 else []
+
+    def save_installed_versions(self, versions):
+        write_list_file(self.installed_versions_file, 'Installed Python versions cache', versions)
+
+    def fetch_available_versions(self):
+        """执行 install -l 获取可用版本列表，失败时返回空列表"""
+        return self.stream_versions('install', '-l')
+
+    def save_available_versions(self, versions, fetch_seconds=None, pyenv_version=None):
+        """写入可用版本缓存并替换内存索引，返回新的索引"""
+        return self.catalogue.save(versions, fetch_seconds, pyenv_version)
+
+    def available_versions(self, refresh=None):
+        """返回可用版本列表。refresh为None时缓存过期才重新获取，True时总是重新获取，False时只读缓存"""
+        if refresh or (refresh is None and self.catalogue.is_stale()):
+            start = time.monotonic()
+            versions = self.fetch_available_versions()
+            if versions:
+                self.save_available_versions(versions, time.monotonic() - start, self.pyenv_version())
+        return self.catalogue.get().versions
+
+    def search_available(self, text, limit=None, view=None):
+        """在可用版本中搜索（前缀 > 子串 > 模糊），view为筛选视图（见 version_index.VIEWS）"""
+        return self.catalogue.get().search(text, limit, view)
+
+    def installed_version_index(self):
+        """已安装版本的索引：直接读取 PYENV_ROOT/versions（目录变化时重建），无法读取时使用缓存文件"""
+        pyenv_fs = self.filesystem()
+        if pyenv_fs is not None:
+            key = (pyenv_fs.versions_dir, path_signature([pyenv_fs.versions_dir]))
+            cached_key, index = self._installed_fs_state
+            if key == cached_key:
+                return index
+            try:
+                index = VersionIndex(pyenv_fs.versions())
+            except (UnrecognizedLayout, OSError):
+                return self.installed_index.get()
+            self._installed_fs_state = (key, index)
+            return index
+        return self.installed_index.get()
+
+    def version_index(self, command):
+        """命令的版本说明所对应的版本集合：install 为可用版本，其他为已安装版本"""
+        return self.catalogue.get() if command == 'install' else self.installed_version_index()
+
+    def resolve_params(self, command, params):
+        """把参数中的版本说明替换为具体版本，返回 (新参数, [(版本说明, 版本)])。
+
+        完整版本号和以-开头的选项原样保留；没有满足的版本或格式错误的版本说明也原样保留（交给pyenv报错），
+        对应的版本为None。
+        """
+        if command not in SPEC_COMMANDS:
+            return params, []
+        index = self.version_index(command)
+        args = []
+        resolved = []
+        for arg in split_spec_args(params):
+            version = None
+            try:
+                if not arg.startswith('-') and parse_spec(arg) is not None:
+                    version = index.resolve(arg)
+                    resolved.append((arg, version))
+            except SpecError:
+                resolved.append((arg, None))
+            args.append(version or arg)
+        return ' '.join(args), resolved
+
+    def latest_release(self, force=False, min_interval_hours=DEFAULT_MIN_INTERVAL_HOURS):
+        """返回pyenv-win的最新发布版本，遵守最小检查间隔和GitHub限流"""
+        checker = ReleaseChecker(self.release_cache_file, min_interval_hours=min_interval_hours)
+        return checker.check(force=force)
@@ -0,0 +1,136 @@
+# 直接读取PYENV_ROOT目录回答版本查询，无需启动pyenv进程
+import os
+import re
+
+# pyenv-win 在 %USERPROFILE%\.pyenv\pyenv-win 下的默认安装位置
+DEFAULT_ROOT = os.path.join(os.path.expanduser('~'), '.pyenv', 'pyenv-win')
+# 本地版本文件名
+LOCAL_VERSION_FILE = '.python-version'
+
+
+class UnrecognizedLayout(Exception):
+    """PYENV_ROOT目录结构无法识别时抛出，调用方应回退到执行pyenv命令"""
+
+
+def version_sort_key(name):
+    # 自然排序：数字部分按数值比较，例如 3.9.1 排在 3.12.0 之前
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part)
+            for part in re.split(r'(\d+)', name) if part]
+
+
+def path_signature(paths):
+    """每个路径的 (修改时间, 大小)，不存在时为None；目录的修改时间在其中的条目增删时改变"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def find_pyenv_root(env=None):
+    """按 PYENV_ROOT、PYENV_HOME、PYENV 环境变量和默认位置的顺序查找pyenv根目录"""
+    env = os.environ if env is None else env
+    for name in ('PYENV_ROOT', 'PYENV_HOME', 'PYENV'):
+        value = env.get(name)
+        if value:
+            return os.path.normpath(value)
+    return DEFAULT_ROOT
+
+
+def read_version_file(path):
+    # 读取版本文件，每行（或空白分隔）一个版本，忽略注释和空行
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return []
+    versions = []
+    for line in content.splitlines():
+        line = line.split('#', 1)[0].strip()
+        versions.extend(line.split())
+    return versions
+
+
+class PyenvFilesystem:
+    """基于pyenv-win目录结构的版本查询。
+
+    - versions: PYENV_ROOT/versions 下的子目录
+    - global:   PYENV_ROOT/version 文件
+    - local:    当前目录或上级目录中的 .python-version 文件
+    pyenv-win自身的版本记录在安装目录（PYENV_ROOT的上级目录）的 .version 文件中。
+    """
+
+    def __init__(self, root, env=None):
+        self.root = root
+        self.env = os.environ if env is None else env
+        self.versions_dir = os.path.join(root, 'versions')
+        self.global_version_file = os.path.join(root, 'version')
+        self.shims_dir = os.path.join(root, 'shims')
+        # pyenv-win的版本文件：安装脚本写在 PYENV_ROOT 的上级目录，从源码检出时在 PYENV_ROOT 中
+        self.release_files = [os.path.join(os.path.dirname(root), '.version'), os.path.join(root, '.version')]
+
+    @classmethod
+    def discover(cls, env=None):
+        return cls(find_pyenv_root(env), env=env)
+
+    def is_recognized(self):
+        # 需要存在versions目录，且是pyenv-win（有bin或libexec目录）
+        return (os.path.isdir(self.versions_dir)
+                and (os.path.isdir(os.path.join(self.root, 'bin'))
+                     or os.path.isdir(os.path.join(self.root, 'libexec'))))
+
+    def _check(self):
+        if not self.is_recognized():
+            raise UnrecognizedLayout(self.root)
+
+    def versions(self):
+        """返回已安装的版本列表（按版本号排序）"""
+        self._check()
+        with os.scandir(self.versions_dir) as entries:
+            names = [entry.name for entry in entries
+                     if entry.is_dir() and not entry.name.startswith('.')]
+        return sorted(names, key=version_sort_key)
+
+    def global_versions(self):
+        """返回全局版本列表；没有设置时返回空列表"""
+        self._check()
+        return read_version_file(self.global_version_file)
+
+    def local_version(self, cwd=None):
+        """返回 (版本列表, 版本文件路径)；当前目录及上级目录都没有设置时返回 (None, None)"""
+        self._check()
+        directory = os.path.abspath(cwd or os.getcwd())
+        while True:
+            path = os.path.join(directory, LOCAL_VERSION_FILE)
+            if os.path.isfile(path):
+                return read_version_file(path), path
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None, None
+            directory = parent
+
+    def version_name(self, cwd=None):
+        """按 PYENV_VERSION 环境变量、本地版本、全局版本的优先级返回 (版本列表, 来源)"""
+        self._check()
+        shell_version = self.env.get('PYENV_VERSION')
+        if shell_version:
+            return shell_version.split(), 'PYENV_VERSION environment variable'
+        versions, path = self.local_version(cwd)
+        if versions:
+            return versions, path
+        return self.global_versions(), self.global_version_file
+
+    def format_versions(self, cwd=None):
+        """生成与 `pyenv versions` 相同格式的输出文本"""
+        current, origin = self.version_name(cwd)
+        lines = []
+        for name in self.versions():
+            if name in current:
+                lines.append(f"* {name} (set by {origin})\n")
+            else:
+                lines.append(f"  {name}\n")
+        return ''.join(lines)
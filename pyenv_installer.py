@@ -0,0 +1,188 @@
+# pyenv-win 安装/更新/卸载：进程内下载并缓存安装脚本（校验SHA-256），在常驻Shell中执行，安装后按退避间隔等待pyenv可用
+import hashlib
+import json
+import os
+import time
+
+from atomic_file import atomic_write
+from release_checker import UrllibSession
+from segmented_download import DownloadError, SegmentedDownloader
+
+# pyenv-win官方安装脚本
+INSTALL_SCRIPT_URL = 'https://raw.githubusercontent.com/pyenv-win/pyenv-win/master/pyenv-win/install-pyenv-win.ps1'
+INSTALL_SCRIPT_FILENAME = 'install-pyenv-win.ps1'
+# 缓存的元数据：sha256、ETag、Last-Modified、下载时间
+INSTALL_SCRIPT_METADATA_FILENAME = 'install-pyenv-win.json'
+# 缓存的脚本在这段时间内直接使用，之后用条件请求重新验证
+DEFAULT_SCRIPT_MAX_AGE_HOURS = 24
+# 等待pyenv可用：第一次间隔、最大间隔和总超时（秒）
+READY_INITIAL_DELAY = 0.25
+READY_MAX_DELAY = 2.0
+READY_TIMEOUT_SECONDS = 30
+
+
+class InstallerError(Exception):
+    """无法获取安装脚本或脚本校验失败时抛出"""
+
+
+def sha256_of(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def wait_with_backoff(probe, timeout=READY_TIMEOUT_SECONDS, initial_delay=READY_INITIAL_DELAY,
+                      max_delay=READY_MAX_DELAY, sleep=time.sleep):
+    """反复调用probe()直到返回真值，间隔从initial_delay开始翻倍、最多max_delay；超时返回None"""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        result = probe()
+        if result:
+            return result
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+class PyenvInstaller:
+    """通过官方PowerShell脚本安装、更新或卸载pyenv-win。
+
+    - 安装脚本由进程内下载并缓存在data_dir中，记录其SHA-256；每次使用前校验缓存文件，
+      被修改或损坏时重新下载。提供expected_sha256时，下载的脚本必须与之一致。
+    - 没有缓存时通过 SegmentedDownloader 下载（中断后可续传）；
+      过期的缓存用 If-None-Match / If-Modified-Since 重新验证，网络不可用时继续使用缓存。
+    - 脚本在引擎的常驻Shell进程中执行，输出通过阻塞读取逐块回调，不需要轮询。
+    """
+
+    def __init__(self, engine, url=INSTALL_SCRIPT_URL, expected_sha256=None,
+                 max_age_hours=DEFAULT_SCRIPT_MAX_AGE_HOURS, session=None, timeout=15, downloader=None):
+        self.engine = engine
+        self.url = url
+        self.expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        self.max_age_hours = max_age_hours
+        self.session = session
+        self.timeout = timeout
+        self.downloader = downloader or SegmentedDownloader(timeout=timeout)
+        self.script_path = os.path.join(engine.data_dir, INSTALL_SCRIPT_FILENAME)
+        self.metadata_path = os.path.join(engine.data_dir, INSTALL_SCRIPT_METADATA_FILENAME)
+
+    # ---- 安装脚本 ----
+
+    def _load_metadata(self):
+        try:
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error loading install script metadata: {e}")
+            return {}
+
+    def _save(self, data, metadata):
+        # 先替换脚本再替换元数据；中途失败时两者的SHA-256不一致，下次会重新下载
+        with atomic_write(self.script_path, 'wb') as f:
+            f.write(data)
+        with atomic_write(self.metadata_path) as f:
+            json.dump(metadata, f, indent=2)
+
+    def _cached_script(self, metadata):
+        # 返回校验通过的缓存脚本内容，不存在或SHA-256不符时返回None
+        try:
+            with open(self.script_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        digest = sha256_of(data)
+        if digest != metadata.get('sha256'):
+            return None
+        if self.expected_sha256 and digest != self.expected_sha256:
+            return None
+        return data
+
+    def _download_new(self):
+        # 没有可用的缓存时完整下载，SHA-256由下载器在完成时校验
+        temp_path = f"{self.script_path}.download"
+        try:
+            result = self.downloader.download(self.url, temp_path, expected_sha256=self.expected_sha256)
+        except DownloadError as e:
+            raise InstallerError(f"cannot download {self.url}: {e}") from e
+        with open(temp_path, 'rb') as f:
+            data = f.read()
+        os.remove(temp_path)
+        return data, {'url': self.url, 'sha256': result.sha256, 'etag': result.etag,
+                      'last_modified': result.last_modified, 'fetched_at': time.time()}
+
+    def _download(self, metadata, cached):
+        if cached is None:
+            return self._download_new()
+        headers = {}
+        if metadata.get('etag'):
+            headers['If-None-Match'] = metadata['etag']
+        if metadata.get('last_modified'):
+            headers['If-Modified-Since'] = metadata['last_modified']
+        if self.session is None:
+            self.session = UrllibSession()
+        response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            metadata['fetched_at'] = time.time()
+            return cached, metadata
+        if response.status_code != 200 or not response.body:
+            raise InstallerError(f"HTTP {response.status_code} while downloading {self.url}")
+        digest = sha256_of(response.body)
+        if self.expected_sha256 and digest != self.expected_sha256:
+            raise InstallerError(f"install script checksum mismatch: expected {self.expected_sha256}, got {digest}")
+        return response.body, {'url': self.url, 'sha256': digest, 'etag': response.headers.get('ETag'),
+                               'last_modified': response.headers.get('Last-Modified'), 'fetched_at': time.time()}
+
+    def ensure_script(self, force=False):
+        """返回校验通过的安装脚本路径，必要时下载或重新验证；无法获得有效脚本时抛出InstallerError"""
+        metadata = self._load_metadata()
+        cached = self._cached_script(metadata) if metadata.get('url', self.url) == self.url else None
+        age_hours = (time.time() - metadata.get('fetched_at', 0)) / 3600
+        if cached is not None and not force and age_hours < self.max_age_hours:
+            return self.script_path
+        try:
+            data, metadata = self._download(metadata, cached)
+        except InstallerError:
+            # 校验失败或服务器返回错误时不使用任何脚本
+            raise
+        except Exception as e:
+            if cached is not None:
+                # 网络不可用时使用已校验的缓存
+                print(f"Error revalidating install script, using the cached copy: {e}")
+                return self.script_path
+            raise InstallerError(f"cannot download {self.url}: {e}") from e
+        self._save(data, metadata)
+        return self.script_path
+
+    def verify_script(self):
+        """执行前再次校验磁盘上的脚本，防止在下载之后被修改"""
+        if self._cached_script(self._load_metadata()) is None:
+            raise InstallerError(f"{self.script_path} does not match its recorded checksum")
+
+    # ---- 执行 ----
+
+    def script_command(self, uninstall=False):
+        command = self.engine.pool.dialect.quote_executable(self.script_path)
+        return f"{command} -Uninstall" if uninstall else command
+
+    def run_script(self, uninstall=False, on_output=None, metrics=None):
+        """下载（或使用缓存的）安装脚本并在常驻Shell中执行，输出逐块传给on_output，返回退出码"""
+        fetch_start = time.perf_counter()
+        self.ensure_script()
+        self.verify_script()
+        if metrics is not None:
+            metrics.add_span('fetch install script', fetch_start, time.perf_counter())
+        with self.engine.pool.host(metrics) as host:
+            for text in host.stream(self.script_command(uninstall), metrics):
+                if on_output:
+                    on_output(text)
+            exit_code = host.last_exit_code
+        # 安装脚本修改了用户环境变量，让常驻进程重新加载PATH等变量
+        self.engine.pool.refresh_environment()
+        return exit_code
+
+    def wait_until_ready(self, timeout=READY_TIMEOUT_SECONDS):
+        """安装后等待pyenv可以执行，返回pyenv版本号，超时返回None"""
+        return wait_with_backoff(self.engine.pyenv_version, timeout=timeout)
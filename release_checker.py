@@ -0,0 +1,200 @@
+# pyenv-win 最新版本检查：条件请求、分页合并、语义化排序、遵守GitHub限流并带指数退避
+import json
+import re
+import time
+
+from atomic_file import atomic_write
+
+# GitHub tags接口
+GITHUB_TAGS_URL = 'https://api.github.com/repos/pyenv-win/pyenv-win/tags'
+# 两次检查之间的默认最小间隔（小时）
+DEFAULT_MIN_INTERVAL_HOURS = 6
+# 失败后的退避时间：从 BACKOFF_BASE_SECONDS 开始翻倍，最多 BACKOFF_MAX_SECONDS
+BACKOFF_BASE_SECONDS = 60
+BACKOFF_MAX_SECONDS = 24 * 3600
+# 最多读取的分页数
+MAX_PAGES = 5
+# 形如 v3.1.1 / 3.1 的版本标签
+TAG_PATTERN = re.compile(r'^v?(\d+(?:\.\d+)*)$')
+
+
+# Link响应头中的分页链接，例如 <https://...&page=2>; rel="next"
+LINK_PATTERN = re.compile(r'<([^>]+)>\s*;\s*rel="([^"]+)"')
+
+
+def parse_links(header):
+    """解析Link响应头，返回 {rel: {'url': 地址}}（与requests的response.links格式相同）"""
+    return {rel: {'url': url} for url, rel in LINK_PATTERN.findall(header or '')}
+
+
+class UrllibResponse:
+    """urllib响应的简单包装，提供检查器用到的 status_code / headers / json() / links"""
+
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.links = parse_links(headers.get('Link'))
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class UrllibSession:
+    """基于标准库urllib.request的最小会话，代替requests以减少打包体积和启动时的导入开销。
+
+    urllib.request 在第一次请求时（后台线程中）才导入。304等HTTP错误状态作为普通响应返回。
+    """
+
+    def get(self, url, headers=None, timeout=None):
+        import urllib.error
+        import urllib.request
+        request = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return UrllibResponse(response.status, response.headers, response.read())
+        except urllib.error.HTTPError as e:
+            return UrllibResponse(e.code, e.headers, e.read())
+
+
+def parse_tag(name):
+    """把标签解析为可比较的整数元组，不是版本号格式的标签返回None"""
+    match = TAG_PATTERN.match(name.strip())
+    if not match:
+        return None
+    return tuple(int(part) for part in match.group(1).split('.'))
+
+
+def latest_tag(names):
+    """按语义化版本号返回最新的标签（去掉v前缀），没有有效标签时返回None"""
+    parsed = [(parse_tag(name), name) for name in names]
+    parsed = [(key, name) for key, name in parsed if key is not None]
+    if not parsed:
+        return None
+    return max(parsed)[1].lstrip('v')
+
+
+class ReleaseChecker:
+    """检查pyenv-win的最新发布版本。
+
+    - 每一页都带 If-None-Match 请求，第一页返回304时直接使用缓存的结果
+    - 合并所有分页的标签后按版本号排序，而不是相信第一个标签
+    - 根据 X-RateLimit-Remaining / X-RateLimit-Reset 推迟下一次检查
+    - 请求失败时指数退避；两次检查之间至少间隔 min_interval_hours
+    响应缓存保存在 cache_file 中，url 可以指向本地的测试服务器。
+    """
+
+    def __init__(self, cache_file, url=GITHUB_TAGS_URL, min_interval_hours=DEFAULT_MIN_INTERVAL_HOURS,
+                 session=None, timeout=5, max_pages=MAX_PAGES):
+        self.cache_file = cache_file
+        self.url = url
+        self.min_interval_hours = min_interval_hours
+        self.session = session
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.cache = self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            with atomic_write(self.cache_file) as f:
+                json.dump(self.cache, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            print(f"Error saving release cache: {e}")
+
+    def _get_session(self):
+        if self.session is None:
+            self.session = UrllibSession()
+        return self.session
+
+    @property
+    def latest(self):
+        return self.cache.get('latest')
+
+    def next_check_time(self):
+        """下一次允许发起请求的时间戳"""
+        checked_at = self.cache.get('checked_at', 0)
+        return max(checked_at + self.min_interval_hours * 3600, self.cache.get('retry_after', 0))
+
+    def _schedule_backoff(self, now):
+        failures = self.cache.get('failures', 0) + 1
+        self.cache['failures'] = failures
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (failures - 1), BACKOFF_MAX_SECONDS)
+        # 限流要求的等待时间更长时保留限流的时间
+        self.cache['retry_after'] = max(self.cache.get('retry_after', 0), now + delay)
+
+    def _apply_rate_limit(self, response):
+        # 剩余次数用完时，在重置时间之前不再请求
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is not None and remaining.isdigit() and int(remaining) == 0 and reset and reset.isdigit():
+            self.cache['retry_after'] = max(self.cache.get('retry_after', 0), int(reset))
+            return True
+        return False
+
+    def _fetch_pages(self, now):
+        """读取所有分页，返回合并后的标签列表；第一页未变化时返回None"""
+        session = self._get_session()
+        pages = self.cache.get('pages', {})
+        new_pages = {}
+        url = f"{self.url}?per_page=100"
+        for page_number in range(self.max_pages):
+            headers = {'Accept': 'application/vnd.github+json'}
+            cached_page = pages.get(url)
+            if cached_page and cached_page.get('etag'):
+                headers['If-None-Match'] = cached_page['etag']
+            response = session.get(url, headers=headers, timeout=self.timeout)
+            limited = self._apply_rate_limit(response)
+            if response.status_code == 304 and cached_page:
+                if page_number == 0 and self.cache.get('complete', True):
+                    # 第一页未变化，说明标签列表没有变化（上次因限流没有读完所有分页时继续读取）
+                    return None
+                new_pages[url] = cached_page
+            elif response.status_code == 200:
+                new_pages[url] = {
+                    'etag': response.headers.get('ETag'),
+                    'tags': [tag['name'] for tag in response.json() if 'name' in tag],
+                }
+            else:
+                if response.status_code in (403, 429) and not limited:
+                    retry_after = response.headers.get('Retry-After')
+                    if retry_after and retry_after.isdigit():
+                        self.cache['retry_after'] = now + int(retry_after)
+                raise RuntimeError(f"GitHub returned HTTP {response.status_code}")
+            next_link = response.links.get('next')
+            complete = not (limited and next_link)
+            if not complete:
+                # 剩余分页因限流无法读取，沿用缓存中的分页
+                for cached_url, cached in pages.items():
+                    new_pages.setdefault(cached_url, cached)
+            if not next_link or limited:
+                break
+            url = next_link['url']
+        self.cache['pages'] = new_pages
+        self.cache['complete'] = complete
+        return [name for page in new_pages.values() for name in page['tags']]
+
+    def check(self, force=False, now=None):
+        """检查最新版本并返回（去掉v前缀的）版本号；未到检查时间时直接返回缓存的结果"""
+        now = time.time() if now is None else now
+        if not force and now < self.next_check_time():
+            return self.latest
+        try:
+            names = self._fetch_pages(now)
+            if names is not None:
+                latest = latest_tag(names)
+                if latest:
+                    self.cache['latest'] = latest
+            self.cache['checked_at'] = now
+            self.cache['failures'] = 0
+        except Exception as e:
+            print(f"Error getting latest version: {e}")
+            self._schedule_backoff(now)
+        self._save()
+        return self.latest
@@ -0,0 +1,321 @@
+# 分段下载：服务器支持Range请求时把文件分成几段并行下载，中断后从 .part 文件继续，完成后校验大小和SHA-256
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from atomic_file import atomic_write
+
+# 默认的并行段数
+DEFAULT_SEGMENTS = 4
+# 每段至少这么大，小文件（例如安装脚本）只用一段
+MIN_SEGMENT_BYTES = 2 * 1024 * 1024
+# 每次读取的字节数
+READ_CHUNK_SIZE = 256 * 1024
+# 每写入这么多字节保存一次进度，中断后最多重新下载这么多
+CHECKPOINT_BYTES = 4 * 1024 * 1024
+# 每段失败后的重试次数和第一次重试前的等待时间（秒，之后翻倍）
+DEFAULT_RETRIES = 3
+RETRY_DELAY_SECONDS = 0.5
+# Content-Range: bytes 0-0/12345
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class DownloadError(Exception):
+    """下载失败或下载完成的文件校验失败时抛出"""
+
+
+class _RangeIgnored(Exception):
+    # 服务器对续传请求返回了整个文件（文件已改变或不再支持Range），需要从头下载
+    pass
+
+
+class DownloadResult:
+    """一次下载的结果：SHA-256、大小、段数、续传复用的字节数和服务器返回的校验头"""
+
+    def __init__(self, sha256, size, segments, resumed_bytes, etag=None, last_modified=None):
+        self.sha256 = sha256
+        self.size = size
+        self.segments = segments
+        self.resumed_bytes = resumed_bytes
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def format_progress(done, total, elapsed=None):
+    """格式化下载进度，例如 "12.3/27.0 MB  45%  3.1 MB/s" """
+    text = f"{done / 1024 ** 2:.1f}/{total / 1024 ** 2:.1f} MB  {done * 100 // total}%" if total else f"{done / 1024 ** 2:.1f} MB"
+    if elapsed:
+        text += f"  {done / elapsed / 1024 ** 2:.1f} MB/s"
+    return text
+
+
+def progress_writer(write, prefix='', interval=0.5, overwrite=False):
+    """返回 on_progress(done, total) 回调：最多每interval秒和完成时通过write输出一行进度。
+
+    overwrite为True时每行以"\\r"开头，覆盖输出区域中上一次的进度（只有一个下载时使用）；
+    多个下载同时输出时用普通的换行。
+    """
+    start = time.monotonic()
+    state = {'start': start, 'last': start}
+
+    def on_progress(done, total):
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if not finished and now - state['last'] < interval:
+            return
+        state['last'] = now
+        line = f"{prefix}{format_progress(done, total, now - state['start'])}"
+        if overwrite:
+            write(f"\r{line}\n" if finished else f"\r{line}")
+        else:
+            write(f"{line}\n")
+    return on_progress
+
+
+class _Segment:
+    """文件中的一段 [start, end]（含end），next为下一个要写入的位置"""
+
+    def __init__(self, start, end, next_offset=None):
+        self.start = start
+        self.end = end
+        self.next = start if next_offset is None else next_offset
+
+    @property
+    def done(self):
+        return self.next > self.end
+
+
+class SegmentedDownloader:
+    """支持分段并行和断点续传的下载器。
+
+    先用 "Range: bytes=0-0" 探测文件大小和服务器是否支持Range：
+    - 支持时按 segments 分段并行下载到 <destination>.part，进度记录在 <destination>.part.json；
+      下载中断后再次调用时，若地址、大小和ETag/Last-Modified未变，只下载缺少的部分。
+      续传请求带 If-Range，服务器上的文件已改变时会返回整个文件，此时从头下载。
+    - 不支持时用一个连接顺序下载，无法续传。
+    完成后校验大小，计算SHA-256（提供expected_sha256时必须一致），再重命名为destination。
+    """
+
+    def __init__(self, segments=DEFAULT_SEGMENTS, min_segment_bytes=MIN_SEGMENT_BYTES, timeout=30,
+                 retries=DEFAULT_RETRIES, opener=None):
+        self.segments = segments
+        self.min_segment_bytes = min_segment_bytes
+        self.timeout = timeout
+        self.retries = retries
+        # opener(request, timeout) 返回响应对象，默认使用urllib（测试时可替换）
+        self.opener = opener
+
+    def _open(self, url, headers):
+        import urllib.request
+        request = urllib.request.Request(url, headers=headers)
+        if self.opener is not None:
+            return self.opener(request, self.timeout)
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    # ---- 探测 ----
+
+    def _probe(self, url):
+        """返回 (响应, 大小, 是否支持Range, 校验头)；不支持Range时返回的响应可以直接读取整个文件"""
+        response = self._open(url, {'Range': 'bytes=0-0'})
+        headers = response.headers
+        validators = {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')}
+        match = CONTENT_RANGE_PATTERN.match(headers.get('Content-Range') or '')
+        if response.status == 206 and match and match.group(3) != '*':
+            response.close()
+            return None, int(match.group(3)), True, validators
+        length = headers.get('Content-Length')
+        return response, int(length) if length and length.isdigit() else None, False, validators
+
+    @staticmethod
+    def _if_range(validators):
+        # If-Range只能使用强ETag，没有时使用Last-Modified
+        etag = validators.get('etag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return validators.get('last_modified')
+
+    # ---- 进度文件 ----
+
+    def _load_state(self, state_path, url, size, validators):
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading download state: {e}")
+            return None
+        if (state.get('url') != url or state.get('size') != size
+                or state.get('validator') != self._if_range(validators)):
+            return None
+        return [_Segment(*segment) for segment in state.get('segments', [])]
+
+    def _save_state(self, state_path, url, size, validators, segments):
+        with atomic_write(state_path) as f:
+            json.dump({'url': url, 'size': size, 'validator': self._if_range(validators),
+                       'segments': [[segment.start, segment.end, segment.next] for segment in segments]}, f)
+
+    def _plan(self, size):
+        count = max(1, min(self.segments, size // max(self.min_segment_bytes, 1)))
+        step = size // count
+        return [_Segment(index * step, size - 1 if index == count - 1 else (index + 1) * step - 1)
+                for index in range(count)]
+
+    # ---- 下载 ----
+
+    def download(self, url, destination, on_progress=None, expected_sha256=None):
+        """下载url到destination，返回DownloadResult；on_progress(已下载字节数, 总字节数或None)。
+
+        任何失败（HTTP错误状态、网络错误、校验失败）都抛出DownloadError。
+        """
+        try:
+            return self._download(url, destination, on_progress, expected_sha256)
+        except OSError as e:
+            # urllib的HTTPError/URLError、超时和文件读写错误都是OSError
+            raise DownloadError(f"cannot download {url}: {e}") from e
+
+    def _download(self, url, destination, on_progress, expected_sha256, restarted=False):
+        part_path = f"{destination}.part"
+        state_path = f"{part_path}.json"
+        response, size, ranges, validators = self._probe(url)
+        if not ranges or not size:
+            self._remove(state_path)
+            if response is None:
+                response = self._open(url, {})
+            return self._download_stream(response, size, part_path, destination, on_progress,
+                                         expected_sha256, validators)
+        segments = self._load_state(state_path, url, size, validators) if os.path.exists(part_path) else None
+        if segments is None:
+            segments = self._plan(size)
+            with open(part_path, 'wb') as f:
+                f.truncate(size)
+        resumed = sum(segment.next - segment.start for segment in segments)
+        try:
+            self._download_segments(url, size, validators, segments, part_path, state_path, on_progress)
+        except _RangeIgnored:
+            # 服务器上的文件已改变，丢弃已下载的部分从头开始（只重来一次）
+            self._remove(part_path)
+            self._remove(state_path)
+            if restarted:
+                raise DownloadError(f"server ignored the range requests for {url}")
+            return self._download(url, destination, on_progress, expected_sha256, restarted=True)
+        result = self._finish(part_path, destination, size, expected_sha256, validators,
+                              segments=len(segments), resumed=resumed)
+        self._remove(state_path)
+        return result
+
+    def _download_stream(self, response, size, part_path, destination, on_progress, expected_sha256, validators):
+        digest = hashlib.sha256()
+        done = 0
+        with response, open(part_path, 'wb') as f:
+            while True:
+                chunk = response.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                digest.update(chunk)
+                done += len(chunk)
+                if on_progress:
+                    on_progress(done, size)
+        return self._finish(part_path, destination, size, expected_sha256, validators,
+                            digest=digest.hexdigest(), segments=1, resumed=0)
+
+    def _download_segments(self, url, size, validators, segments, part_path, state_path, on_progress):
+        lock = threading.Lock()
+        stop = threading.Event()
+        progress = {'done': sum(segment.next - segment.start for segment in segments), 'unsaved': 0}
+
+        def on_chunk(length):
+            with lock:
+                progress['done'] += length
+                progress['unsaved'] += length
+                if progress['unsaved'] >= CHECKPOINT_BYTES:
+                    progress['unsaved'] = 0
+                    self._save_state(state_path, url, size, validators, segments)
+                done = progress['done']
+            if on_progress:
+                on_progress(done, size)
+
+        pending = [segment for segment in segments if not segment.done]
+        try:
+            if len(pending) <= 1:
+                for segment in pending:
+                    self._fetch_segment(url, validators, segment, part_path, on_chunk, stop)
+            else:
+                from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+                with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix='segment') as pool:
+                    futures = [pool.submit(self._fetch_segment, url, validators, segment, part_path, on_chunk, stop)
+                               for segment in pending]
+                    # 一段失败时让其他段尽快停止
+                    wait(futures, return_when=FIRST_EXCEPTION)
+                    stop.set()
+                for future in futures:
+                    future.result()
+        finally:
+            # 无论成功与否都记录进度，下次调用从这里继续
+            with lock:
+                self._save_state(state_path, url, size, validators, segments)
+
+    def _fetch_segment(self, url, validators, segment, part_path, on_chunk, stop):
+        if_range = self._if_range(validators)
+        attempt = 0
+        with open(part_path, 'r+b') as f:
+            while not segment.done and not stop.is_set():
+                headers = {'Range': f"bytes={segment.next}-{segment.end}"}
+                if if_range:
+                    headers['If-Range'] = if_range
+                try:
+                    with self._open(url, headers) as response:
+                        match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range') or '')
+                        if response.status != 206 or not match or int(match.group(1)) != segment.next:
+                            raise _RangeIgnored()
+                        f.seek(segment.next)
+                        while not segment.done and not stop.is_set():
+                            chunk = response.read(min(READ_CHUNK_SIZE, segment.end + 1 - segment.next))
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            segment.next += len(chunk)
+                            attempt = 0
+                            on_chunk(len(chunk))
+                    if not segment.done and not stop.is_set():
+                        raise ConnectionError(f"connection closed at byte {segment.next}")
+                except _RangeIgnored:
+                    raise
+                except OSError as e:
+                    # 网络错误（包括HTTPError、超时和连接中断）时重试，从已写入的位置继续
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise DownloadError(f"segment {segment.start}-{segment.end} of {url} failed: {e}") from e
+                    f.flush()
+                    if stop.wait(RETRY_DELAY_SECONDS * 2 ** (attempt - 1)):
+                        break
+
+    def _finish(self, part_path, destination, size, expected_sha256, validators, segments, resumed, digest=None):
+        actual_size = os.path.getsize(part_path)
+        if size is not None and actual_size != size:
+            self._remove(part_path)
+            raise DownloadError(f"incomplete download: {actual_size} of {size} bytes")
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+        if expected_sha256 and digest != expected_sha256.lower():
+            # 内容错误，不保留用于续传
+            self._remove(part_path)
+            raise DownloadError(f"checksum mismatch: expected {expected_sha256}, got {digest}")
+        os.replace(part_path, destination)
+        return DownloadResult(digest, actual_size, segments, resumed,
+                              etag=validators.get('etag'), last_modified=validators.get('last_modified'))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,87 @@
+# 会话日志：把完整的输出记录按段滚动保存到磁盘
+import os
+import time
+
+# 单个日志段的最大字节数
+DEFAULT_SEGMENT_BYTES = 1024 * 1024
+# 最多保留的日志段数量，超出后删除最旧的
+DEFAULT_MAX_SEGMENTS = 50
+# 日志段文件名前缀和后缀
+SEGMENT_PREFIX = 'session-'
+SEGMENT_SUFFIX = '.log'
+
+
+class SessionLog:
+    """滚动的会话日志。
+
+    文本追加到当前日志段，当前段超过 segment_bytes 后开启新段，
+    目录中的日志段总数超过 max_segments 时删除最旧的段。
+    write() 只应在单个线程（输出管道的UI线程）中调用。
+    """
+
+    def __init__(self, log_dir, segment_bytes=DEFAULT_SEGMENT_BYTES, max_segments=DEFAULT_MAX_SEGMENTS):
+        self.log_dir = log_dir
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        # 本次会话的标识，同一会话的所有段共享该前缀
+        self.session_id = time.strftime('%Y%m%d-%H%M%S')
+        self._segment_index = 0
+        self._file = None
+        self._written = 0
+
+    @property
+    def current_path(self):
+        return self._segment_path(self._segment_index)
+
+    def _segment_path(self, index):
+        return os.path.join(self.log_dir, f"{SEGMENT_PREFIX}{self.session_id}-{index:03d}{SEGMENT_SUFFIX}")
+
+    def _open_segment(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._file = open(self.current_path, 'a', encoding='utf-8', newline='')
+        self._written = self._file.tell()
+        self._prune()
+
+    def _rotate(self):
+        self._file.close()
+        self._segment_index += 1
+        self._open_segment()
+
+    def _prune(self):
+        # 删除超出数量上限的最旧日志段（当前段除外）
+        segments = self.list_segments()
+        excess = len(segments) - self.max_segments
+        for path in segments[:max(excess, 0)]:
+            if path == self.current_path:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing log segment: {e}")
+
+    def write(self, text):
+        if not text:
+            return
+        try:
+            if self._file is None:
+                self._open_segment()
+            elif self._written >= self.segment_bytes:
+                self._rotate()
+            self._file.write(text)
+            self._file.flush()
+            self._written += len(text.encode('utf-8'))
+        except Exception as e:
+            print(f"Error writing session log: {e}")
+
+    def list_segments(self):
+        # 返回所有日志段的路径，按时间从旧到新排序
+        if not os.path.isdir(self.log_dir):
+            return []
+        names = [name for name in os.listdir(self.log_dir)
+                 if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)]
+        return [os.path.join(self.log_dir, name) for name in sorted(names)]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,413 @@
+# 常驻Shell进程池：复用长期运行的PowerShell（或其他Shell）进程执行命令，
+# 避免每次调用都承担powershell.exe的冷启动开销
+import hashlib
+import os
+import queue
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from atomic_file import atomic_write
+from stream_reader import IncrementalTextDecoder, ShellOutputReader, console_encoding, fallback_encoding
+
+# Windows下隐藏子进程的控制台窗口
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+# PowerShell的辅助脚本：在脚本的作用域中执行传入的命令。exit在脚本文件中只结束该脚本，
+# 不像在常驻进程的顶层作用域中那样结束整个进程
+POWERSHELL_RUNNER = "param([string]$__command)\n& ([ScriptBlock]::Create($__command))\n"
+
+
+class ShellHostError(Exception):
+    """Shell进程意外退出或无法通信时抛出"""
+
+
+class ShellCancelled(ShellHostError):
+    """正在执行的命令被cancel()取消时抛出"""
+
+
+# 一条命令的执行结果（退出码和全部输出）
+ShellResult = namedtuple('ShellResult', ['exit_code', 'output'])
+
+
+class ShellDialect:
+    """描述一种Shell：启动参数、初始化命令以及如何用结束标记包装一条命令。"""
+
+    name = 'shell'
+
+    def __init__(self, executable):
+        self.executable = executable
+
+    def argv(self):
+        raise NotImplementedError
+
+    def init_commands(self):
+        # 进程启动后执行一次的初始化命令
+        return []
+
+    def refresh_env_command(self):
+        # 重新加载环境变量（如安装后PATH发生变化）的命令，不支持时返回None
+        return None
+
+    def wrap(self, command, marker):
+        # 返回一行完整的输入：执行command，然后输出 "<marker>:<退出码>"
+        raise NotImplementedError
+
+    def quote_executable(self, path):
+        # 返回调用可执行文件的写法，路径包含空格等字符时需要引用
+        return path
+
+    def with_env(self, command, variables):
+        # 返回只在执行command期间设置环境变量的命令
+        raise NotImplementedError
+
+    def output_encoding(self):
+        # Shell输出使用的编码，默认为控制台代码页
+        return console_encoding()
+
+    def decoder(self):
+        # 为一条命令的输出创建增量解码器，首选编码解码失败时改用备用编码
+        encoding = self.output_encoding()
+        return IncrementalTextDecoder(encoding, fallback_encoding(encoding))
+
+
+class PowerShellDialect(ShellDialect):
+    name = 'powershell'
+
+    def __init__(self, executable):
+        super().__init__(executable)
+        self._runner = None
+
+    def argv(self):
+        # 执行辅助脚本需要允许运行脚本文件（只对这个进程有效）
+        return [self.executable, '-NoLogo', '-NoProfile', '-NonInteractive', '-ExecutionPolicy', 'Bypass',
+                '-Command', '-']
+
+    def init_commands(self):
+        return [
+            "$ProgressPreference = 'SilentlyContinue'",
+            "[Console]::OutputEncoding = [System.Text.Encoding]::UTF8",
+            "$OutputEncoding = [System.Text.Encoding]::UTF8",
+        ]
+
+    def with_env(self, command, variables):
+        # 常驻进程的环境变量会一直保留，执行后恢复原来的值（原来没有设置时删除）
+        names = ', '.join(f"'{name}'" for name in variables)
+        assignments = '; '.join(f"$env:{name} = " + "'" + value.replace("'", "''") + "'"
+                                for name, value in variables.items())
+        return ("$__saved_env = @{}; "
+                f"foreach ($__name in {names}) {{ $__saved_env[$__name] = [Environment]::GetEnvironmentVariable($__name) }}; "
+                f"try {{ {assignments}; {command} }} "
+                "finally { foreach ($__name in $__saved_env.Keys) { "
+                "if ($null -eq $__saved_env[$__name]) { Remove-Item -Path \"Env:$__name\" -ErrorAction SilentlyContinue } "
+                "else { Set-Item -Path \"Env:$__name\" -Value $__saved_env[$__name] } } }")
+
+    def output_encoding(self):
+        # init_commands 已把输出编码设置为UTF-8
+        return 'utf-8'
+
+    def refresh_env_command(self):
+        # 从注册表重新读取PATH和pyenv相关的环境变量
+        return ("$env:Path = [Environment]::GetEnvironmentVariable('Path','Machine') + ';' + "
+                "[Environment]::GetEnvironmentVariable('Path','User'); "
+                "foreach ($__name in 'PYENV','PYENV_ROOT','PYENV_HOME') { "
+                "$__value = [Environment]::GetEnvironmentVariable($__name,'User'); "
+                "if ($__value) { Set-Item -Path \"env:$__name\" -Value $__value } }")
+
+    def runner_script(self):
+        """返回辅助脚本的路径（第一次调用时写入临时目录）"""
+        if self._runner is None:
+            digest = hashlib.sha256(POWERSHELL_RUNNER.encode('utf-8')).hexdigest()[:12]
+            path = os.path.join(tempfile.gettempdir(), f"pyenv-gui-runner-{digest}.ps1")
+            if not os.path.exists(path):
+                with atomic_write(path) as f:
+                    f.write(POWERSHELL_RUNNER)
+            self._runner = path
+        return self._runner
+
+    def wrap(self, command, marker):
+        # 命令在辅助脚本中执行：命令中的exit只结束脚本，退出码进入$LASTEXITCODE，常驻进程不会退出。
+        # 非原生命令的错误（如命令不存在）也记为失败；原生命令的退出码取自$LASTEXITCODE
+        runner = self.runner_script().replace("'", "''")
+        quoted = command.replace("'", "''")
+        return ("$global:LASTEXITCODE = 0; $__ok = $true; "
+                f"& '{runner}' '{quoted}' 2>&1 | ForEach-Object {{ "
+                "if ($_ -is [System.Management.Automation.ErrorRecord] -and "
+                "$_.FullyQualifiedErrorId -notlike 'NativeCommandError*') { $__ok = $false }; \"$_\" }; "
+                "$__rc = if ($LASTEXITCODE) { $LASTEXITCODE } elseif (-not $__ok) { 1 } else { 0 }; "
+                f"[Console]::Out.Write(\"{marker}:$__rc`n\"); [Console]::Out.Flush()")
+
+    def quote_executable(self, path):
+        # 带引号的路径需要用调用运算符&执行
+        if re.search(r"[\s'\"`$&;()]", path):
+            return "& '" + path.replace("'", "''") + "'"
+        return path
+
+
+class PosixShellDialect(ShellDialect):
+    name = 'sh'
+
+    def argv(self):
+        return [self.executable]
+
+    def wrap(self, command, marker):
+        # 在子Shell中执行，命令中的exit不会结束常驻进程
+        return f"( {command}\n) </dev/null 2>&1; printf '%s:%s\\n' '{marker}' \"$?\""
+
+    def with_env(self, command, variables):
+        assignments = ' '.join(f"{name}='" + value.replace("'", "'\"'\"'") + "'" for name, value in variables.items())
+        return f"{assignments} {command}"
+
+    def quote_executable(self, path):
+        if re.search(r"[^\w@%+=:,./-]", path):
+            return "'" + path.replace("'", "'\"'\"'") + "'"
+        return path
+
+
+def dialect_for(executable):
+    """根据可执行文件名选择对应的Shell方言"""
+    name = os.path.splitext(os.path.basename(executable))[0].lower()
+    if name in ('powershell', 'pwsh'):
+        return PowerShellDialect(executable)
+    return PosixShellDialect(executable)
+
+
+def default_dialect():
+    """默认Shell：可用环境变量PYENV_GUI_SHELL指定，否则Windows用powershell，其他系统优先pwsh，最后/bin/sh"""
+    executable = os.environ.get('PYENV_GUI_SHELL')
+    if not executable:
+        if sys.platform == 'win32':
+            executable = 'powershell'
+        else:
+            executable = shutil.which('pwsh') or '/bin/sh'
+    return dialect_for(executable)
+
+
+class ShellHost:
+    """一个常驻的Shell进程。
+
+    通过stdin逐条发送被结束标记包装的命令，从stdout按块读取输出，
+    直到遇到 "<marker>:<退出码>" 为止。同一时间只能执行一条命令。
+    """
+
+    def __init__(self, dialect, env=None, cwd=None):
+        self.dialect = dialect
+        self.env = env
+        self.cwd = cwd
+        self.process = None
+        self.last_exit_code = None
+        self.cancelled = False
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        # 非Windows系统上放入独立的进程组，取消时可以结束整个进程树
+        self.process = subprocess.Popen(
+            self.dialect.argv(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=self.env,
+            cwd=self.cwd,
+            creationflags=CREATE_NO_WINDOW,
+            start_new_session=(sys.platform != 'win32'),
+        )
+        for init_command in self.dialect.init_commands():
+            self._send(init_command)
+
+    def restart(self):
+        self.kill()
+        self.start()
+
+    def _send(self, line):
+        self.process.stdin.write((line + '\n').encode('utf-8'))
+        self.process.stdin.flush()
+
+    def stream(self, command, metrics=None):
+        """执行命令并产出输出文本片段（可能包含多行，也可能是没有换行的进度输出），
+        结束后退出码保存在last_exit_code中。
+
+        传入 command_metrics.CommandMetrics 时记录进程重启、发送时间、读取字节数和解码耗时。
+        """
+        self.last_exit_code = None
+        self.cancelled = False
+        marker = f"__PYENV_GUI_END_{os.urandom(16).hex()}__"
+        wrapped = self.dialect.wrap(command, marker)
+        finished = False
+        try:
+            # 如果进程在产生任何输出之前就已退出，自动重启并重试一次
+            for attempt in range(2):
+                if not self.alive:
+                    spawn_start = time.perf_counter()
+                    self.restart()
+                    if metrics is not None:
+                        metrics.record_spawn(spawn_start, time.perf_counter())
+                try:
+                    self._send(wrapped)
+                except OSError:
+                    continue
+                if metrics is not None:
+                    metrics.mark_sent()
+                reader = ShellOutputReader(self.process.stdout, marker, self.dialect.decoder(), metrics)
+                yield from reader
+                if reader.exit_code is not None:
+                    self.last_exit_code = reader.exit_code
+                    finished = True
+                    return
+                if reader.bytes_read or self.cancelled:
+                    break
+                self.kill()
+            if self.cancelled:
+                raise ShellCancelled(command)
+            raise ShellHostError(f"{self.dialect.name} host exited unexpectedly")
+        finally:
+            if not finished:
+                # 命令被中途放弃或进程异常退出，结束进程以免残留输出影响下一条命令
+                self.kill()
+
+    def run(self, command, metrics=None):
+        """执行命令并返回完整的输出和退出码"""
+        output = ''.join(self.stream(command, metrics))
+        return ShellResult(self.last_exit_code, output)
+
+    def cancel(self):
+        """从其他线程取消正在执行的命令：结束Shell进程及其所有子进程"""
+        self.cancelled = True
+        self.kill_tree()
+
+    def kill_tree(self):
+        process = self.process
+        if process is None or process.poll() is not None:
+            return
+        try:
+            if sys.platform == 'win32':
+                subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               creationflags=CREATE_NO_WINDOW)
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except OSError as e:
+            print(f"Error killing process tree: {e}")
+
+    def kill(self):
+        if self.process is not None:
+            try:
+                if self.process.poll() is None:
+                    self.process.kill()
+                self.process.wait(timeout=5)
+            except Exception as e:
+                print(f"Error stopping shell host: {e}")
+            for pipe in (self.process.stdin, self.process.stdout):
+                try:
+                    pipe.close()
+                except Exception:
+                    pass
+            self.process = None
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+        self.kill()
+
+
+class ShellPool:
+    """常驻Shell进程池，按需创建最多size个ShellHost并在命令之间复用。"""
+
+    def __init__(self, dialect=None, size=2, env=None, cwd=None):
+        self.dialect = dialect or default_dialect()
+        self.size = size
+        self.env = env
+        self.cwd = cwd
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return ShellHost(self.dialect, env=self.env, cwd=self.cwd)
+        return self._idle.get()
+
+    def _release(self, host):
+        if self._closed:
+            host.close()
+            return
+        self._idle.put(host)
+
+    @contextmanager
+    def host(self, metrics=None):
+        acquire_start = time.perf_counter()
+        host = self._acquire()
+        if metrics is not None:
+            metrics.record_queue(acquire_start, time.perf_counter())
+        try:
+            if not host.alive:
+                # 首次使用或进程已退出时自动(重新)启动
+                spawn_start = time.perf_counter()
+                host.start()
+                if metrics is not None:
+                    metrics.record_spawn(spawn_start, time.perf_counter())
+            yield host
+        finally:
+            self._release(host)
+
+    def warm_up(self):
+        # 预先启动一个进程，使第一条命令无需等待Shell冷启动
+        with self.host():
+            pass
+
+    def stream(self, command, metrics=None):
+        """执行命令并产出输出文本片段，生成器的返回值为退出码"""
+        with self.host(metrics) as host:
+            yield from host.stream(command, metrics)
+            return host.last_exit_code
+
+    def run(self, command, metrics=None):
+        with self.host(metrics) as host:
+            return host.run(command, metrics)
+
+    def refresh_environment(self):
+        # 让所有空闲进程重新加载环境变量；不支持的Shell直接重启进程
+        refresh_command = self.dialect.refresh_env_command()
+        hosts = []
+        while True:
+            try:
+                hosts.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for host in hosts:
+            try:
+                if refresh_command and host.alive:
+                    host.run(refresh_command)
+                else:
+                    host.kill()
+            except Exception as e:
+                print(f"Error refreshing shell environment: {e}")
+                host.kill()
+            self._idle.put(host)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
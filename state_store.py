@@ -0,0 +1,99 @@
+# 可观察的界面状态：任意线程中线程安全地修改，订阅者只在关心的键变化时收到通知，通知合并后在UI线程中执行
+import threading
+
+_MISSING = object()
+
+
+class StateStore:
+    """线程安全的可观察状态。
+
+    set()/update()/transform() 可以在任意线程中调用，只记录值真正发生变化的键。订阅了这些键的回调
+    通过 dispatch（例如 lambda callback: root.after(0, callback)）在UI线程中执行；通知执行之前的
+    多次修改合并为一次，每个回调最多调用一次。没有设置dispatch时在修改的线程中直接通知。
+    """
+
+    def __init__(self, values=None, dispatch=None):
+        self.dispatch = dispatch
+        self._values = dict(values or {})
+        # [(关心的键, 回调)]，回调参数为store本身
+        self._subscribers = []
+        self._pending = set()
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def set(self, **values):
+        return self.update(values)
+
+    def update(self, values):
+        """合并新值，返回发生变化的键"""
+        with self._lock:
+            changed = {key for key, value in values.items() if self._values.get(key, _MISSING) != value}
+            for key in changed:
+                self._values[key] = values[key]
+            dispatch = self._mark_pending(changed)
+        self._dispatch(dispatch)
+        return changed
+
+    def transform(self, key, function, default=None):
+        """用 function(旧值) 的结果替换key的值（读取和写入之间不会被其他线程修改），返回新值"""
+        with self._lock:
+            value = function(self._values.get(key, default))
+            changed = {key} if self._values.get(key, _MISSING) != value else set()
+            self._values[key] = value
+            dispatch = self._mark_pending(changed)
+        self._dispatch(dispatch)
+        return value
+
+    def _mark_pending(self, changed):
+        # 调用方持有_lock；只有被订阅的键才需要通知，返回是否需要安排一次通知
+        watched = {key for key in changed if any(key in keys for keys, _ in self._subscribers)}
+        if not watched:
+            return False
+        self._pending |= watched
+        if self._scheduled:
+            return False
+        self._scheduled = True
+        return True
+
+    def _dispatch(self, needed):
+        # 在锁外安排通知，dispatch可能直接执行通知
+        if not needed:
+            return
+        if self.dispatch is None:
+            self._notify()
+        else:
+            self.dispatch(self._notify)
+
+    def subscribe(self, keys, callback, immediate=True):
+        """订阅keys的变化，返回取消订阅的函数；immediate为True时立即用当前状态调用一次"""
+        entry = (frozenset(keys), callback)
+        with self._lock:
+            self._subscribers.append(entry)
+        if immediate:
+            callback(self)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _notify(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            self._scheduled = False
+            subscribers = list(self._subscribers)
+        for keys, callback in subscribers:
+            if keys & pending:
+                try:
+                    callback(self)
+                except Exception as e:
+                    print(f"Error updating state subscriber: {e}")
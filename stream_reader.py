@@ -0,0 +1,164 @@
+# 子进程输出读取：按块读取字节，用增量解码器解码后再拆分，多字节字符跨块也能正确解码，不换行的进度输出可以立即显示
+import codecs
+import functools
+import locale
+import sys
+import time
+
+# 每次读取的最大字节数
+CHUNK_SIZE = 64 * 1024
+# 检测到的编码与首选编码相同时使用的备用编码（中文Windows上pyenv-win的常见输出编码）
+LEGACY_FALLBACK_ENCODING = 'gbk'
+
+
+@functools.lru_cache(maxsize=None)
+def console_encoding():
+    """返回控制台代码页对应的编码，每个进程只检测一次。
+
+    Windows上优先取控制台输出代码页，无控制台（--noconsole打包）时取OEM代码页；
+    其他系统使用locale的首选编码。
+    """
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            code_page = kernel32.GetConsoleOutputCP() or kernel32.GetOEMCP()
+            if code_page:
+                return codecs.lookup(f"cp{code_page}").name
+        except Exception as e:
+            print(f"Error detecting console code page: {e}")
+    try:
+        return codecs.lookup(locale.getpreferredencoding(False)).name
+    except LookupError:
+        return 'utf-8'
+
+
+def fallback_encoding(encoding):
+    """首选编码解码失败时使用的编码"""
+    detected = console_encoding()
+    if codecs.lookup(detected).name != codecs.lookup(encoding).name:
+        return detected
+    return LEGACY_FALLBACK_ENCODING
+
+
+class IncrementalTextDecoder:
+    """增量解码器：先按首选编码严格解码，遇到无法解码的字节后本次命令剩余的输出改用备用编码（无法解码的字节替换为�）"""
+
+    def __init__(self, encoding='utf-8', fallback=None):
+        self.encoding = codecs.lookup(encoding).name
+        self.fallback = fallback
+        self._decoder = codecs.getincrementaldecoder(self.encoding)('strict' if fallback else 'replace')
+
+    def decode(self, data, final=False):
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError:
+            # 出错时解码器中仍保留着上一块末尾未完成的字节，与本块一起用备用编码重新解码
+            pending = self._decoder.getstate()[0]
+            self.encoding = codecs.lookup(self.fallback).name
+            self.fallback = None
+            self._decoder = codecs.getincrementaldecoder(self.encoding)('replace')
+            return self._decoder.decode(pending + data, final)
+
+
+def _marker_prefix_length(text, marker):
+    # text末尾可能是结束标记的开头部分，返回这部分的长度（暂不输出，等待下一块数据）
+    tail = text[-(len(marker) - 1):]
+    if marker[0] not in tail:
+        return 0
+    for length in range(min(len(marker) - 1, len(text)), 0, -1):
+        if text.endswith(marker[:length]):
+            return length
+    return 0
+
+
+class ShellOutputReader:
+    """从Shell进程的stdout读取一条命令的输出，直到 "<marker>:<退出码>" 为止。
+
+    迭代产出文本片段：片段可能包含多行，最后一段可能没有换行（例如进度条）；
+    "\\r\\n" 统一转换为 "\\n"，单独的 "\\r" 保留（表示回到行首）。
+    迭代结束后 exit_code 为退出码，读到文件末尾仍未遇到结束标记时为None。
+    """
+
+    def __init__(self, raw, marker, decoder, metrics=None, chunk_size=CHUNK_SIZE):
+        self.raw = raw
+        self.marker = marker
+        self.decoder = decoder
+        self.metrics = metrics
+        self.chunk_size = chunk_size
+        self.exit_code = None
+        self.bytes_read = 0
+        # read1 只要有数据就立即返回，不会等到凑满chunk_size或遇到换行
+        self._read_chunk = raw.read1 if hasattr(raw, 'read1') else raw.read
+
+    def _read(self):
+        data = self._read_chunk(self.chunk_size)
+        decode_start = time.perf_counter()
+        text = self.decoder.decode(data, final=not data)
+        if data:
+            self.bytes_read += len(data)
+            if self.metrics is not None:
+                self.metrics.record_read(len(data), 0, time.perf_counter() - decode_start)
+        return data, text
+
+    def _emit(self, text):
+        text = text.replace('\r\n', '\n') if '\r' in text else text
+        if self.metrics is not None:
+            self.metrics.lines_read += text.count('\n')
+        return text
+
+    def __iter__(self):
+        marker = self.marker
+        buffer = ''
+        while True:
+            data, text = self._read()
+            buffer += text
+            index = buffer.find(marker)
+            if index >= 0:
+                newline = buffer.find('\n', index)
+                if newline < 0 and data:
+                    # 退出码所在的行还没有读完
+                    continue
+                # 结束标记之前可能还有未换行的输出
+                if index > 0:
+                    yield self._emit(buffer[:index])
+                code = buffer[index + len(marker) + 1:newline if newline >= 0 else None].strip()
+                try:
+                    self.exit_code = int(code)
+                except ValueError:
+                    self.exit_code = 1
+                return
+            if not data:
+                if buffer:
+                    yield self._emit(buffer)
+                return
+            # 保留可能属于结束标记的结尾部分，以及可能与下一块的"\n"组成"\r\n"的结尾"\r"
+            cut = len(buffer) - _marker_prefix_length(buffer, marker)
+            if cut > 0 and buffer[cut - 1] == '\r':
+                cut -= 1
+            if cut > 0:
+                yield self._emit(buffer[:cut])
+                buffer = buffer[cut:]
+
+
+def iter_lines(pieces):
+    """把文本片段重新组合成完整的行（最后一行可能没有换行），用于需要按行处理输出的场合。
+
+    pieces是生成器时，其返回值（如退出码）作为本生成器的返回值。
+    """
+    pending = ''
+    iterator = iter(pieces)
+    while True:
+        try:
+            piece = next(iterator)
+        except StopIteration as stop:
+            if pending:
+                yield pending
+            return stop.value
+        pending += piece
+        if '\n' not in pending:
+            continue
+        # 只按"\n"拆分，单独的"\r"留在行内
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
@@ -0,0 +1,86 @@
+# atomic_file 的测试：并发写入同一个文件不会互相干扰，写入失败时保留原文件
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from atomic_file import atomic_write  # noqa: E402
+from catalogue_cache import read_catalogue, write_catalogue  # noqa: E402
+
+
+class AtomicWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'data.json')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_concurrent_writers(self):
+        errors = []
+
+        def write(number):
+            try:
+                for _ in range(50):
+                    with atomic_write(self.path) as f:
+                        json.dump({'writer': number, 'padding': 'x' * 4096}, f)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(number,)) for number in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertIn(json.load(f)['writer'], range(8))
+        self.assertEqual(os.listdir(self._tmp.name), ['data.json'])
+
+    def test_failed_write_keeps_old_file(self):
+        with atomic_write(self.path) as f:
+            f.write('old')
+        with self.assertRaises(ValueError):
+            with atomic_write(self.path) as f:
+                f.write('new')
+                raise ValueError('interrupted')
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'old')
+        self.assertEqual(os.listdir(self._tmp.name), ['data.json'])
+
+    def test_binary_mode(self):
+        with atomic_write(self.path, 'wb') as f:
+            f.write(b'\x00\xff')
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'\x00\xff')
+
+    def test_write_catalogue_from_threads(self):
+        path = os.path.join(self._tmp.name, 'available.txt')
+        versions = [f"3.{minor}.{patch}" for minor in range(8, 14) for patch in range(20)]
+        errors = []
+
+        def write(number):
+            try:
+                for _ in range(20):
+                    write_catalogue(path, versions, {'pyenv_version': str(number)})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(number,)) for number in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(read_catalogue(path)[0], versions)
+        self.assertEqual(os.listdir(self._tmp.name), ['available.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
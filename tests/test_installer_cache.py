@@ -0,0 +1,131 @@
+# installer_cache 的测试：用 benchmarks/range_server.py 作为上游服务器
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+import urllib.request
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'benchmarks'))
+
+import range_server  # noqa: E402
+from installer_cache import InstallerCache, InstallerMirror  # noqa: E402
+from segmented_download import SegmentedDownloader  # noqa: E402
+
+
+class InstallerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.served = os.path.join(self._tmp.name, 'served')
+        self.files = {}
+        for version in ('3.11.9', '3.12.0'):
+            data = os.urandom(200 * 1024)
+            self.files[version] = data
+            os.makedirs(os.path.join(self.served, version))
+            with open(os.path.join(self.served, version, 'python.exe'), 'wb') as f:
+                f.write(data)
+        self.server, self.url = range_server.make_server(self.served)
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmp.cleanup()
+
+    def make_cache(self, **kwargs):
+        downloader = SegmentedDownloader(segments=2, min_segment_bytes=64 * 1024, timeout=5, retries=1)
+        return InstallerCache(os.path.join(self._tmp.name, 'cache'), downloader=downloader, **kwargs)
+
+    @property
+    def requests(self):
+        return self.server.RequestHandlerClass.requests
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_fetch_downloads_once(self):
+        url = f"{self.url}/3.12.0/python.exe"
+        path = self.cache.fetch(url)
+        self.assertEqual(self.read(path), self.files['3.12.0'])
+        self.assertEqual(os.path.basename(path), hashlib.sha256(self.files['3.12.0']).hexdigest())
+        requests = self.requests
+        self.assertEqual(self.cache.fetch(url), path)
+        self.assertEqual(self.requests, requests)
+
+    def test_same_content_is_stored_once(self):
+        with open(os.path.join(self.served, '3.11.9', 'copy.exe'), 'wb') as f:
+            f.write(self.files['3.12.0'])
+        first = self.cache.fetch(f"{self.url}/3.12.0/python.exe")
+        second = self.cache.fetch(f"{self.url}/3.11.9/copy.exe")
+        self.assertEqual(first, second)
+        entries = self.cache.entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(len(entries[0]['urls']), 2)
+        self.assertEqual(self.cache.total_bytes, len(self.files['3.12.0']))
+
+    def test_truncated_object_is_downloaded_again(self):
+        url = f"{self.url}/3.12.0/python.exe"
+        path = self.cache.fetch(url)
+        with open(path, 'r+b') as f:
+            f.truncate(1000)
+        self.assertIsNone(self.cache.lookup(url))
+        self.assertEqual(self.read(self.cache.fetch(url)), self.files['3.12.0'])
+
+    def test_evict_removes_least_recently_used(self):
+        old_url, new_url = f"{self.url}/3.11.9/python.exe", f"{self.url}/3.12.0/python.exe"
+        old_path = self.cache.fetch(old_url)
+        time.sleep(0.01)
+        new_path = self.cache.fetch(new_url)
+        self.cache.evict(max_bytes=len(self.files['3.12.0']))
+        self.assertFalse(os.path.exists(old_path))
+        self.assertIsNone(self.cache.lookup(old_url))
+        self.assertEqual(self.cache.lookup(new_url), new_path)
+        self.cache.clear()
+        self.assertEqual((self.cache.entries(), self.cache.total_bytes), ([], 0))
+
+    def test_lookup_does_not_rewrite_index(self):
+        url = f"{self.url}/3.12.0/python.exe"
+        self.cache.fetch(url)
+        modified = os.stat(self.cache.index_path).st_mtime_ns
+        time.sleep(0.01)
+        for _ in range(5):
+            self.assertIsNotNone(self.cache.lookup(url))
+        self.assertEqual(os.stat(self.cache.index_path).st_mtime_ns, modified)
+        # flush() 保存内存中的最近使用时间
+        used = self.cache.entries()[0]['last_used']
+        self.cache.flush()
+        with open(self.cache.index_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(list(json.load(f)['objects'].values())[0]['last_used'], used)
+
+    def test_mirror_answers_range_requests(self):
+        mirror = InstallerMirror(self.cache, upstream=self.url)
+        base = mirror.start()
+        try:
+            url = f"{base}/3.12.0/python.exe"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertEqual(response.status, 200)
+                self.assertEqual(response.read(), self.files['3.12.0'])
+                etag = response.headers['ETag']
+            request = urllib.request.Request(url, headers={'Range': 'bytes=100-199', 'If-Range': etag})
+            with urllib.request.urlopen(request, timeout=5) as response:
+                self.assertEqual(response.status, 206)
+                size = len(self.files['3.12.0'])
+                self.assertEqual(response.headers['Content-Range'], f"bytes 100-199/{size}")
+                self.assertEqual(response.read(), self.files['3.12.0'][100:200])
+            # 其他 SegmentedDownloader 可以经镜像分段下载
+            destination = os.path.join(self._tmp.name, 'python.exe')
+            result = SegmentedDownloader(segments=4, min_segment_bytes=32 * 1024, timeout=5).download(
+                url, destination)
+            self.assertEqual((result.segments, self.read(destination)), (4, self.files['3.12.0']))
+        finally:
+            mirror.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+# pyenv_fs 的测试：在临时目录中构造 pyenv-win 的目录结构（versions/、version、bin/、.python-version）
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from pyenv_engine import PyenvEngine  # noqa: E402
+from pyenv_fs import PyenvFilesystem, UnrecognizedLayout, find_pyenv_root  # noqa: E402
+from shell_host import PosixShellDialect  # noqa: E402
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def make_pyenv_root(base, versions=(), global_versions=None, layout_dir='bin'):
+    """在base下创建 pyenv-win 目录，返回PYENV_ROOT"""
+    root = os.path.join(base, 'pyenv-win')
+    os.makedirs(os.path.join(root, 'versions'))
+    if layout_dir:
+        os.makedirs(os.path.join(root, layout_dir))
+    for version in versions:
+        os.makedirs(os.path.join(root, 'versions', version))
+    if global_versions is not None:
+        write_file(os.path.join(root, 'version'), global_versions)
+    return root
+
+
+class FakePool:
+    """记录执行的命令，返回固定的输出（代替ShellPool，验证回退到pyenv命令）"""
+
+    dialect = PosixShellDialect('/bin/sh')
+
+    def __init__(self, output='', exit_code=0):
+        self.output = output
+        self.exit_code = exit_code
+        self.commands = []
+
+    def run(self, command, metrics=None):
+        self.commands.append(command)
+        return SimpleNamespace(exit_code=self.exit_code, output=self.output)
+
+
+class PyenvFilesystemTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.base = self._tmp.name
+        self.root = make_pyenv_root(self.base, ['3.12.1', '3.9.13', '3.11.9-win32', '3.13.0rc1'],
+                                    '3.12.1\n# comment\n\n3.11.9-win32\n')
+        # 不是版本的条目：隐藏目录和普通文件
+        os.makedirs(os.path.join(self.root, 'versions', '.tmp'))
+        write_file(os.path.join(self.root, 'versions', 'README.txt'), 'not a version\n')
+        self.project = os.path.join(self.base, 'project')
+        self.nested = os.path.join(self.project, 'src', 'pkg')
+        os.makedirs(self.nested)
+        self.fs = PyenvFilesystem(self.root, env={})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_versions_are_directories_in_natural_order(self):
+        self.assertEqual(self.fs.versions(), ['3.9.13', '3.11.9-win32', '3.12.1', '3.13.0rc1'])
+
+    def test_global_versions_skip_comments_and_blank_lines(self):
+        self.assertEqual(self.fs.global_versions(), ['3.12.1', '3.11.9-win32'])
+
+    def test_global_versions_empty_without_version_file(self):
+        os.remove(self.fs.global_version_file)
+        self.assertEqual(self.fs.global_versions(), [])
+
+    def test_local_version_found_in_parent_directory(self):
+        path = os.path.join(self.project, '.python-version')
+        write_file(path, '3.9.13\n')
+        self.assertEqual(self.fs.local_version(self.nested), (['3.9.13'], path))
+
+    def test_local_version_nearest_file_wins(self):
+        write_file(os.path.join(self.project, '.python-version'), '3.9.13\n')
+        nearest = os.path.join(self.nested, '.python-version')
+        write_file(nearest, '3.12.1 3.11.9-win32\n')
+        self.assertEqual(self.fs.local_version(self.nested), (['3.12.1', '3.11.9-win32'], nearest))
+
+    def test_local_version_not_set(self):
+        self.assertEqual(self.fs.local_version(self.nested), (None, None))
+
+    def test_version_name_priority(self):
+        # 没有本地版本时使用全局版本
+        self.assertEqual(self.fs.version_name(self.nested), (['3.12.1', '3.11.9-win32'], self.fs.global_version_file))
+        # 本地版本优先于全局版本
+        local_file = os.path.join(self.project, '.python-version')
+        write_file(local_file, '3.9.13\n')
+        self.assertEqual(self.fs.version_name(self.nested), (['3.9.13'], local_file))
+        # PYENV_VERSION 优先于本地版本
+        fs = PyenvFilesystem(self.root, env={'PYENV_VERSION': '3.13.0rc1'})
+        self.assertEqual(fs.version_name(self.nested), (['3.13.0rc1'], 'PYENV_VERSION environment variable'))
+
+    def test_format_versions_matches_pyenv_output(self):
+        write_file(os.path.join(self.project, '.python-version'), '3.9.13\n')
+        local_file = os.path.join(self.project, '.python-version')
+        self.assertEqual(self.fs.format_versions(self.nested),
+                         f"* 3.9.13 (set by {local_file})\n"
+                         "  3.11.9-win32\n"
+                         "  3.12.1\n"
+                         "  3.13.0rc1\n")
+
+    def test_libexec_layout_is_recognized(self):
+        root = make_pyenv_root(os.path.join(self.base, 'other'), ['3.10.11'], layout_dir='libexec')
+        self.assertEqual(PyenvFilesystem(root, env={}).versions(), ['3.10.11'])
+
+    def test_discover_uses_environment_order(self):
+        env = {'PYENV_HOME': os.path.join(self.base, 'home'), 'PYENV_ROOT': self.root}
+        self.assertEqual(find_pyenv_root(env), os.path.normpath(self.root))
+        self.assertEqual(PyenvFilesystem.discover(env).versions_dir, os.path.join(self.root, 'versions'))
+
+
+class UnrecognizedLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        # 有versions目录但没有bin和libexec：不是pyenv-win
+        self.root = make_pyenv_root(self._tmp.name, ['3.12.1'], '3.12.1\n', layout_dir=None)
+        self.env = {'PYENV_ROOT': self.root}
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_queries_raise(self):
+        fs = PyenvFilesystem(self.root, env={})
+        self.assertFalse(fs.is_recognized())
+        for query in (fs.versions, fs.global_versions, fs.local_version, fs.version_name, fs.format_versions):
+            with self.assertRaises(UnrecognizedLayout):
+                query()
+
+    def test_missing_root_raises(self):
+        with self.assertRaises(UnrecognizedLayout):
+            PyenvFilesystem(os.path.join(self._tmp.name, 'missing'), env={}).versions()
+
+    def test_engine_falls_back_to_pyenv_command(self):
+        pool = FakePool(output='3.11.9\n')
+        engine = PyenvEngine(self._tmp.name, pool=pool, env=self.env)
+        self.assertIsNone(engine.filesystem())
+        self.assertIsNone(engine.query_filesystem('versions'))
+        self.assertEqual(engine.global_versions(), ['3.11.9'])
+        self.assertEqual(pool.commands, ['pyenv global'])
+
+    def test_engine_reads_recognized_layout_without_pyenv(self):
+        os.makedirs(os.path.join(self.root, 'bin'))
+        pool = FakePool(output='3.11.9\n')
+        engine = PyenvEngine(self._tmp.name, pool=pool, env=self.env)
+        self.assertEqual(engine.query_filesystem('global'), '3.12.1\n')
+        self.assertEqual(engine.global_versions(), ['3.12.1'])
+        self.assertEqual(pool.commands, [])
+
+
+class InstalledSpecTest(unittest.TestCase):
+    """global/local/uninstall 的版本说明按 PYENV_ROOT/versions 解析，不依赖已安装版本的缓存文件"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = make_pyenv_root(os.path.join(self._tmp.name, 'pyenv'), ['3.11.7', '3.10.11', '3.12.1'])
+        # 全新的数据目录：没有 installed_versions.txt
+        self.data_dir = os.path.join(self._tmp.name, 'data')
+        os.makedirs(self.data_dir)
+        self.pool = FakePool()
+        self.engine = PyenvEngine(self.data_dir, pool=self.pool, env={'PYENV_ROOT': self.root})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_resolves_against_versions_directory(self):
+        self.assertEqual(self.engine.resolve_params('global', '3.11'), ('3.11.7', [('3.11', '3.11.7')]))
+        self.assertEqual(self.engine.resolve_params('uninstall', 'latest'), ('3.12.1', [('latest', '3.12.1')]))
+        self.assertEqual(self.pool.commands, [])
+
+    def test_new_installs_are_seen(self):
+        self.assertEqual(self.engine.resolve_params('local', '3.13')[1], [('3.13', None)])
+        os.makedirs(os.path.join(self.root, 'versions', '3.13.1'))
+        # 目录签名包含修改时间，同一时间粒度内的变化也要看到
+        os.utime(os.path.join(self.root, 'versions'), ns=(1, 1))
+        self.assertEqual(self.engine.resolve_params('local', '3.13')[1], [('3.13', '3.13.1')])
+
+    def test_comma_separated_clauses_with_spaces(self):
+        self.assertEqual(self.engine.resolve_params('global', '>=3.10, <3.12 3.12'),
+                         ('3.11.7 3.12.1', [('>=3.10,<3.12', '3.11.7'), ('3.12', '3.12.1')]))
+
+    def test_unrecognized_layout_uses_cache_file(self):
+        engine = PyenvEngine(self.data_dir, pool=self.pool, env={'PYENV_ROOT': self._tmp.name})
+        self.assertEqual(engine.resolve_params('global', '3.11')[1], [('3.11', None)])
+        engine.save_installed_versions(['3.11.2'])
+        self.assertEqual(engine.resolve_params('global', '3.11')[1], [('3.11', '3.11.2')])
+
+
+if __name__ == '__main__':
+    unittest.main()
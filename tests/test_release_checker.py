@@ -0,0 +1,196 @@
+# release_checker 的测试：本地HTTP服务器模拟GitHub tags接口（ETag/304、Link分页、限流响应头和错误状态）
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from release_checker import BACKOFF_BASE_SECONDS, ReleaseChecker, parse_links  # noqa: E402
+
+NOW = 1_800_000_000
+
+
+class TagsHandler(BaseHTTPRequestHandler):
+    """按 page 参数返回 server.pages 中的一页标签，带ETag和指向下一页的Link；
+    server.fail_status 不为None时返回该错误状态，server.extra_headers 附加到每个响应"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlsplit(self.path).query)
+        number = int(query.get('page', ['1'])[0])
+        with server.lock:
+            server.requests.append((number, self.headers.get('If-None-Match')))
+        if server.fail_status is not None:
+            self.send_response(server.fail_status)
+            for name, value in server.extra_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        body = json.dumps([{'name': name} for name in server.pages[number - 1]]).encode('utf-8')
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        self.send_response(304 if self.headers.get('If-None-Match') == etag else 200)
+        self.send_header('ETag', etag)
+        if number < len(server.pages):
+            self.send_header('Link', f'<{server.base_url}/tags?per_page=100&page={number + 1}>; rel="next"')
+        for name, value in server.extra_headers.items():
+            self.send_header(name, value)
+        if self.headers.get('If-None-Match') == etag:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(pages):
+    """创建并在后台启动服务器，返回 (server, tags接口地址)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TagsHandler)
+    server.daemon_threads = True
+    server.pages = pages
+    server.fail_status = None
+    server.extra_headers = {}
+    server.requests = []
+    server.lock = threading.Lock()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True, name='tags-server').start()
+    return server, f"{server.base_url}/tags"
+
+
+class ReleaseCheckerTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self._tmp.name, 'release_cache.json')
+        # 最新的标签在第二页，第一页也不是按版本号排序的
+        self.server, self.url = make_server([['v3.1.1', 'v2.64.11', 'v3.0'],
+                                             ['v3.10.2', 'not-a-version'],
+                                             ['v1.2.5']])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmp.cleanup()
+
+    def checker(self, **kwargs):
+        return ReleaseChecker(self.cache_file, url=self.url, timeout=5, **kwargs)
+
+    def take_requests(self):
+        with self.server.lock:
+            requests, self.server.requests = self.server.requests, []
+        return requests
+
+    def test_follows_next_links_and_picks_highest_tag(self):
+        checker = self.checker()
+        self.assertEqual(checker.check(now=NOW), '3.10.2')
+        self.assertEqual(self.take_requests(), [(1, None), (2, None), (3, None)])
+        self.assertEqual(len(checker.cache['pages']), 3)
+        # 结果保存在缓存文件中
+        self.assertEqual(self.checker().latest, '3.10.2')
+
+    def test_unchanged_first_page_reuses_cached_result(self):
+        checker = self.checker()
+        checker.check(now=NOW)
+        self.take_requests()
+        self.assertEqual(checker.check(force=True, now=NOW + 10), '3.10.2')
+        requests = self.take_requests()
+        # 只请求第一页，带上次的ETag，服务器返回304
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0][0], 1)
+        self.assertIsNotNone(requests[0][1])
+        self.assertEqual(checker.cache['checked_at'], NOW + 10)
+
+    def test_unchanged_later_pages_come_from_cache(self):
+        checker = self.checker()
+        checker.check(now=NOW)
+        self.take_requests()
+        self.server.pages[0] = ['v3.1.1', 'v3.1.2']
+        self.assertEqual(checker.check(force=True, now=NOW + 10), '3.10.2')
+        # 每一页都带If-None-Match；第二、三页返回304，标签来自缓存
+        self.assertTrue(all(etag for _, etag in self.take_requests()))
+        self.assertEqual(sorted(name for page in checker.cache['pages'].values() for name in page['tags']),
+                         sorted(['v3.1.1', 'v3.1.2', 'v3.10.2', 'not-a-version', 'v1.2.5']))
+
+    def test_min_interval_skips_requests(self):
+        checker = self.checker(min_interval_hours=6)
+        checker.check(now=NOW)
+        self.take_requests()
+        self.assertEqual(checker.check(now=NOW + 3600), '3.10.2')
+        self.assertEqual(self.take_requests(), [])
+        checker.check(now=NOW + 6 * 3600)
+        self.assertEqual(len(self.take_requests()), 1)
+
+    def test_exhausted_rate_limit_stops_paging_until_reset(self):
+        reset = NOW + 5000
+        self.server.extra_headers = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)}
+        checker = self.checker(min_interval_hours=0)
+        self.assertEqual(checker.check(now=NOW), '3.1.1')
+        # 用完限流次数后不再读取下一页，重置之前不再请求
+        self.assertEqual(self.take_requests(), [(1, None)])
+        self.assertEqual(checker.cache['retry_after'], reset)
+        self.assertEqual(checker.next_check_time(), reset)
+        checker.check(now=reset - 1)
+        self.assertEqual(self.take_requests(), [])
+        # 第一页虽然未变化（304），上次没有读完的分页仍然会读取
+        self.server.extra_headers = {}
+        self.assertEqual(checker.check(now=reset), '3.10.2')
+        self.assertEqual([number for number, _ in self.take_requests()], [1, 2, 3])
+
+    def test_forbidden_with_retry_after(self):
+        self.server.fail_status = 403
+        self.server.extra_headers = {'Retry-After': '7200'}
+        checker = self.checker()
+        self.assertIsNone(checker.check(now=NOW))
+        self.assertEqual(checker.cache['retry_after'], NOW + 7200)
+        self.assertEqual(checker.cache['failures'], 1)
+
+    def test_errors_back_off_exponentially(self):
+        self.server.fail_status = 500
+        checker = self.checker(min_interval_hours=0)
+        checker.check(now=NOW)
+        self.assertEqual(checker.cache['retry_after'], NOW + BACKOFF_BASE_SECONDS)
+        # 退避期间不发请求
+        self.take_requests()
+        checker.check(now=NOW + BACKOFF_BASE_SECONDS - 1)
+        self.assertEqual(self.take_requests(), [])
+        later = NOW + BACKOFF_BASE_SECONDS
+        checker.check(now=later)
+        self.assertEqual(checker.cache['failures'], 2)
+        self.assertEqual(checker.cache['retry_after'], later + 2 * BACKOFF_BASE_SECONDS)
+        # 恢复后清除失败次数
+        self.server.fail_status = None
+        self.assertEqual(checker.check(force=True, now=later + 1), '3.10.2')
+        self.assertEqual(checker.cache['failures'], 0)
+
+    def test_connection_error_backs_off(self):
+        self.server.shutdown()
+        self.server.server_close()
+        checker = self.checker()
+        self.assertIsNone(checker.check(now=NOW))
+        self.assertEqual(checker.cache['failures'], 1)
+        # 失败时不更新检查时间，只按退避时间推迟
+        self.assertEqual(checker.next_check_time(), NOW + BACKOFF_BASE_SECONDS)
+
+
+class ParseLinksTest(unittest.TestCase):
+
+    def test_parse_links(self):
+        header = ('<https://api.github.com/x?page=2>; rel="next", '
+                  '<https://api.github.com/x?page=5>; rel="last"')
+        self.assertEqual(parse_links(header), {'next': {'url': 'https://api.github.com/x?page=2'},
+                                               'last': {'url': 'https://api.github.com/x?page=5'}})
+        self.assertEqual(parse_links(None), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# segmented_download 的测试：用 benchmarks/range_server.py 提供文件，所有失败都应该是DownloadError
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'benchmarks'))
+
+import range_server  # noqa: E402
+from segmented_download import DownloadError, SegmentedDownloader  # noqa: E402
+
+
+class SegmentedDownloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.served = os.path.join(self._tmp.name, 'served')
+        os.makedirs(self.served)
+        self.data = os.urandom(300 * 1024)
+        with open(os.path.join(self.served, 'python.exe'), 'wb') as f:
+            f.write(self.data)
+        self.destination = os.path.join(self._tmp.name, 'python.exe')
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self._tmp.cleanup()
+
+    def serve(self, **kwargs):
+        server, url = range_server.make_server(self.served, **kwargs)
+        self.servers.append(server)
+        return url
+
+    def downloader(self):
+        return SegmentedDownloader(segments=4, min_segment_bytes=64 * 1024, timeout=5, retries=1)
+
+    def test_segmented_download(self):
+        url = self.serve()
+        result = self.downloader().download(f"{url}/python.exe", self.destination,
+                                            expected_sha256=hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(result.segments, 4)
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_stream_without_ranges(self):
+        url = self.serve(supports_ranges=False)
+        result = self.downloader().download(f"{url}/python.exe", self.destination)
+        self.assertEqual((result.segments, result.size), (1, len(self.data)))
+
+    def test_http_error_on_probe(self):
+        url = self.serve()
+        with self.assertRaises(DownloadError):
+            self.downloader().download(f"{url}/missing.exe", self.destination)
+        self.assertFalse(os.path.exists(self.destination))
+
+    def test_connection_refused(self):
+        url = self.serve()
+        server = self.servers.pop()
+        server.shutdown()
+        server.server_close()
+        with self.assertRaises(DownloadError):
+            self.downloader().download(f"{url}/python.exe", self.destination)
+
+    def test_checksum_mismatch(self):
+        url = self.serve()
+        with self.assertRaises(DownloadError):
+            self.downloader().download(f"{url}/python.exe", self.destination, expected_sha256='0' * 64)
+        self.assertFalse(os.path.exists(self.destination))
+
+    def interrupt(self, url):
+        # 每个响应只发送一部分后断开，不重试：下载失败并留下 .part 和进度文件
+        handler = self.servers[-1].RequestHandlerClass
+        handler.drop_after = 20 * 1024
+        downloader = SegmentedDownloader(segments=4, min_segment_bytes=64 * 1024, timeout=5, retries=0)
+        with self.assertRaises(DownloadError):
+            downloader.download(f"{url}/python.exe", self.destination)
+        handler.drop_after = 0
+        self.assertTrue(os.path.exists(f"{self.destination}.part"))
+        self.assertTrue(os.path.exists(f"{self.destination}.part.json"))
+
+    def test_resume_after_interruption(self):
+        url = self.serve()
+        self.interrupt(url)
+        result = self.downloader().download(f"{url}/python.exe", self.destination)
+        self.assertGreater(result.resumed_bytes, 0)
+        self.assertEqual(result.sha256, hashlib.sha256(self.data).hexdigest())
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(os.path.exists(f"{self.destination}.part.json"))
+
+    def test_changed_etag_discards_partial_download(self):
+        url = self.serve()
+        self.interrupt(url)
+        # 大小不变但内容和修改时间改变，服务器返回新的ETag
+        path = os.path.join(self.served, 'python.exe')
+        changed = os.urandom(len(self.data))
+        with open(path, 'wb') as f:
+            f.write(changed)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        result = self.downloader().download(f"{url}/python.exe", self.destination)
+        self.assertEqual(result.resumed_bytes, 0)
+        with open(self.destination, 'rb') as f:
+            self.assertEqual(f.read(), changed)
+
+
+if __name__ == '__main__':
+    unittest.main()
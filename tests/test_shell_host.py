@@ -0,0 +1,119 @@
+# shell_host 的测试：用 /bin/sh 作为常驻Shell验证输出分隔、退出码、取消和进程重启
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from shell_host import PosixShellDialect, ShellCancelled, ShellHost, ShellPool  # noqa: E402
+from stream_reader import IncrementalTextDecoder, ShellOutputReader  # noqa: E402
+
+SH = '/bin/sh'
+
+
+@unittest.skipUnless(os.path.exists(SH), 'needs /bin/sh')
+class ShellHostTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ShellPool(PosixShellDialect(SH), size=1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_output_is_framed_per_command(self):
+        self.assertEqual(self.pool.run("echo one; printf 'two'"), (0, 'one\ntwo'))
+        # 上一条命令没有换行的输出不会混入下一条命令
+        self.assertEqual(self.pool.run('echo three'), (0, 'three\n'))
+
+    def test_stderr_is_merged(self):
+        self.assertEqual(self.pool.run('echo out; echo err 1>&2').output, 'out\nerr\n')
+
+    def test_exit_codes(self):
+        self.assertEqual(self.pool.run('true').exit_code, 0)
+        self.assertEqual(self.pool.run('false').exit_code, 1)
+        self.assertEqual(self.pool.run("sh -c 'exit 7'").exit_code, 7)
+
+    def test_exit_does_not_end_the_host(self):
+        with self.pool.host() as host:
+            process = host.process
+            self.assertEqual(host.run('echo before; exit 3'), (3, 'before\n'))
+            self.assertIs(host.process, process)
+            self.assertTrue(host.alive)
+            self.assertEqual(host.run('echo after'), (0, 'after\n'))
+
+    def test_stream_returns_exit_code(self):
+        pieces = []
+        stream = self.pool.stream('seq 1 2000; exit 4')
+        try:
+            while True:
+                pieces.append(next(stream))
+        except StopIteration as stop:
+            exit_code = stop.value
+        self.assertEqual(exit_code, 4)
+        self.assertEqual(''.join(pieces).split(), [str(number) for number in range(1, 2001)])
+
+    def test_cancel(self):
+        host = ShellHost(PosixShellDialect(SH))
+        host.start()
+        timer = threading.Timer(0.3, host.cancel)
+        timer.start()
+        started = time.monotonic()
+        with self.assertRaises(ShellCancelled):
+            host.run('echo started; sleep 30')
+        self.assertLess(time.monotonic() - started, 10)
+        timer.join()
+        # 取消后自动重启进程，可以继续执行命令
+        self.assertEqual(host.run('echo again'), (0, 'again\n'))
+        host.close()
+
+    def test_restart_after_host_dies(self):
+        with self.pool.host() as host:
+            host.run('true')
+            old_pid = host.process.pid
+            host.process.kill()
+            host.process.wait()
+            self.assertEqual(host.run('echo revived'), (0, 'revived\n'))
+            self.assertNotEqual(host.process.pid, old_pid)
+
+
+class FragmentedStream(io.RawIOBase):
+    """每次最多返回size个字节，模拟结束标记被拆分到多次读取中"""
+
+    def __init__(self, data, size):
+        self.data = data
+        self.size = size
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        chunk, self.data = self.data[:self.size], self.data[self.size:]
+        return chunk
+
+
+class ShellOutputReaderTest(unittest.TestCase):
+
+    def read(self, data, chunk_size):
+        marker = '__END_0123456789__'
+        reader = ShellOutputReader(FragmentedStream(data.replace(b'MARK', marker.encode()), chunk_size), marker,
+                                   IncrementalTextDecoder('utf-8', 'gbk'), chunk_size=chunk_size)
+        return ''.join(reader), reader.exit_code
+
+    def test_marker_split_across_chunks(self):
+        data = 'line 1\n进度 50%\rline 2\r\nMARK:42\nleftover'.encode('utf-8')
+        for chunk_size in (1, 2, 3, 5, 7, 64):
+            self.assertEqual(self.read(data, chunk_size), ('line 1\n进度 50%\rline 2\n', 42), chunk_size)
+
+    def test_output_without_trailing_newline(self):
+        self.assertEqual(self.read(b'progress 10%MARK:0\n', 4), ('progress 10%', 0))
+
+    def test_missing_marker(self):
+        self.assertEqual(self.read(b'partial output', 4), ('partial output', None))
+
+
+if __name__ == '__main__':
+    unittest.main()
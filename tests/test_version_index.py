@@ -0,0 +1,53 @@
+# version_index 的测试：连续输入时的增量搜索必须与重新搜索的结果相同
+import os
+import sys
+import unittest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from version_index import FUZZY_THRESHOLD, VersionIndex  # noqa: E402
+
+
+def catalogue():
+    # 与 pyenv install -l 相似的版本列表：预发布版和架构变体
+    versions = []
+    for minor in range(6, 14):
+        for patch in range(0, 12):
+            for variant in ('', 'rc1'):
+                for arch in ('', '-win32', '-arm64'):
+                    versions.append(f"3.{minor}.{patch}{variant}{arch}")
+    return versions
+
+
+class IncrementalSearchTest(unittest.TestCase):
+
+    def assert_incremental_matches_fresh(self, versions, texts):
+        index = VersionIndex(versions)
+        for text in texts:
+            self.assertEqual(index.search(text), VersionIndex(versions).search(text), text)
+
+    def test_fuzzy_matches_kept_after_many_direct_matches(self):
+        # "31" 直接匹配的版本足够多时不做模糊匹配，"312" 仍然要模糊匹配到 3.1.2
+        versions = [f"2.{n}.31" for n in range(FUZZY_THRESHOLD + 10)] + ['3.1.2']
+        index = VersionIndex(versions)
+        self.assertNotIn('3.1.2', index.search('31'))
+        self.assertIn('3.1.2', index.search('312'))
+
+    def test_typing_sequences(self):
+        versions = catalogue()
+        for texts in (('3', '3.', '3.1', '3.12', '3.12.', '3.12.1'),
+                      ('3', '31', '312', '3120'),
+                      ('w', 'wi', 'win', 'win3', 'win32'),
+                      ('r', 'rc', 'rc1', 'rc1-'),
+                      ('3.1', '3.10', '3.1', '3.11')):
+            self.assert_incremental_matches_fresh(versions, texts)
+
+    def test_limit_and_view(self):
+        index = VersionIndex(catalogue())
+        self.assertEqual(index.search('3.12', limit=1), ['3.12.11'])
+        self.assertTrue(all(version.endswith('-win32') for version in index.search('3.12', view='win32')))
+
+
+if __name__ == '__main__':
+    unittest.main()
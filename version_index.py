@@ -0,0 +1,217 @@
+# 可用版本的内存索引：一次加载，支持前缀、子串和模糊搜索，并预先计算常用的筛选视图
+import bisect
+import os
+import re
+
+from version_model import DEFAULT_ARCH, Version
+from version_spec import parse_spec, version_key
+
+# 前缀和子串匹配少于该数量时才进行模糊匹配
+FUZZY_THRESHOLD = 50
+# 筛选视图：全部、只有正式版、每个次版本的最新补丁版、按架构
+VIEW_ALL = 'all'
+VIEW_STABLE = 'stable'
+VIEW_LATEST = 'latest'
+ARCH_VIEWS = ('amd64', 'win32', 'arm64')
+VIEWS = (VIEW_ALL, VIEW_STABLE, VIEW_LATEST) + ARCH_VIEWS
+
+
+def rank_key(version):
+    # 正式版排在预发布版之前，同类中按版本号从旧到新；同一版本号的默认架构排在 -win32/-arm64 等变体之后，
+    # 从新到旧排列时默认架构排第一
+    return (version.is_stable, version.sort_key)
+
+
+def fuzzy_pattern(text):
+    # 按顺序包含text中所有字符的正则，如 "312" -> 3[^1]*1[^2]*2
+    return re.compile(re.escape(text[0]) + ''.join(f"[^{re.escape(char)}]*{re.escape(char)}" for char in text[1:]))
+
+
+def read_versions_file(path):
+    # 读取版本缓存文件，忽略空行和以#开头的注释行
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+class VersionIndex:
+    """版本列表的搜索索引。
+
+    构建时把每个版本解析为 Version，预先计算小写形式、按版本号从新到旧的排名、排序后的前缀表
+    以及各筛选视图（VIEWS），同一次加载的索引被下拉框、搜索和批量安装共用。
+    search() 按 前缀 > 子串 > 模糊（按顺序包含所有字符）的优先级返回结果，
+    同一优先级内正式版优先、较新的版本排在前面，例如搜索 "3.12" 时最新的 3.12.x 排第一。
+    连续输入时（新搜索文本以上一次的文本开头）只在上一次的匹配结果中继续查找。
+    """
+
+    def __init__(self, versions):
+        self.versions = list(versions)
+        self.items = [Version(version) for version in self.versions]
+        self._lower = [version.lower() for version in self.versions]
+        # 每个版本按版本号从新到旧的排名
+        newest_first = sorted(range(len(self.items)), key=lambda i: rank_key(self.items[i]), reverse=True)
+        self._rank = [0] * len(self.versions)
+        for rank, i in enumerate(newest_first):
+            self._rank[i] = rank
+        # 筛选视图：视图名 -> 按排名排列的下标
+        self._views = self._build_views(newest_first)
+        self._known = set(self.versions)
+        # 版本说明的候选表：(架构, 是否包含预发布版) -> (从旧到新的键列表, 下标列表)，第一次使用时构建
+        self._spec_candidates = {}
+        # 按小写字符串排序的 (字符串, 原始下标) 列表，用于二分查找前缀
+        self._sorted = sorted((text, i) for i, text in enumerate(self._lower))
+        self._sorted_keys = [text for text, i in self._sorted]
+        # 上一次搜索的文本和匹配到的下标，用于增量搜索
+        self._last_text = None
+        self._last_candidates = None
+
+    def __len__(self):
+        return len(self.versions)
+
+    def _build_views(self, newest_first):
+        items = self.items
+        stable = [i for i in newest_first if items[i].is_stable]
+        # 每个次版本的第一个默认构建正式版就是它的最新补丁版
+        latest = []
+        seen_minors = set()
+        for i in stable:
+            if items[i].is_plain and items[i].minor not in seen_minors:
+                seen_minors.add(items[i].minor)
+                latest.append(i)
+        views = {VIEW_ALL: newest_first, VIEW_STABLE: stable, VIEW_LATEST: latest}
+        for arch in ARCH_VIEWS:
+            views[arch] = [i for i in newest_first if items[i].release and items[i].machine == arch]
+        return views
+
+    def view(self, name=VIEW_ALL):
+        """返回视图中的版本（从新到旧，正式版在前）；未知的视图名返回全部版本"""
+        return [self.versions[i] for i in self._views.get(name, self._views[VIEW_ALL])]
+
+    def _candidates(self, arch, prerelease):
+        candidates = self._spec_candidates.get((arch, prerelease))
+        if candidates is None:
+            items = self.items
+            machine = arch or DEFAULT_ARCH
+            chosen = sorted((i for i, item in enumerate(items)
+                             if item.release and not item.extra and item.machine == machine
+                             and (prerelease or not item.pre)),
+                            key=lambda i: items[i].sort_key)
+            candidates = ([version_key(items[i]) for i in chosen], chosen)
+            self._spec_candidates[(arch, prerelease)] = candidates
+        return candidates
+
+    def _latest_match(self, spec, prerelease):
+        # 在按版本号排序的候选表中二分查找区间上限，再向前跳过被排除的版本
+        keys, indices = self._candidates(spec.arch, prerelease)
+        low = 0 if spec.lower is None else bisect.bisect_left(keys, spec.lower)
+        position = len(keys) if spec.upper is None else bisect.bisect_left(keys, spec.upper)
+        while position > low:
+            position -= 1
+            if not any(start <= keys[position] < end for start, end in spec.excluded):
+                return indices[position]
+        return None
+
+    def resolve(self, text):
+        """把版本说明（见 version_spec.parse_spec）解析为列表中满足它的最新版本。
+
+        text本身在列表中时直接返回；是完整版本号但不在列表中或没有满足的版本时返回None，
+        格式错误时抛出 version_spec.SpecError。
+        """
+        text = text.strip()
+        if text in self._known:
+            return text
+        spec = parse_spec(text)
+        if spec is None:
+            return None
+        for prerelease in ((False, True) if spec.prerelease is None else (spec.prerelease,)):
+            i = self._latest_match(spec, prerelease)
+            if i is not None:
+                return self.versions[i]
+        return None
+
+    def _prefix_indices(self, text):
+        start = bisect.bisect_left(self._sorted_keys, text)
+        end = bisect.bisect_left(self._sorted_keys, text + '\uffff', start)
+        return [self._sorted[k][1] for k in range(start, end)]
+
+    def search(self, text, limit=None, view=None):
+        """搜索版本，返回按相关度排序的版本列表；text为空时按原始顺序返回全部。
+
+        指定view（VIEWS之一）时只返回该视图中的版本，text为空时按视图的顺序返回。
+        """
+        text = text.strip().lower()
+        if not text:
+            versions = self.view(view) if view else self.versions
+            return versions[:limit] if limit else list(versions)
+
+        rank = self._rank
+        lower = self._lower
+        # 新文本是上一次文本的延续时，匹配结果一定是上一次结果的子集
+        last_text, candidates = self._last_text, self._last_candidates
+        if candidates is None or not text.startswith(last_text):
+            candidates = range(len(lower))
+
+        prefix = self._prefix_indices(text)
+        matched = set(prefix)
+        substring = [i for i in candidates if i not in matched and text in lower[i]]
+        matched.update(substring)
+        # 模糊匹配：按顺序包含搜索文本中的所有字符，字符间距越小越靠前
+        fuzzy = []
+        if len(matched) < FUZZY_THRESHOLD:
+            fuzzy_search = fuzzy_pattern(text).search
+            for i in candidates:
+                if i in matched:
+                    continue
+                match = fuzzy_search(lower[i])
+                if match:
+                    fuzzy.append((match.end() - match.start(), rank[i], i))
+
+        # 只有完整计算过模糊匹配时，本次结果才能作为下一次增量搜索的候选集
+        self._last_text = text
+        self._last_candidates = sorted(matched.union(i for span, r, i in fuzzy)) if len(matched) < FUZZY_THRESHOLD else None
+
+        results = sorted(prefix, key=rank.__getitem__)
+        results += sorted(substring, key=rank.__getitem__)
+        results += [i for span, r, i in sorted(fuzzy)]
+        if view in self._views and view != VIEW_ALL:
+            allowed = set(self._views.get(view, ()))
+            results = [i for i in results if i in allowed]
+        if limit:
+            results = results[:limit]
+        return [self.versions[i] for i in results]
+
+
+class VersionIndexCache:
+    """基于文件的索引缓存，文件的修改时间或大小变化时才重新加载。"""
+
+    def __init__(self, path):
+        self.path = path
+        # (文件签名, 索引) 作为一个整体替换，其他线程看到的要么是旧索引要么是新索引
+        self._state = (None, VersionIndex([]))
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        # 读取文件中的版本列表，子类可以覆盖以解析额外信息
+        return read_versions_file(self.path)
+
+    def get(self):
+        signature = self._file_signature()
+        cached_signature, index = self._state
+        if signature != cached_signature:
+            versions = []
+            if signature is not None:
+                try:
+                    versions = self._load()
+                except Exception as e:
+                    print(f"Error loading versions from {self.path}: {e}")
+            index = VersionIndex(versions)
+            self._state = (signature, index)
+        return index
+
+    def invalidate(self):
+        self._state = (None, self._state[1])
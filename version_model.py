@@ -0,0 +1,83 @@
+# 结构化的Python版本号：解析一次得到各组成部分和排序键，用于按语义排序和分类（正式版、架构、次版本）
+import re
+
+# 版本号末尾的架构后缀，没有后缀的是默认架构
+ARCH_SUFFIX_PATTERN = re.compile(r'-(win32|arm64|amd64)$')
+# 去掉架构后缀后的版本号：发布号、预发布标识和编号、其余后缀（例如自由线程版本的 "t"）
+VERSION_PATTERN = re.compile(r'^(\d+(?:\.\d+)*)(?:(dev|a|b|rc)(\d*))?(.*)$')
+# 没有架构后缀的版本对应的架构
+DEFAULT_ARCH = 'amd64'
+# 预发布阶段的先后顺序，正式版最后
+PRE_ORDER = {'dev': 0, 'a': 1, 'b': 2, 'rc': 3, '': 4}
+# 同一版本号的架构变体排在默认版本之前，从新到旧排列时默认版本排第一
+ARCH_ORDER = {'arm64': 0, 'win32': 1, 'amd64': 2, '': 3}
+
+
+class Version:
+    """解析后的版本号，例如 "3.12.0rc1-arm64" -> release=(3, 12, 0), pre='rc', pre_number=1, arch='arm64'。
+
+    sort_key 在构造时计算一次：按发布号、预发布阶段、其余后缀和架构比较，3.9.x 排在 3.12.x 之前，
+    3.12.0rc1 排在 3.12.0 之前。无法解析的名称 release 为空元组，排在所有版本之前。
+    """
+
+    __slots__ = ('text', 'release', 'pre', 'pre_number', 'extra', 'arch', 'sort_key')
+
+    def __init__(self, text):
+        self.text = text
+        arch_match = ARCH_SUFFIX_PATTERN.search(text)
+        self.arch = arch_match.group(1) if arch_match else ''
+        match = VERSION_PATTERN.match(text[:arch_match.start()] if arch_match else text)
+        if match:
+            self.release = tuple(int(part) for part in match.group(1).split('.'))
+            self.pre = match.group(2) or ''
+            self.pre_number = int(match.group(3) or 0)
+            self.extra = match.group(4)
+        else:
+            self.release, self.pre, self.pre_number, self.extra = (), '', 0, text
+        self.sort_key = (self.release, PRE_ORDER[self.pre], self.pre_number, self.extra,
+                         ARCH_ORDER[self.arch], text)
+
+    def __repr__(self):
+        return f"Version({self.text!r})"
+
+    def __str__(self):
+        return self.text
+
+    def __eq__(self, other):
+        return isinstance(other, Version) and self.text == other.text
+
+    def __hash__(self):
+        return hash(self.text)
+
+    def __lt__(self, other):
+        return self.sort_key < other.sort_key
+
+    @property
+    def is_stable(self):
+        """正式版（不是 dev/alpha/beta/rc）"""
+        return bool(self.release) and not self.pre
+
+    @property
+    def is_plain(self):
+        """默认构建：没有架构后缀和其他后缀"""
+        return bool(self.release) and not self.arch and not self.extra
+
+    @property
+    def machine(self):
+        """架构名称，没有后缀时为 DEFAULT_ARCH"""
+        return self.arch or DEFAULT_ARCH
+
+    @property
+    def minor(self):
+        """次版本号，例如 (3, 12)"""
+        return self.release[:2]
+
+    @property
+    def base(self):
+        """去掉架构后缀的版本号，例如 "3.12.0rc1" """
+        return self.text[:-len(self.arch) - 1] if self.arch else self.text
+
+
+def sort_versions(versions, reverse=False):
+    """按语义排序版本号字符串"""
+    return sorted(versions, key=lambda text: Version(text).sort_key, reverse=reverse)
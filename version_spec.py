@@ -0,0 +1,172 @@
+# 版本说明（spec）：用 "3.11"、">=3.10,<3.12"、"latest-stable-amd64" 等写法代替完整的版本号
+import re
+
+from version_model import ARCH_SUFFIX_PATTERN, DEFAULT_ARCH, PRE_ORDER, Version
+
+# 比较子句，例如 ">=3.10"、"==3.11.*"、"~=3.11"
+CLAUSE_PATTERN = re.compile(r'^(>=|<=|==|!=|~=|>|<)\s*(\d+(?:\.\d+)*(?:(?:dev|a|b|rc)\d*)?)(\.\*)?$')
+# 不带运算符的版本前缀，例如 "3"、"3.11"、"3.11.*"
+PREFIX_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)(?:\.\*)?$|^(\d+(?:\.\d+)+)\.\*$')
+# latest、latest-stable、latest-pre，可以再加架构后缀
+LATEST_PATTERN = re.compile(r'^latest(?:-(stable|pre))?$')
+# 比较时发布号补齐到的长度，"3.11" 与 "3.11.0" 相同
+RELEASE_PARTS = 3
+
+
+class SpecError(ValueError):
+    """版本说明的格式错误，例如 ">=abc" 或 "~=3" """
+
+
+def _pad(release):
+    return release + (0,) * (RELEASE_PARTS - len(release))
+
+
+def version_key(version):
+    """Version 在版本说明中比较用的键：(补齐的发布号, 预发布阶段, 预发布编号)"""
+    return (_pad(version.release), PRE_ORDER[version.pre], version.pre_number)
+
+
+def _bound(text):
+    version = Version(text)
+    if not version.release or version.extra or version.arch:
+        raise SpecError(f"invalid version in spec: {text!r}")
+    return version
+
+
+def _floor(version):
+    # 不小于 version 的第一个键：正式版号包含它自己的所有预发布版
+    if version.pre:
+        return version_key(version)
+    return (_pad(version.release), -1, 0)
+
+
+def _after(version):
+    # 紧跟在 version 之后的键（比 version 本身大，比任何更大的版本小）
+    if version.pre:
+        return version_key(version) + (1,)
+    return (_pad(version.release), PRE_ORDER[''], 0, 1)
+
+
+def _next_prefix(release):
+    # 前缀的下一个值，例如 (3, 11) -> (3, 12)
+    return (_pad(release[:-1] + (release[-1] + 1,)), -1, 0)
+
+
+class VersionSpec:
+    """解析后的版本说明：半开区间 [lower, upper) 内、不在排除区间中、架构一致的版本。
+
+    lower/upper 为 version_key 形式的键（None表示不限），excluded 为 [(下限, 上限)] 的排除区间。
+    arch 为空时只匹配默认构建；prerelease 为 None 时优先正式版，没有匹配的正式版时才使用预发布版，
+    True 时包含预发布版，False 时只使用正式版。
+    """
+
+    __slots__ = ('text', 'lower', 'upper', 'excluded', 'arch', 'prerelease')
+
+    def __init__(self, text, lower=None, upper=None, excluded=(), arch='', prerelease=None):
+        self.text = text
+        self.lower = lower
+        self.upper = upper
+        self.excluded = tuple(excluded)
+        self.arch = arch
+        self.prerelease = prerelease
+
+    def __repr__(self):
+        return f"VersionSpec({self.text!r})"
+
+    def contains_key(self, key):
+        if self.lower is not None and key < self.lower:
+            return False
+        if self.upper is not None and key >= self.upper:
+            return False
+        return not any(low <= key < high for low, high in self.excluded)
+
+    def accepts(self, version, prerelease=True):
+        """version（Version）是否满足说明；prerelease为False时不接受预发布版"""
+        if not version.release or version.extra or version.machine != (self.arch or DEFAULT_ARCH):
+            return False
+        if version.pre and not prerelease:
+            return False
+        return self.contains_key(version_key(version))
+
+
+def _clause_range(operator, text, wildcard):
+    version = _bound(text)
+    if wildcard:
+        if version.pre or operator not in ('==', '!='):
+            raise SpecError(f"'.*' only works with == and != on a release number: {text!r}")
+        return _floor(version), _next_prefix(version.release)
+    if operator == '>=':
+        return _floor(version), None
+    if operator == '>':
+        return _after(version), None
+    if operator == '<':
+        return None, _floor(version)
+    if operator == '<=':
+        return None, _after(version)
+    if operator == '~=':
+        if len(version.release) < 2:
+            raise SpecError(f"~= needs at least two release numbers: {text!r}")
+        return _floor(version), _next_prefix(version.release[:-1])
+    return _floor(version), _after(version)
+
+
+def split_spec_args(params):
+    """按空白分割参数，逗号前后的空白不分割，例如 ">=3.10, <3.12 -f" -> [">=3.10,<3.12", "-f"]"""
+    args = []
+    for part in params.split():
+        if args and (args[-1].endswith(',') or part.startswith(',')):
+            args[-1] += part
+        else:
+            args.append(part)
+    return args
+
+
+def parse_spec(text):
+    """解析版本说明，返回 VersionSpec；text是完整的版本号或其他普通参数时返回None，格式错误时抛出SpecError。
+
+    支持的写法（都可以加 -win32/-arm64/-amd64 后缀指定架构）：
+      3、3.11、3.11.*          该前缀下的最新版本
+      >=3.10,<3.12             逗号分隔的比较子句（>= > <= < == != ~=），== 和 != 支持 .* 通配
+      latest、latest-stable    最新正式版（latest在没有正式版时使用预发布版，latest-stable不会）
+      latest-pre               最新版本，包括预发布版
+    """
+    spec = text.strip()
+    arch_match = ARCH_SUFFIX_PATTERN.search(spec)
+    arch = arch_match.group(1) if arch_match else ''
+    body = spec[:arch_match.start()].strip() if arch_match else spec
+    if not body:
+        return None
+
+    latest = LATEST_PATTERN.match(body)
+    if latest:
+        prerelease = {'stable': False, 'pre': True}.get(latest.group(1))
+        return VersionSpec(spec, arch=arch, prerelease=prerelease)
+
+    prefix = PREFIX_PATTERN.match(body)
+    if prefix:
+        release = tuple(int(part) for part in (prefix.group(1) or prefix.group(2)).split('.'))
+        return VersionSpec(spec, (_pad(release), -1, 0), _next_prefix(release), arch=arch)
+
+    if body[0] not in '<>=!~':
+        # 完整的版本号（例如 3.11.9、3.13.0rc1）或其他参数原样使用
+        return None
+    lower = upper = None
+    excluded = []
+    prerelease = None
+    for clause in body.split(','):
+        match = CLAUSE_PATTERN.match(clause.strip())
+        if not match:
+            raise SpecError(f"invalid version spec clause: {clause.strip()!r}")
+        operator, version_text, wildcard = match.groups()
+        low, high = _clause_range(operator, version_text, bool(wildcard))
+        if operator == '!=':
+            excluded.append((low, high))
+            continue
+        if Version(version_text).pre:
+            # 明确写出预发布版本号时允许匹配预发布版
+            prerelease = True
+        if low is not None and (lower is None or low > lower):
+            lower = low
+        if high is not None and (upper is None or high < upper):
+            upper = high
+    return VersionSpec(spec, lower, upper, excluded, arch, prerelease)